@@ -0,0 +1,129 @@
+"""
+Benchmark the tolerant JSON parser against the regex-based repair it replaces.
+
+Run from the backend directory:
+    python -m benchmarks.bench_json_repair
+
+Compares worst-case time on adversarial model outputs of up to ~32k
+characters (about 8192 output tokens) for:
+  - the code-fence regex fallback previously used by analyze_resume_with_gemini
+  - the regex chain previously used by functions clean_json_response
+  - services.json_repair.loads_tolerant
+"""
+import json
+import re
+import time
+from typing import Callable, List, Optional, Tuple
+
+from services.json_repair import loads_tolerant
+
+LEGACY_FENCE_PATTERN = r"```json\s*(.*?)\s*```|```\s*(.*?)\s*```|{\s*\"match_score\".*}"
+
+# The legacy unescaped-quote pattern uses a variable-width lookbehind, which
+# Python's re module rejects at compile time
+LEGACY_QUOTE_PATTERN = r'(?<=[:\[\{,]\s*")([^"]*?)(?<!")(?:")(?=[^"]*"(?:,|\}|\]|$))'
+
+
+def legacy_fence_fallback(text: str) -> object:
+    """The regex fallback previously used by analyze_resume_with_gemini"""
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        json_match = re.search(LEGACY_FENCE_PATTERN, text, re.DOTALL)
+        if json_match:
+            json_str = json_match.group(1) or json_match.group(2) or json_match.group(0)
+            return json.loads(json_str.strip())
+        return None
+
+
+def legacy_clean_json_response(text: str) -> str:
+    """The regex chain previously used by clean_json_response"""
+    json_match = re.search(r'(\{.*\})', text, re.DOTALL)
+    if json_match:
+        text = json_match.group(1)
+    text = re.sub(LEGACY_QUOTE_PATTERN, r'\1\\"', text)
+    text = re.sub(r'(\}|\]|")\s*(\{|\[|")', r'\1,\2', text)
+    text = re.sub(r',\s*(\}|\])', r'\1', text)
+    text = re.sub(r'(\{|\,)\s*([a-zA-Z0-9_]+)\s*:', r'\1"\2":', text)
+    return text
+
+
+def _unterminated_fence(size: int) -> str:
+    # Output cut off inside a code fence while the model was emitting padding
+    return '```json\n{"match_score": 70, "feedback": "' + " " * size
+
+
+def _embedded_quotes(size: int) -> str:
+    # Long feedback full of unescaped quotes, as models produce when quoting the resume
+    body = 'the candidate wrote "led a team" and "shipped" it, '
+    return '{"feedback": "' + body * (size // len(body)) + '", "match_score": 70}'
+
+
+def _truncated_fields(size: int) -> str:
+    # Many small fields with a trailing comma and the closing brace cut off
+    field = '"k": "v "x" y", '
+    return '```json\n{' + field * (size // len(field))
+
+
+CASES: List[Tuple[str, Callable[[int], str]]] = [
+    ("unterminated fence", _unterminated_fence),
+    ("embedded quotes", _embedded_quotes),
+    ("truncated fields", _truncated_fields),
+]
+
+SIZES = [1_000, 2_000, 4_000, 8_000, 16_000, 32_000]
+
+# Once a legacy implementation takes longer than this, larger sizes are skipped
+LEGACY_TIME_LIMIT = 5.0
+
+
+def _time(fn: Callable[[str], object], text: str, repeat: int) -> Tuple[float, Optional[str]]:
+    best = float("inf")
+    error = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        try:
+            fn(text)
+        except re.error as e:
+            error = f"re.error: {e}"
+        except Exception:
+            pass
+        best = min(best, time.perf_counter() - start)
+    return best, error
+
+
+def main() -> None:
+    print(
+        f"{'case':<20} {'chars':>7} {'fence regex (ms)':>17} "
+        f"{'clean_json (ms)':>16} {'tolerant (ms)':>14}"
+    )
+    errors = set()
+    for name, build in CASES:
+        skip = {"fence": False, "clean": False}
+        for size in SIZES:
+            text = build(size)
+            columns = []
+            legacy = (("fence", legacy_fence_fallback), ("clean", legacy_clean_json_response))
+            for label, fn in legacy:
+                if skip[label]:
+                    columns.append("skipped")
+                    continue
+                elapsed, error = _time(fn, text, repeat=1)
+                if error:
+                    errors.add(error)
+                    columns.append("error")
+                    continue
+                columns.append(f"{elapsed * 1000:.2f}")
+                skip[label] = elapsed > LEGACY_TIME_LIMIT
+            tolerant, _ = _time(loads_tolerant, text, repeat=3)
+            print(
+                f"{name:<20} {len(text):>7} {columns[0]:>17} {columns[1]:>16} "
+                f"{tolerant * 1000:>14.2f}"
+            )
+
+    for error in sorted(errors):
+        print(f"legacy clean_json_response failed before doing any work: {error}")
+
+
+if __name__ == "__main__":
+    main()
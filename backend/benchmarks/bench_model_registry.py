@@ -0,0 +1,124 @@
+"""
+Benchmark per-call model setup and connection churn with and without the
+shared model registry.
+
+Run from the backend directory:
+    python -m benchmarks.bench_model_registry
+
+Measures:
+  - building a GenerativeModel with its generation config for every call
+    versus fetching the shared one from services.model_registry
+  - HTTP requests on a new session per call (what the openai library does
+    by default) versus one shared keep-alive session, against a local server,
+    counting the connections each opens
+  - with GOOGLE_API_KEY set, the first Gemini request on a cold channel
+    versus requests on the warm channel
+"""
+import asyncio
+import os
+import time
+from typing import Set
+
+import aiohttp
+from aiohttp import web
+import google.generativeai as genai  # type: ignore
+
+from services import model_registry
+
+GENERATION_CONFIG = {
+    "temperature": 0.1,
+    "top_p": 0.7,
+    "top_k": 20,
+    "max_output_tokens": 1024,
+}
+
+
+def bench_model_setup(calls: int = 20000) -> None:
+    start = time.perf_counter()
+    for _ in range(calls):
+        genai.GenerativeModel(model_name="gemini-1.5-pro", generation_config=GENERATION_CONFIG)
+    fresh = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        model_registry.get_model("gemini-1.5-pro", GENERATION_CONFIG)
+    shared = time.perf_counter() - start
+
+    print(f"Model setup over {calls} calls:")
+    print(f"  new GenerativeModel per call  {fresh / calls * 1e6:8.2f} us/call")
+    print(f"  shared registry model         {shared / calls * 1e6:8.2f} us/call")
+
+
+async def bench_http_sessions(requests: int = 500) -> None:
+    connections: Set[int] = set()
+
+    async def handle(request: web.Request) -> web.Response:
+        connections.add(id(request.transport))
+        return web.json_response({"ok": True})
+
+    app = web.Application()
+    app.router.add_get("/", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]  # type: ignore
+    url = f"http://127.0.0.1:{port}/"
+
+    try:
+        start = time.perf_counter()
+        for _ in range(requests):
+            async with aiohttp.ClientSession() as session:
+                async with session.get(url) as response:
+                    await response.read()
+        per_call = time.perf_counter() - start
+        per_call_connections = len(connections)
+
+        connections.clear()
+        start = time.perf_counter()
+        async with aiohttp.ClientSession() as session:
+            for _ in range(requests):
+                async with session.get(url) as response:
+                    await response.read()
+        shared = time.perf_counter() - start
+        shared_connections = len(connections)
+    finally:
+        await runner.cleanup()
+
+    print(f"\nHTTP requests over {requests} calls (local server, no TLS):")
+    print(f"  new session per call   {per_call / requests * 1e3:7.3f} ms/call"
+          f"  {per_call_connections:5d} connections")
+    print(f"  shared session         {shared / requests * 1e3:7.3f} ms/call"
+          f"  {shared_connections:5d} connections")
+    print("  (each avoided connection also saves a TLS handshake in production)")
+
+
+async def bench_live_channel(requests: int = 5) -> None:
+    api_key = os.getenv("GOOGLE_API_KEY")
+    if not api_key:
+        print("\nGOOGLE_API_KEY not set, skipping the live channel benchmark")
+        return
+
+    genai.configure(api_key=api_key)
+    model = model_registry.get_model("gemini-1.5-flash", GENERATION_CONFIG)
+
+    cold = await model_registry.warm_up_models([model])
+    warm = []
+    for _ in range(requests):
+        timings = await model_registry.warm_up_models([model])
+        warm.extend(t for t in timings.values() if t is not None)
+
+    print("\nGemini count_tokens round trip:")
+    print(f"  cold channel  {cold[model.model_name]} s")
+    if warm:
+        print(f"  warm channel  {sum(warm) / len(warm):.3f} s (mean of {len(warm)})")
+
+
+def main() -> None:
+    bench_model_setup()
+    asyncio.run(bench_http_sessions())
+    asyncio.run(bench_live_channel())
+
+
+if __name__ == "__main__":
+    main()
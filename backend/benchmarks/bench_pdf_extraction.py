@@ -0,0 +1,116 @@
+"""
+Benchmark PDF text extraction engines.
+
+Run from the backend directory:
+    python -m benchmarks.bench_pdf_extraction
+
+Builds text PDFs of 1, 5, 20 and 100 resume-like pages and reports the
+median time to extract each one:
+  - in-process: every page extracted in the calling thread
+  - process pool: pages split across the long-lived worker pool
+  - adaptive: services.pdf_parser.extract_text_from_pdf with the default
+    engine, which picks in-process or the pool per document
+The last column shows the page count from which the adaptive engine uses
+the pool, as learned so far. Process pool timings depend on the cores
+available; with one core the pool cannot beat in-process extraction.
+"""
+import contextlib
+import io
+import os
+import random
+import statistics
+import time
+
+from PyPDF2 import PdfReader
+
+from services import pdf_parser
+
+VOCABULARY = (
+    "python django flask fastapi react kubernetes docker aws postgresql redis kafka "
+    "microservices led built designed developed implemented migrated optimized reduced "
+    "latency customers revenue dashboards pipelines services platform team engineers"
+).split()
+
+
+def make_pdf(pages: int, lines_per_page: int = 45, seed: int = 5) -> bytes:
+    """Build a PDF with a page of Helvetica text lines per page"""
+    rng = random.Random(seed)
+    objects = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    pages_id = len(objects) + 2 * pages + 1
+    page_ids = []
+    for _ in range(pages):
+        lines = [" ".join(rng.choice(VOCABULARY) for _ in range(12)) for _ in range(lines_per_page)]
+        shown = " ".join(f"({line}) '" for line in lines)
+        content = f"BT /F1 10 Tf 14 TL 50 780 Td {shown} ET"
+        stream = content.encode("latin-1")
+        contents = add(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>"
+            % (pages_id, font, contents)
+        ))
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    add(b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, pages))
+    catalog = add(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+              % (len(objects) + 1, catalog, xref))
+    return out.getvalue()
+
+
+def median_time(func, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main() -> None:
+    workers = pdf_parser.PDF_PROCESS_WORKERS
+    print(f"{os.cpu_count()} cores, {workers} pool workers\n")
+    # Spawn the workers up front, even where the adaptive engine never uses them
+    pdf_parser.get_process_pool().submit(abs, 0).result()
+
+    print(f"{'pages':>6} {'in-process':>11} {'pool':>11} {'adaptive':>11} {'cutoff':>7}")
+    for pages in (1, 5, 20, 100):
+        pdf = make_pdf(pages)
+        repeat = 5 if pages < 100 else 3
+
+        def reader() -> PdfReader:
+            return PdfReader(io.BytesIO(pdf))
+
+        expected = pdf_parser._extract_pages_in_process(reader(), pages)
+        assert pdf_parser._extract_pages_in_pool(pdf, pages) == expected
+
+        inline = median_time(lambda: pdf_parser._extract_pages_in_process(reader(), pages), repeat)
+        pool = median_time(lambda: pdf_parser._extract_pages_in_pool(pdf, pages), repeat)
+        # extract_text_from_pdf logs every document
+        with contextlib.redirect_stdout(io.StringIO()):
+            adaptive = median_time(lambda: pdf_parser.extract_text_from_pdf(pdf), repeat)
+        cutoff = pdf_parser._extraction_costs.min_pages(min(workers, pages))
+        print(f"{pages:>6} {inline * 1e3:>8.1f} ms {pool * 1e3:>8.1f} ms "
+              f"{adaptive * 1e3:>8.1f} ms {cutoff if cutoff is not None else '-':>7}")
+
+    pdf_parser.shutdown_process_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark batched resume/JD similarity scoring.
+
+Run from the backend directory:
+    python -m benchmarks.bench_similarity
+
+Reports the time to vectorize one resume, then, for 1,000, 10,000 and
+50,000 stored resume vectors, the time to score one job description
+against all of them:
+  - pairwise: one dot product per stored resume in a Python loop
+  - batched: services.similarity.VectorIndex.rank, a single matrix-vector
+    product followed by a top-10 partial sort
+"""
+import random
+import time
+
+import numpy as np
+
+from services.similarity import HashedVectorizer, VectorIndex
+
+JOB_DESCRIPTION = (
+    "Senior Python Backend Engineer. Requirements: 5+ years building REST APIs with Django "
+    "or FastAPI, PostgreSQL, Docker and Kubernetes on AWS. Experience with microservices, "
+    "CI/CD and mentoring engineers."
+)
+
+VOCABULARY = (
+    "python django flask fastapi react angular node java spring kubernetes docker aws azure "
+    "gcp postgresql mysql mongodb redis kafka microservices rest graphql ci/cd jenkins git "
+    "agile scrum led built designed developed implemented migrated optimized reduced latency "
+    "customers revenue dashboards pipelines services platform team engineers mentored tally "
+    "gst accounting audit sales marketing recruitment payroll excel analytics"
+).split()
+
+
+def make_resume(rng: random.Random, words: int = 400) -> str:
+    return " ".join(rng.choice(VOCABULARY) for _ in range(words))
+
+
+def main() -> None:
+    rng = random.Random(11)
+    vectorizer = HashedVectorizer()
+    print(f"{vectorizer.dimensions} dimensions, float32\n")
+
+    resumes = [make_resume(rng) for _ in range(200)]
+    start = time.perf_counter()
+    vectors = vectorizer.vectorize_many(resumes)
+    per_resume = (time.perf_counter() - start) / len(resumes)
+    print(f"vectorize one 400-word resume: {per_resume * 1e3:.2f} ms\n")
+
+    print(f"{'stored':>8} {'pairwise':>12} {'batched':>12} {'speedup':>9}")
+    for size in (1000, 10000, 50000):
+        index = VectorIndex(vectorizer, capacity=size)
+        for i in range(size):
+            index.add_vector(f"resume-{i}", vectors[i % len(vectors)])
+
+        query = vectorizer.vectorize(JOB_DESCRIPTION)
+        stored = [vectors[i % len(vectors)] for i in range(size)]
+        start = time.perf_counter()
+        pairwise = [float(np.dot(vector, query)) for vector in stored]
+        pairwise_time = time.perf_counter() - start
+
+        repeat = 5
+        start = time.perf_counter()
+        for _ in range(repeat):
+            top = index.rank(JOB_DESCRIPTION, top_k=10)
+        batched_time = (time.perf_counter() - start) / repeat
+
+        assert abs(top[0][1] - max(pairwise)) < 1e-5
+        print(f"{size:>8} {pairwise_time * 1e3:>9.2f} ms {batched_time * 1e3:>9.2f} ms "
+              f"{pairwise_time / batched_time:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark the compiled skill matcher against the per-skill regex loop it
+replaces in functions generate_default_response.
+
+Run from the backend directory:
+    python -m benchmarks.bench_skill_matcher
+
+For taxonomies of 50, 5,000 and 50,000 skills, matches one resume and one
+job description and reports:
+  - the legacy loop: two re.search calls per skill, each building a fresh
+    \\b...\\b pattern
+  - services.skill_matcher.SkillMatcher: one-off build time and the time to
+    scan both documents once
+"""
+import random
+import re
+import time
+from typing import List
+
+from services.skill_matcher import SkillMatcher
+
+BASE_SKILLS = [
+    "python", "java", "javascript", "typescript", "react", "angular", "vue", "node", "express",
+    "django", "flask", "sql", "nosql", "mongodb", "postgres", "mysql", "aws", "azure", "gcp",
+    "docker", "kubernetes", "ci/cd", "git", "agile", "scrum", "product management",
+    "project management", "leadership", "communication", "problem solving",
+    "critical thinking", "data analysis", "machine learning", "ai", "nlp", "computer vision",
+    "data science", "ui/ux", "design", "photoshop", "illustrator", "figma", "sketch", "html",
+    "css", "sass", "less", "swift", "kotlin", "objective-c",
+]
+
+RESUME = (
+    "Senior software engineer with 7 years of experience in Python, Django and React. "
+    "Built data analysis pipelines on AWS with Docker and Kubernetes, led agile teams, "
+    "introduced CI/CD with Git, and mentored engineers on machine learning and NLP. "
+) * 25
+
+JOB_DESCRIPTION = (
+    "We are hiring a backend engineer skilled in Python, Django, PostgreSQL, Kubernetes "
+    "and AWS. Experience with machine learning, data science and strong communication "
+    "and leadership is a plus. "
+) * 10
+
+
+def make_taxonomy(size: int, seed: int = 7) -> List[str]:
+    """The base skills padded with synthetic one to three word phrases"""
+    rng = random.Random(seed)
+    syllables = ["ka", "lo", "mi", "ra", "te", "zu", "po", "ne", "vi", "sa", "do", "gre", "tor"]
+    skills = list(BASE_SKILLS[:size])
+    seen = set(skills)
+    while len(skills) < size:
+        words = [
+            "".join(rng.choice(syllables) for _ in range(rng.randint(2, 4)))
+            for _ in range(rng.randint(1, 3))
+        ]
+        phrase = " ".join(words)
+        if phrase not in seen:
+            seen.add(phrase)
+            skills.append(phrase)
+    return skills
+
+
+def legacy_match(skills: List[str], resume_text: str, job_description: str) -> List[str]:
+    """The per-skill loop previously used by generate_default_response"""
+    matched_skills = []
+    for skill in skills:
+        if re.search(r'\b' + re.escape(skill) + r'\b', resume_text, re.IGNORECASE) and \
+           re.search(r'\b' + re.escape(skill) + r'\b', job_description, re.IGNORECASE):
+            matched_skills.append(skill)
+    return matched_skills
+
+
+def matcher_match(matcher: SkillMatcher, resume_text: str, job_description: str) -> List[str]:
+    resume_skills = set(matcher.find(resume_text))
+    return [skill for skill in matcher.find(job_description) if skill in resume_skills]
+
+
+def main() -> None:
+    print(f"Resume {len(RESUME)} chars, job description {len(JOB_DESCRIPTION)} chars\n")
+    print(
+        f"{'skills':>8} {'legacy loop':>14} {'matcher build':>14} "
+        f"{'matcher scan':>14} {'speedup':>9}"
+    )
+    for size in (50, 5000, 50000):
+        skills = make_taxonomy(size)
+
+        start = time.perf_counter()
+        legacy = legacy_match(skills, RESUME, JOB_DESCRIPTION)
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        matcher = SkillMatcher(skills)
+        build_time = time.perf_counter() - start
+
+        repeat = 20
+        start = time.perf_counter()
+        for _ in range(repeat):
+            matched = matcher_match(matcher, RESUME, JOB_DESCRIPTION)
+        scan_time = (time.perf_counter() - start) / repeat
+
+        if set(matched) != set(legacy):
+            print(f"  note: results differ: legacy {sorted(set(legacy) - set(matched))}, "
+                  f"matcher {sorted(set(matched) - set(legacy))}")
+        print(f"{size:>8} {legacy_time * 1e3:>11.2f} ms {build_time * 1e3:>11.2f} ms "
+              f"{scan_time * 1e3:>11.2f} ms {legacy_time / scan_time:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Benchmark peak memory of handling one resume upload.
+
+Run from the backend directory:
+    python -m benchmarks.bench_uploads
+
+Each request runs in a fresh process, which is handed a PDF the way the
+form parser leaves it (an UploadFile over a SpooledTemporaryFile, on disk
+past 1 MB) and then stores it with a stand-in for the Storage client and
+extracts its text:
+  - read: file.read() into bytes, shared by upload_from_string and the parser
+  - spooled: services.uploads.receive_upload, with the uploader and parser
+    reading the upload's buffer, or the mapped spool file for large ones
+Each column shows how far peak RSS rose above the process's peak before
+the request, which is what concurrent requests add to a worker, and the
+request time. Text is extracted in-process, so the process pool doesn't
+blur the numbers. PyPDF2's parsed objects take many times the file's size,
+so they set the peak for both pipelines once a file has more than a few
+pages.
+"""
+import asyncio
+import contextlib
+import io
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_pdf_extraction import make_pdf
+
+# The form parser's spool size in Starlette
+FORM_SPOOL_BYTES = 1024 * 1024
+
+
+def peak_rss() -> int:
+    """Peak resident set size of this process in bytes"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class StorageBlob:
+    """Stands in for a Storage blob, reading uploads in chunks like the client"""
+
+    def upload_from_file(self, stream, content_type=None) -> None:
+        while stream.read(1024 * 1024):
+            pass
+
+    def upload_from_string(self, data, content_type=None) -> None:
+        self.upload_from_file(io.BytesIO(data), content_type)
+
+
+def run_request(pipeline: str, path: str, results) -> None:
+    """Handle one upload of the PDF at path, in a fresh process"""
+    os.environ["PDF_EXTRACTION_ENGINE"] = "inline"
+    os.environ["RESUME_CACHE_DB_PATH"] = ""
+    from fastapi import UploadFile
+
+    from services import uploads
+    from services.pdf_parser import extract_pdf_document
+
+    form_file = tempfile.SpooledTemporaryFile(max_size=FORM_SPOOL_BYTES)
+    if os.path.getsize(path) > FORM_SPOOL_BYTES:
+        # Where the form parser leaves a large file, without its in-memory
+        # buffer raising the peak before the request starts
+        form_file.rollover()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(64 * 1024)
+            if not chunk:
+                break
+            form_file.write(chunk)
+    form_file.seek(0)
+    file = UploadFile(form_file, filename="resume.pdf")
+
+    async def handle() -> int:
+        if pipeline == "read":
+            content = await file.read()
+            StorageBlob().upload_from_string(content, content_type="application/pdf")
+            return len(extract_pdf_document(content)["text"])
+        upload = await uploads.receive_upload(file, max_pages=10_000)
+        try:
+            with upload.open() as stream:
+                StorageBlob().upload_from_file(stream, content_type="application/pdf")
+            return len(extract_pdf_document(upload.source)["text"])
+        finally:
+            upload.close()
+
+    before = peak_rss()
+    start = time.perf_counter()
+    # extract_pdf_document logs every document
+    with contextlib.redirect_stdout(io.StringIO()):
+        chars = asyncio.run(handle())
+    results.put((time.perf_counter() - start, peak_rss() - before, chars))
+
+
+def measure(pipeline: str, path: str):
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=run_request, args=(pipeline, path, results))
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+
+def main() -> None:
+    print(f"{'pages':>6} {'size':>8} {'read':>18} {'spooled':>18}")
+    with tempfile.TemporaryDirectory() as directory:
+        for pages in (2, 20, 100, 400):
+            path = os.path.join(directory, f"{pages}.pdf")
+            with open(path, "wb") as f:
+                f.write(make_pdf(pages))
+            size = os.path.getsize(path)
+
+            row = []
+            extracted = set()
+            for pipeline in ("read", "spooled"):
+                seconds, extra, chars = measure(pipeline, path)
+                extracted.add(chars)
+                row.append(f"{extra / 2**20:6.1f} MB {seconds * 1e3:6.0f} ms")
+            assert len(extracted) == 1, "pipelines extracted different text"
+            print(f"{pages:>6} {size / 2**20:>5.2f} MB {row[0]:>18} {row[1]:>18}")
+
+
+if __name__ == "__main__":
+    main()
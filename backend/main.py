@@ -1,15 +1,42 @@
 import os
+import json
+import math
+import zipfile
 from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse, PlainTextResponse
 from dotenv import load_dotenv  # type: ignore
 import google.generativeai as genai  # type: ignore
-from services.pdf_parser import extract_text_from_pdf
-from services.resume_analyzer import analyze_resume_with_gemini
+from services.pdf_parser import start_process_pool, shutdown_process_pool
+from services.resume_cache import get_resume_profile, extract_resume_text
+from services.resume_analyzer import (
+    analyze_resume_with_gemini,
+    stream_analysis_with_gemini,
+    analyze_resume_against_jobs,
+    prewarm_analysis_models,
+    MULTI_JOB_MAX_JOBS,
+)
+from services.model_registry import MODEL_PREWARM, start_keepalive, stop_keepalive
+from services.skill_taxonomy import get_skill_taxonomy
+from services.batch_analysis import collect_batch_files, analyze_batch
+from services.job_queue import JobQueue, QueueFullError, SUCCEEDED, FAILED
+from services.model_scheduler import BACKGROUND, set_lane, reset_lane
+from services.rate_limiter import (
+    SlidingWindowLimiter,
+    QuotaExceeded,
+    create_quota_store,
+    parse_limits,
+    USER_RATE_LIMITS,
+    USER_BATCH_RATE_LIMITS,
+)
+from services.metrics import REGISTRY, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from services.tracing import TracingMiddleware, stage
+from services.executors import run_io, run_cpu, start_executors, shutdown_executors
+from services.uploads import SpooledUpload, UploadLimitMiddleware, UploadRejected, receive_upload
 from services.firebase_admin import save_resume_file
 from services.database import FirestoreDB
 from services.auth import get_current_user
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, AsyncIterator
 import uvicorn
 import asyncio
 from fastapi import BackgroundTasks
@@ -31,6 +58,12 @@ app = FastAPI(
     version="0.1.0",
 )
 
+# Turn away oversized resume uploads before the form parser spools them;
+# added before CORS so the 413 still carries the CORS headers
+app.add_middleware(
+    UploadLimitMiddleware, paths=["/analyze", "/analyze/stream", "/analyze/multi", "/analyze-dev"]
+)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -50,6 +83,126 @@ app.add_middleware(
     allow_headers=["Content-Type", "Authorization", "Accept", "Origin", "X-Requested-With"],
 )
 
+# Per-stage request timing: Server-Timing headers, latency histograms and
+# optional trace export
+app.add_middleware(TracingMiddleware)
+
+
+# Per-user quotas on the endpoints that call the model, shared by the
+# workers on a host through the quota store
+_quota_store = create_quota_store()
+analysis_quota = SlidingWindowLimiter("analysis", parse_limits(USER_RATE_LIMITS), _quota_store)
+batch_quota = SlidingWindowLimiter("batch", parse_limits(USER_BATCH_RATE_LIMITS), _quota_store)
+
+
+@app.exception_handler(QuotaExceeded)
+async def quota_exceeded_handler(request, exc: QuotaExceeded):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(math.ceil(exc.retry_after))},
+    )
+
+
+@app.exception_handler(UploadRejected)
+async def upload_rejected_handler(request, exc: UploadRejected):
+    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
+
+
+@app.on_event("startup")
+async def start_quota_sync():
+    analysis_quota.start_sync()
+    batch_quota.start_sync()
+
+
+@app.on_event("shutdown")
+async def stop_quota_sync():
+    analysis_quota.stop_sync()
+    batch_quota.stop_sync()
+
+
+# Background analyses for async /analyze requests
+job_queue = JobQueue()
+
+
+async def _run_analysis_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Analyze a saved resume and store the analysis, as a queued job"""
+    # Nobody is waiting on the connection, so requests made inline go first
+    lane = set_lane(BACKGROUND)
+    try:
+        analysis_result = await analyze_resume_with_gemini(
+            payload["resume_text"], payload["job_description"]
+        )
+    finally:
+        reset_lane(lane)
+    analysis_data = {"job_description": payload["job_description"], **analysis_result}
+    analysis_id = await run_io(
+        FirestoreDB.create_analysis, payload["user_id"], payload["resume_id"], analysis_data
+    )
+    return {
+        "resume_id": payload["resume_id"],
+        "analysis_id": analysis_id,
+        "result": analysis_result,
+    }
+
+
+@app.on_event("startup")
+async def start_job_queue():
+    job_queue.register("analysis", _run_analysis_job)
+    job_queue.start()
+
+
+@app.on_event("shutdown")
+async def stop_job_queue():
+    await job_queue.stop()
+
+
+@app.on_event("startup")
+async def prewarm_models():
+    # Build the shared models and open the Gemini channel before the first
+    # request, so it doesn't pay for the connection setup
+    if MODEL_PREWARM:
+        timings = await prewarm_analysis_models()
+        print(f"Pre-warmed models: {timings}")
+    start_keepalive()
+
+
+@app.on_event("shutdown")
+async def stop_model_keepalive():
+    stop_keepalive()
+
+
+@app.on_event("startup")
+async def start_pdf_workers():
+    # Spawn the PDF extraction processes now rather than on the first large upload
+    if await run_cpu(start_process_pool):
+        print("Started PDF extraction process pool")
+
+
+@app.on_event("shutdown")
+async def stop_pdf_workers():
+    await run_cpu(shutdown_process_pool)
+
+
+@app.on_event("startup")
+async def load_skill_taxonomy():
+    # Build the skill index once, before the first request needs it
+    taxonomy = get_skill_taxonomy()
+    print(f"Loaded skill taxonomy: {taxonomy.stats()}")
+
+
+@app.on_event("startup")
+async def start_blocking_executors():
+    # Separate bounded thread pools for blocking I/O and CPU work, so slow
+    # uploads can't hold up parsing and a burst of parsing can't hold up uploads
+    print(f"Started executors: {start_executors()}")
+
+
+@app.on_event("shutdown")
+async def stop_blocking_executors():
+    # Registered last, so it runs after the other shutdown hooks are done with them
+    shutdown_executors()
+
 
 @app.get("/")
 async def welcome():
@@ -61,12 +214,82 @@ async def health_check():
     return {"status": "ok"}
 
 
+@app.get("/metrics")
+async def metrics():
+    """Process metrics in the Prometheus text format, for scrapers and autoscalers"""
+    return PlainTextResponse(REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
+
+
+async def _run_stage(name: str, run, func, *args):
+    """Run a blocking function on an executor as a timed request stage"""
+    with stage(name):
+        return await run(func, *args)
+
+
+async def _cancel_and_wait(*tasks: "asyncio.Future[Any]") -> None:
+    """Cancel tasks and wait until every one of them has finished"""
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def _gather_or_cancel(*tasks: "asyncio.Future[Any]") -> List[Any]:
+    """
+    Wait for tasks reading the same upload, stopping the others if one fails
+
+    The caller closes the upload next, which deletes a spooled file, so no
+    task may be left reading it.
+
+    Args:
+        tasks: Tasks to wait for
+
+    Returns:
+        List of the tasks' results, in order
+    """
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        await _cancel_and_wait(*tasks)
+        raise
+
+
+def _save_upload(user_id: str, upload: SpooledUpload) -> str:
+    """Store an uploaded resume in Storage, streaming it from the upload's buffer"""
+    with upload.open() as stream:
+        return save_resume_file(user_id, upload.filename, stream)
+
+
+async def _extract_text(upload: SpooledUpload) -> str:
+    """Get the text of an uploaded resume, parsing it only if it hasn't been seen before"""
+    with stage("extract_text") as span:
+        profile = await get_resume_profile(upload.source, upload.digest)
+        if span is not None:
+            span.attributes["cache_hit"] = profile["cached"]
+        return profile["text"]
+
+
+async def _save_analysis(user_id: str, resume_id: str, analysis_data: Dict[str, Any]) -> None:
+    """Store an analysis after the response has been sent"""
+    await _run_stage(
+        "save_analysis", run_io, FirestoreDB.create_analysis, user_id, resume_id, analysis_data
+    )
+
+
 @app.post("/analyze")
 async def analyze_resume_endpoint(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     job_description: str = Form(...),
+    async_mode: bool = Form(False),
     user_info: Dict[str, Any] = Depends(get_current_user),
 ):
+    """
+    Analyze a resume against a job description.
+
+    With async_mode set, the analysis is queued once the resume is saved and
+    the response is a 202 with a job ID to poll at /jobs/{job_id}, so the
+    connection isn't held for the model call.
+    """
     try:
         user_id = user_info["user_id"]
 
@@ -77,38 +300,68 @@ async def analyze_resume_endpoint(
                 detail="Job description cannot be empty"
             )
         
-        # Read the PDF file
-        file_content = await file.read()
-        
-        # Start file saving and text extraction in parallel
-        save_task = asyncio.create_task(
-            asyncio.to_thread(save_resume_file, user_id, file.filename, file_content)
-        )
-        extract_task = asyncio.create_task(
-            asyncio.to_thread(extract_text_from_pdf, file_content)
-        )
+        # Read the PDF file, checking its size and page count
+        with stage("read_upload"):
+            upload = await receive_upload(file)
         
-        # Wait for both tasks to complete
-        file_url, resume_text = await asyncio.gather(save_task, extract_task)
+        with stage("save_and_extract"):
+            try:
+                # Charged only once the request has passed validation, so
+                # a rejected upload doesn't use up the quota
+                analysis_quota.check(user_id)
+
+                # Start file saving and text extraction in parallel, both
+                # reading the same buffer
+                save_task = asyncio.create_task(
+                    _run_stage("save_file", run_io, _save_upload, user_id, upload)
+                )
+                extract_task = asyncio.create_task(_extract_text(upload))
+
+                # Wait for both tasks to complete
+                file_url, resume_text = await _gather_or_cancel(save_task, extract_task)
+            finally:
+                upload.close()
 
         # Create resume record
         resume_data = {"file_url": file_url, "file_name": file.filename}
-        resume_id = FirestoreDB.create_resume(user_id, resume_data)
+        resume_id = await _run_stage(
+            "create_resume", run_io, FirestoreDB.create_resume, user_id, resume_data
+        )
 
         if not resume_id:
             raise HTTPException(status_code=500, detail="Failed to save resume")
 
+        if async_mode:
+            job = await job_queue.submit(
+                "analysis",
+                {
+                    "user_id": user_id,
+                    "resume_id": resume_id,
+                    "resume_text": resume_text,
+                    "job_description": job_description,
+                },
+                user_id=user_id,
+            )
+            return JSONResponse(
+                status_code=202,
+                content={
+                    "job_id": job["id"],
+                    "status": job["status"],
+                    "resume_id": resume_id,
+                    "status_url": f"/jobs/{job['id']}",
+                },
+            )
+
         # Analyze resume
-        analysis_result = await analyze_resume_with_gemini(resume_text, job_description)
+        with stage("analyze"):
+            analysis_result = await analyze_resume_with_gemini(resume_text, job_description)
 
         # Save analysis result in background
         analysis_data = {"job_description": job_description, **analysis_result}
         
-        # Use background task for database operations
-        background_tasks = BackgroundTasks()
-        background_tasks.add_task(
-            FirestoreDB.create_analysis, user_id, resume_id, analysis_data
-        )
+        # Use background task for database operations, run once the
+        # response has been sent
+        background_tasks.add_task(_save_analysis, user_id, resume_id, analysis_data)
 
         return {
             "resume_id": resume_id,
@@ -116,10 +369,266 @@ async def analyze_resume_endpoint(
             "message": "Analysis saved in background"
         }
 
+    except (UploadRejected, QuotaExceeded):
+        raise
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/jobs/{job_id}")
+async def get_job_status(
+    job_id: str,
+    user_info: Dict[str, Any] = Depends(get_current_user),
+):
+    """
+    Get the status of a queued analysis, and its result once finished.
+
+    Status is one of queued, running, succeeded or failed.
+    """
+    job = await job_queue.get(job_id)
+    if not job or job["user_id"] != user_info["user_id"]:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    response = {
+        "job_id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+    }
+    position = job_queue.position(job_id)
+    if position is not None:
+        response["queue_position"] = position
+    if job["status"] == SUCCEEDED:
+        response.update(job["result"] or {})
+    elif job["status"] == FAILED:
+        response["error"] = job["error"]
+    return response
+
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format a Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@app.post("/analyze/stream")
+async def analyze_resume_stream_endpoint(
+    file: UploadFile = File(...),
+    job_description: str = Form(...),
+    user_info: Dict[str, Any] = Depends(get_current_user),
+):
+    """
+    Streaming variant of /analyze using Server-Sent Events.
+
+    Emits stage events (upload_received, text_extracted, resume_saved,
+    model_started), a field event for each result field as soon as it is
+    parsed from the model output, and finally a result event.
+    """
+    user_id = user_info["user_id"]
+
+    # Basic validation - just ensure job description is not empty after trimming
+    if not job_description.strip():
+        raise HTTPException(
+            status_code=400, 
+            detail="Job description cannot be empty"
+        )
+
+    # Read the PDF file before the response starts, so a rejected upload
+    # gets a proper status
+    upload = await receive_upload(file)
+    file_name = file.filename
+    try:
+        # Charged only once the request has passed validation
+        analysis_quota.check(user_id)
+    except QuotaExceeded:
+        upload.close()
+        raise
+
+    async def event_stream() -> AsyncIterator[str]:
+        save_task = None
+        try:
+            yield _sse_event(
+                "upload_received",
+                {"file_name": file_name, "bytes": upload.size, "pages": upload.page_count},
+            )
+
+            # Start file saving and text extraction in parallel
+            save_task = asyncio.create_task(run_io(_save_upload, user_id, upload))
+            profile = await get_resume_profile(upload.source, upload.digest)
+            resume_text = profile["text"]
+            yield _sse_event(
+                "text_extracted",
+                {
+                    "words": len(resume_text.split()),
+                    "pages": profile["page_count"],
+                    "cached": profile["cached"],
+                },
+            )
+
+            file_url = await save_task
+            upload.close()
+            resume_data = {"file_url": file_url, "file_name": file_name}
+            resume_id = await run_io(FirestoreDB.create_resume, user_id, resume_data)
+            if not resume_id:
+                yield _sse_event("error", {"detail": "Failed to save resume"})
+                return
+            yield _sse_event("resume_saved", {"resume_id": resume_id})
+
+            analysis_result = None
+            async for event in stream_analysis_with_gemini(resume_text, job_description):
+                if event["event"] == "result":
+                    analysis_result = event["data"]
+                yield _sse_event(event["event"], event["data"])
+
+            if analysis_result is not None:
+                analysis_data = {"job_description": job_description, **analysis_result}
+                analysis_id = await run_io(
+                    FirestoreDB.create_analysis, user_id, resume_id, analysis_data
+                )
+                yield _sse_event("done", {"resume_id": resume_id, "analysis_id": analysis_id})
+
+        except Exception as e:
+            yield _sse_event("error", {"detail": str(e)})
+        finally:
+            # Saving may still be reading the upload if extraction failed
+            if save_task is not None:
+                await _cancel_and_wait(save_task)
+            upload.close()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/analyze/batch")
+async def analyze_batch_endpoint(
+    files: List[UploadFile] = File(...),
+    job_description: str = Form(...),
+    user_info: Dict[str, Any] = Depends(get_current_user),
+):
+    """
+    Recruiter batch mode: analyze many resumes against one job description.
+
+    Accepts PDFs and ZIP archives of PDFs and streams newline-delimited JSON
+    events: per-file progress (extracted, result with its current rank, or
+    error) as each resume finishes, then the full ranking and a summary.
+    """
+    # Basic validation - just ensure job description is not empty after trimming
+    if not job_description.strip():
+        raise HTTPException(
+            status_code=400, 
+            detail="Job description cannot be empty"
+        )
+
+    # Uploads are spooled to disk by the form parser and stay open until the
+    # response has been sent, so archive members are read one at a time
+    try:
+        # Scanning archives reads the spooled uploads
+        batch_files, rejected = await run_io(
+            collect_batch_files, [(f.filename, f.file) for f in files]
+        )
+    except (ValueError, zipfile.BadZipFile) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Charged only once the batch has passed validation
+    batch_quota.check(user_info["user_id"])
+
+    async def ndjson_stream() -> AsyncIterator[str]:
+        try:
+            async for event in analyze_batch(batch_files, job_description, rejected):
+                yield json.dumps(event, default=str) + "\n"
+        except Exception as e:
+            yield json.dumps({"event": "error", "detail": str(e)}) + "\n"
+
+    return StreamingResponse(
+        ndjson_stream(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/analyze/multi")
+async def analyze_multi_endpoint(
+    file: UploadFile = File(...),
+    job_descriptions: List[str] = Form(...),
+    user_info: Dict[str, Any] = Depends(get_current_user),
+):
+    """
+    Analyze one resume against several job descriptions.
+
+    Takes the job descriptions as repeated job_descriptions form fields. The
+    resume is extracted and saved once, and newline-delimited JSON events
+    are streamed: resume_saved, then a result for each job description as
+    soon as its analysis is ready (with its index in the request), then done.
+    """
+    user_id = user_info["user_id"]
+
+    if not job_descriptions or any(not jd.strip() for jd in job_descriptions):
+        raise HTTPException(
+            status_code=400,
+            detail="Job descriptions cannot be empty"
+        )
+    if len(job_descriptions) > MULTI_JOB_MAX_JOBS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MULTI_JOB_MAX_JOBS} job descriptions can be analyzed at once"
+        )
+
+    # Read the PDF file before the response starts
+    upload = await receive_upload(file)
+    file_name = file.filename
+    try:
+        # Charged only once the request has passed validation; every job
+        # description is an analysis of its own
+        analysis_quota.check(user_id, cost=len(job_descriptions))
+    except QuotaExceeded:
+        upload.close()
+        raise
+
+    async def ndjson_stream() -> AsyncIterator[str]:
+        save_task = None
+        try:
+            # Start file saving and text extraction in parallel
+            save_task = asyncio.create_task(run_io(_save_upload, user_id, upload))
+            resume_text = await extract_resume_text(upload.source, upload.digest)
+
+            file_url = await save_task
+            upload.close()
+            resume_data = {"file_url": file_url, "file_name": file_name}
+            resume_id = await run_io(FirestoreDB.create_resume, user_id, resume_data)
+            if not resume_id:
+                yield json.dumps({"event": "error", "detail": "Failed to save resume"}) + "\n"
+                return
+            yield json.dumps({"event": "resume_saved", "resume_id": resume_id}) + "\n"
+
+            async for event in analyze_resume_against_jobs(resume_text, job_descriptions):
+                data = event["data"]
+                if event["event"] == "result":
+                    job_description = job_descriptions[data["index"]]
+                    analysis_data = {"job_description": job_description, **data["result"]}
+                    data["analysis_id"] = await run_io(
+                        FirestoreDB.create_analysis, user_id, resume_id, analysis_data
+                    )
+                yield json.dumps({"event": event["event"], **data}, default=str) + "\n"
+        except Exception as e:
+            yield json.dumps({"event": "error", "detail": str(e)}) + "\n"
+        finally:
+            # Saving may still be reading the upload if extraction failed
+            if save_task is not None:
+                await _cancel_and_wait(save_task)
+            upload.close()
+
+    return StreamingResponse(
+        ndjson_stream(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.get("/users/me/analyses")
 async def get_my_analyses(
     limit: int = 10, user_info: Dict[str, Any] = Depends(get_current_user)
@@ -215,8 +724,14 @@ async def analyze_resume_dev(
             )
             
         # Read and save the PDF file
-        file_content = await file.read()
-        file_url = save_resume_file(user_id, file.filename, file_content)
+        upload = await receive_upload(file)
+        try:
+            # Charged only once the request has passed validation
+            analysis_quota.check(user_id)
+            file_url = _save_upload(user_id, upload)
+            resume_text = await extract_resume_text(upload.source, upload.digest)
+        finally:
+            upload.close()
 
         # Create resume record
         resume_data = {"file_url": file_url, "file_name": file.filename}
@@ -225,9 +740,6 @@ async def analyze_resume_dev(
         if not resume_id:
             raise HTTPException(status_code=500, detail="Failed to save resume")
 
-        # Extract text from PDF
-        resume_text = extract_text_from_pdf(file_content)
-
         # Analyze resume
         analysis_result = await analyze_resume_with_gemini(resume_text, job_description)
 
@@ -244,6 +756,8 @@ async def analyze_resume_dev(
             "result": analysis_result,
         }
 
+    except (UploadRejected, QuotaExceeded):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -0,0 +1,283 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from .executors import run_io
+
+
+def _estimate_size(value: Any) -> int:
+    """
+    Estimate the memory footprint of a cached value in bytes
+
+    Args:
+        value: Value to be cached
+
+    Returns:
+        int: Approximate size in bytes
+    """
+    try:
+        return len(json.dumps(value, default=str).encode("utf-8"))
+    except (TypeError, ValueError):
+        return len(str(value).encode("utf-8"))
+
+
+class AnalysisCache:
+    """
+    Bounded in-process cache with LRU eviction and per-entry TTL.
+
+    Entries are evicted when the cache exceeds either ``max_entries`` or
+    ``max_bytes``; expired entries are dropped on access and by an optional
+    background sweeper thread. An optional ``store`` (e.g. SQLiteCacheStore)
+    acts as a shared second tier: misses fall through to it and writes go
+    through to it. Code on the event loop uses ``get_async`` and
+    ``set_async``, which make the store calls on the I/O executor.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        max_bytes: int = 64 * 1024 * 1024,
+        default_ttl: float = 3600.0,
+        sweep_interval: float = 60.0,
+        store: Optional[Any] = None,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.sweep_interval = sweep_interval
+        self.store = store
+
+        # key -> (value, expires_at, size)
+        self._entries: "OrderedDict[str, Tuple[Any, float, int]]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._sweeper: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.store_hits = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Get a cached value, refreshing its LRU position
+
+        Args:
+            key: Cache key
+
+        Returns:
+            The cached value, or None if missing or expired
+        """
+        found, value = self._get_local(key)
+        return value if found else self._get_stored(key)
+
+    async def get_async(self, key: str) -> Optional[Any]:
+        """
+        Get a cached value without blocking the event loop on the store
+
+        Args:
+            key: Cache key
+
+        Returns:
+            The cached value, or None if missing or expired
+        """
+        found, value = self._get_local(key)
+        if found or self.store is None:
+            return value if found else self._get_stored(key)
+        return await run_io(self._get_stored, key)
+
+    def _get_local(self, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at, _ = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                self._remove(key)
+                self.expirations += 1
+        return False, None
+
+    def _get_stored(self, key: str) -> Optional[Any]:
+        if self.store is not None:
+            stored = self.store.get_with_ttl(key)
+            if stored is not None:
+                value, remaining_ttl = stored
+                # Promote into the in-process tier for the remaining lifetime
+                self._set_local(key, value, remaining_ttl)
+                with self._lock:
+                    self.hits += 1
+                    self.store_hits += 1
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store a value in the cache
+
+        Args:
+            key: Cache key
+            value: Value to cache
+            ttl: Time to live in seconds, defaults to the cache's default TTL
+        """
+        ttl = self.default_ttl if ttl is None else ttl
+        self._set_local(key, value, ttl)
+        if self.store is not None:
+            self.store.set(key, value, ttl)
+
+    async def set_async(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store a value in the cache, writing the store on the I/O executor
+
+        Args:
+            key: Cache key
+            value: Value to cache
+            ttl: Time to live in seconds, defaults to the cache's default TTL
+        """
+        ttl = self.default_ttl if ttl is None else ttl
+        self._set_local(key, value, ttl)
+        if self.store is not None:
+            await run_io(self.store.set, key, value, ttl)
+
+    def _set_local(self, key: str, value: Any, ttl: float) -> None:
+        size = _estimate_size(value)
+        if size > self.max_bytes:
+            # A single oversized entry would flush the whole cache
+            return
+
+        expires_at = time.monotonic() + ttl
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, expires_at, size)
+            self._total_bytes += size
+            self._evict()
+
+    def delete(self, key: str) -> None:
+        """Remove a key from the cache if present"""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+        if self.store is not None:
+            self.store.delete(key)
+
+    def clear(self) -> None:
+        """Remove all entries from the in-process tier"""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def sweep(self) -> int:
+        """
+        Drop all expired entries
+
+        Returns:
+            int: Number of entries removed
+        """
+        now = time.monotonic()
+        with self._lock:
+            expired = [
+                key for key, (_, expires_at, _) in self._entries.items() if expires_at <= now
+            ]
+            for key in expired:
+                self._remove(key)
+            self.expirations += len(expired)
+        return len(expired)
+
+    def start_sweeper(self) -> None:
+        """Start the background thread that periodically drops expired entries"""
+        if self._sweeper is not None and self._sweeper.is_alive():
+            return
+
+        self._stop_event.clear()
+        self._sweeper = threading.Thread(
+            target=self._sweep_loop, name="analysis-cache-sweeper", daemon=True
+        )
+        self._sweeper.start()
+
+    def stop_sweeper(self) -> None:
+        """Stop the background sweeper thread"""
+        self._stop_event.set()
+        if self._sweeper is not None:
+            self._sweeper.join(timeout=self.sweep_interval)
+            self._sweeper = None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics
+
+        Returns:
+            Dict containing size and hit/miss/eviction counters
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "store_hits": self.store_hits,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "store": self.store.stats() if self.store is not None else None,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def _remove(self, key: str) -> None:
+        _, _, size = self._entries.pop(key)
+        self._total_bytes -= size
+
+    def _evict(self) -> None:
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes
+        ):
+            _, (_, _, size) = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            self.evictions += 1
+
+    def _sweep_loop(self) -> None:
+        while not self._stop_event.wait(self.sweep_interval):
+            try:
+                self.sweep()
+                if self.store is not None:
+                    self.store.purge_expired()
+            except Exception as e:
+                print(f"Error sweeping analysis cache: {str(e)}")
+
+
+def create_analysis_cache(default_ttl: float, store: Optional[Any] = None) -> AnalysisCache:
+    """
+    Create an analysis cache configured from environment variables
+
+    Args:
+        default_ttl: Default entry TTL in seconds
+        store: Optional shared second-tier store
+
+    Returns:
+        AnalysisCache with its background sweeper running
+    """
+    cache = AnalysisCache(
+        max_entries=int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "1000")),
+        max_bytes=int(os.getenv("ANALYSIS_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+        default_ttl=default_ttl,
+        sweep_interval=float(os.getenv("ANALYSIS_CACHE_SWEEP_INTERVAL", "60")),
+        store=store,
+    )
+    cache.start_sweeper()
+    return cache
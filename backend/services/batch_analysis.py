@@ -0,0 +1,224 @@
+import asyncio
+import os
+import zipfile
+from typing import Any, AsyncIterator, BinaryIO, Callable, Dict, List, Optional, Tuple
+from .resume_cache import extract_resume_text
+from .job_profile import get_job_profile
+from .resume_analyzer import analyze_resume_with_gemini
+from .model_scheduler import BATCH, set_lane
+from .executors import run_cpu
+from .pdf_parser import count_pdf_pages
+from .uploads import UPLOAD_MAX_PAGES
+
+# Limits for one batch request
+BATCH_MAX_FILES = int(os.getenv("BATCH_MAX_FILES", "500"))
+BATCH_MAX_FILE_BYTES = int(os.getenv("BATCH_MAX_FILE_BYTES", str(10 * 1024 * 1024)))
+
+# PDFs parsed at once, which also bounds how many are held in memory, and
+# analyses running at once
+BATCH_EXTRACT_CONCURRENCY = int(os.getenv("BATCH_EXTRACT_CONCURRENCY", "4"))
+BATCH_ANALYSIS_CONCURRENCY = int(os.getenv("BATCH_ANALYSIS_CONCURRENCY", "8"))
+
+# extract_resume_text reports failures as text instead of raising
+_EXTRACTION_FAILURES = ("Error", "No text could be extracted")
+
+
+class BatchFile:
+    """A resume in a batch, read only when its extraction starts"""
+
+    def __init__(self, index: int, name: str, read: Callable[[], bytes]):
+        self.index = index
+        self.name = name
+        self.read = read
+
+
+def collect_batch_files(
+    uploads: List[Tuple[str, BinaryIO]]
+) -> Tuple[List[BatchFile], List[Dict[str, Any]]]:
+    """
+    List the resumes in uploaded PDFs and ZIP archives without reading them
+
+    Args:
+        uploads: (file name, file object) pairs; file objects must be seekable
+
+    Returns:
+        Tuple of (resumes to analyze, error events for entries that were rejected)
+
+    Raises:
+        ValueError: If the batch holds more than BATCH_MAX_FILES entries
+    """
+    files: List[BatchFile] = []
+    rejected: List[Dict[str, Any]] = []
+
+    def reject(name: str, detail: str) -> None:
+        rejected.append({"event": "error", "file": name, "detail": detail})
+
+    for upload_name, upload in uploads:
+        name = upload_name or "upload"
+        if zipfile.is_zipfile(upload):
+            upload.seek(0)
+            archive = zipfile.ZipFile(upload)
+            for info in archive.infolist():
+                member = os.path.basename(info.filename)
+                if info.is_dir() or not member or member.startswith(".") \
+                        or info.filename.startswith("__MACOSX/"):
+                    continue
+                entry_name = f"{name}/{info.filename}"
+                if not member.lower().endswith(".pdf"):
+                    reject(entry_name, "Not a PDF file")
+                elif info.file_size > BATCH_MAX_FILE_BYTES:
+                    reject(entry_name, f"File exceeds {BATCH_MAX_FILE_BYTES} bytes")
+                else:
+                    # Decompression can't exceed the declared size, so a
+                    # crafted archive can't inflate past the limit
+                    files.append(BatchFile(
+                        len(files), entry_name,
+                        lambda archive=archive, info=info: archive.read(info),
+                    ))
+        elif name.lower().endswith(".pdf"):
+            files.append(BatchFile(len(files), name, lambda upload=upload: _read_upload(upload)))
+        else:
+            reject(name, "Not a PDF or ZIP file")
+
+        if len(files) + len(rejected) > BATCH_MAX_FILES:
+            raise ValueError(f"A batch can hold at most {BATCH_MAX_FILES} files")
+
+    return files, rejected
+
+
+def _read_upload(upload: BinaryIO) -> bytes:
+    upload.seek(0)
+    content = upload.read(BATCH_MAX_FILE_BYTES + 1)
+    if len(content) > BATCH_MAX_FILE_BYTES:
+        raise ValueError(f"File exceeds {BATCH_MAX_FILE_BYTES} bytes")
+    return content
+
+
+async def analyze_batch(
+    files: List[BatchFile],
+    job_description: str,
+    rejected: Optional[List[Dict[str, Any]]] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Analyze many resumes against one job description, yielding events as
+    each resume finishes
+
+    The job profile is extracted once up front and shared by every analysis.
+    Resumes are parsed at most BATCH_EXTRACT_CONCURRENCY at a time and
+    analyzed at most BATCH_ANALYSIS_CONCURRENCY at a time, in parallel.
+
+    Events, each a dict with an ``event`` name:
+      - ``accepted``: number of files in the batch
+      - ``job_profile``: job title from the shared job profile
+      - ``extracted``: a resume's text was extracted
+      - ``result``: a resume's analysis, with its rank among those finished so far
+      - ``error``: a resume failed; the rest of the batch carries on
+      - ``ranking``: every successful result, best match first
+      - ``done``: success and failure counts
+
+    Args:
+        files: Resumes from collect_batch_files
+        job_description: Job description text
+        rejected: Error events for entries rejected before analysis
+
+    Yields:
+        Event dicts
+    """
+    rejected = rejected or []
+    total = len(files) + len(rejected)
+    yield {"event": "accepted", "files": total}
+
+    completed = 0
+    for event in rejected:
+        completed += 1
+        yield {**event, "completed": completed, "total": total}
+
+    # Every analysis below finds the profile in the cache
+    job_profile = await get_job_profile(job_description, wait=None)
+    if job_profile:
+        yield {"event": "job_profile", "job_title": job_profile["job_title"]}
+
+    events: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+    extract_slots = asyncio.Semaphore(BATCH_EXTRACT_CONCURRENCY)
+    analysis_slots = asyncio.Semaphore(BATCH_ANALYSIS_CONCURRENCY)
+    tasks = [
+        asyncio.create_task(
+            _analyze_file(batch_file, job_description, extract_slots, analysis_slots, events)
+        )
+        for batch_file in files
+    ]
+
+    ranked: List[Dict[str, Any]] = []
+    failed = len(rejected)
+    finished = 0
+    try:
+        while finished < len(tasks):
+            event = await events.get()
+            if event["event"] == "extracted":
+                yield event
+                continue
+
+            finished += 1
+            completed += 1
+            if event["event"] == "result":
+                entry = {
+                    "file": event["file"],
+                    "match_score": event["result"].get("match_score", 0),
+                    "job_title": event["result"].get("job_title"),
+                    "skills_match": event["result"].get("skills_match", []),
+                }
+                ranked.append(entry)
+                ranked.sort(key=lambda item: (-item["match_score"], item["file"]))
+                event["rank"] = ranked.index(entry) + 1
+            else:
+                failed += 1
+            yield {**event, "completed": completed, "total": total}
+    finally:
+        # The client went away or the batch finished; stop any stragglers
+        for task in tasks:
+            task.cancel()
+
+    yield {
+        "event": "ranking",
+        "results": [{"rank": rank, **entry} for rank, entry in enumerate(ranked, 1)],
+    }
+    yield {"event": "done", "succeeded": len(ranked), "failed": failed, "total": total}
+
+
+async def _analyze_file(
+    batch_file: BatchFile,
+    job_description: str,
+    extract_slots: asyncio.Semaphore,
+    analysis_slots: asyncio.Semaphore,
+    events: "asyncio.Queue[Dict[str, Any]]",
+) -> None:
+    """Extract and analyze one resume, reporting progress and the outcome as events"""
+    # Each file runs in its own task, so this only lowers this task's model calls
+    set_lane(BATCH)
+    base = {"file": batch_file.name, "index": batch_file.index}
+    try:
+        async with extract_slots:
+            content = await run_cpu(batch_file.read)
+            # The same page limit as single uploads; a file PyPDF2 can't
+            # read is left to extraction to report
+            page_count = await run_cpu(count_pdf_pages, content)
+            if page_count is not None and page_count > UPLOAD_MAX_PAGES:
+                await events.put({
+                    "event": "error", **base,
+                    "detail": f"The resume has more than {UPLOAD_MAX_PAGES} pages",
+                })
+                return
+            resume_text = await extract_resume_text(content)
+            del content
+        if resume_text.startswith(_EXTRACTION_FAILURES):
+            await events.put({"event": "error", **base, "detail": resume_text})
+            return
+        await events.put({"event": "extracted", **base, "words": len(resume_text.split())})
+
+        async with analysis_slots:
+            result = await analyze_resume_with_gemini(resume_text, job_description)
+        await events.put({"event": "result", **base, "result": result})
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        await events.put({"event": "error", **base, "detail": str(e)})
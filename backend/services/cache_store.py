@@ -0,0 +1,209 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class SQLiteCacheStore:
+    """
+    Host-local cache tier shared by all workers through a SQLite file.
+
+    The database runs in WAL mode so concurrent readers in other worker
+    processes are never blocked by a writer, and entries survive restarts.
+    Values are stored as JSON together with their absolute expiry time.
+    """
+
+    def __init__(self, path: str, namespace: str = "analysis"):
+        self.path = path
+        self.namespace = namespace
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+            """
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cache_entries_expires ON cache_entries (expires_at)"
+        )
+        conn.commit()
+
+    def namespaced(self, namespace: str) -> "SQLiteCacheStore":
+        """
+        Get a store for another namespace backed by the same database file
+
+        Args:
+            namespace: Namespace for the new store
+
+        Returns:
+            SQLiteCacheStore sharing this store's file
+        """
+        return SQLiteCacheStore(self.path, namespace=namespace)
+
+    def get_with_ttl(self, key: str) -> Optional[tuple]:
+        """
+        Get a stored value together with its remaining TTL
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Tuple of (value, remaining_ttl_seconds), or None if missing or expired
+        """
+        try:
+            row = self._connection().execute(
+                "SELECT value, expires_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+        except sqlite3.Error as e:
+            self.errors += 1
+            print(f"Error reading cache store: {str(e)}")
+            return None
+
+        now = time.time()
+        if row is None or row[1] <= now:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return json.loads(row[0]), row[1] - now
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Get a stored value
+
+        Args:
+            key: Cache key
+
+        Returns:
+            The stored value, or None if missing or expired
+        """
+        entry = self.get_with_ttl(key)
+        return entry[0] if entry else None
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """
+        Store a value
+
+        Args:
+            key: Cache key
+            value: JSON-serializable value
+            ttl: Time to live in seconds
+        """
+        now = time.time()
+        try:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries "
+                "(namespace, key, value, created_at, expires_at) VALUES (?, ?, ?, ?, ?)",
+                (self.namespace, key, json.dumps(value, default=str), now, now + ttl),
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            self.errors += 1
+            print(f"Error writing cache store: {str(e)}")
+
+    def delete(self, key: str) -> None:
+        """Remove a key from the store if present"""
+        try:
+            conn = self._connection()
+            conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            self.errors += 1
+            print(f"Error deleting from cache store: {str(e)}")
+
+    def purge_expired(self) -> int:
+        """
+        Delete expired entries across all namespaces
+
+        Returns:
+            int: Number of entries removed
+        """
+        try:
+            conn = self._connection()
+            cursor = conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (time.time(),))
+            conn.commit()
+            return cursor.rowcount
+        except sqlite3.Error as e:
+            self.errors += 1
+            print(f"Error purging cache store: {str(e)}")
+            return 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get store statistics
+
+        Returns:
+            Dict containing entry count and hit/miss/error counters
+        """
+        try:
+            entries = self._connection().execute(
+                "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?", (self.namespace,)
+            ).fetchone()[0]
+        except sqlite3.Error:
+            entries = None
+        return {
+            "path": self.path,
+            "namespace": self.namespace,
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+        }
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+        return conn
+
+
+def create_cache_store(namespace: str = "analysis") -> Optional[SQLiteCacheStore]:
+    """
+    Create the shared host-local cache store configured from environment variables
+
+    Set ANALYSIS_CACHE_DB_PATH to an empty string to disable the shared tier.
+
+    Args:
+        namespace: Namespace for the store
+
+    Returns:
+        SQLiteCacheStore, or None if disabled or unavailable
+    """
+    default_path = os.path.join(tempfile.gettempdir(), "naukriguru", "analysis_cache.sqlite3")
+    path = os.getenv("ANALYSIS_CACHE_DB_PATH", default_path)
+    if not path:
+        return None
+
+    try:
+        return SQLiteCacheStore(path, namespace=namespace)
+    except (sqlite3.Error, OSError) as e:
+        print(f"Error initializing shared cache store: {str(e)}")
+        return None
@@ -0,0 +1,197 @@
+import asyncio
+import concurrent.futures
+import contextvars
+import functools
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, TypeVar
+from .metrics import counter, gauge, histogram
+
+# Threads for blocking I/O such as Cloud Storage uploads, Firestore and the
+# local SQLite stores; they mostly wait on the network or disk
+IO_EXECUTOR_WORKERS = int(os.getenv("IO_EXECUTOR_WORKERS", "16"))
+
+# Threads for CPU-bound work such as PDF parsing and text processing. They
+# share the GIL, so more threads than cores only adds contention; large
+# PDFs are handed on to the extraction process pool from here.
+CPU_EXECUTOR_WORKERS = int(os.getenv("CPU_EXECUTOR_WORKERS", str(os.cpu_count() or 1)))
+
+IO = "io"
+CPU = "cpu"
+
+T = TypeVar("T")
+
+_queued = gauge(
+    "executor_queued_tasks", "Tasks waiting for a free thread", ["executor"]
+)
+_active = gauge(
+    "executor_active_threads", "Threads running a task", ["executor"]
+)
+_saturation = gauge(
+    "executor_saturation", "Share of threads busy, 1 when every thread is running a task",
+    ["executor"],
+)
+_wait_seconds = histogram(
+    "executor_wait_seconds", "Time tasks waited for a free thread", ["executor"]
+)
+_run_seconds = histogram(
+    "executor_run_seconds", "Time tasks ran on a thread", ["executor"]
+)
+_tasks_total = counter(
+    "executor_tasks_total", "Tasks submitted, by whether every thread was busy at the time",
+    ["executor", "waited"],
+)
+
+
+class BoundedExecutor:
+    """
+    A named thread pool of fixed size for one class of blocking work
+
+    Work submitted while every thread is busy waits in the pool's queue
+    instead of taking threads from other classes of work. The queue depth,
+    busy threads and saturation are exported as metrics. Context variables
+    are carried into the thread, as with asyncio.to_thread.
+    """
+
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max(max_workers, 1)
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix=f"{name}-executor"
+        )
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.active = 0
+        self._update_gauges()
+
+    def _update_gauges(self) -> None:
+        _queued.set(self.queued, executor=self.name)
+        _active.set(self.active, executor=self.name)
+        _saturation.set(self.active / self.max_workers, executor=self.name)
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Run a blocking function on the pool and wait for its result
+
+        Args:
+            func: Function to run
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            The function's return value
+        """
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        call = functools.partial(context.run, func, *args, **kwargs)
+        submitted = time.perf_counter()
+        # "queued" until a thread picks the task up, "running", or
+        # "abandoned" if the caller went away before that
+        state = {"stage": "queued"}
+
+        def task() -> T:
+            with self._lock:
+                if state["stage"] == "abandoned":
+                    raise asyncio.CancelledError()
+                state["stage"] = "running"
+                self.queued -= 1
+                self.active += 1
+                self._update_gauges()
+            started = time.perf_counter()
+            _wait_seconds.observe(started - submitted, executor=self.name)
+            try:
+                return call()
+            finally:
+                with self._lock:
+                    self.active -= 1
+                    self._update_gauges()
+                _run_seconds.observe(time.perf_counter() - started, executor=self.name)
+
+        with self._lock:
+            waits = self.active + self.queued >= self.max_workers
+            self.queued += 1
+            self._update_gauges()
+        _tasks_total.inc(executor=self.name, waited=str(waits).lower())
+        try:
+            return await loop.run_in_executor(self._executor, task)
+        except BaseException:
+            # Cancelled, or the pool shut down, before a thread picked the
+            # task up; a task already running finishes on its thread
+            with self._lock:
+                if state["stage"] == "queued":
+                    state["stage"] = "abandoned"
+                    self.queued -= 1
+                    self._update_gauges()
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the executor's current load"""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "active": self.active,
+                "queued": self.queued,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop taking work, drop queued tasks and optionally wait for running ones"""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_executors: Dict[str, BoundedExecutor] = {}
+_executors_lock = threading.Lock()
+
+_SIZES = {IO: lambda: IO_EXECUTOR_WORKERS, CPU: lambda: CPU_EXECUTOR_WORKERS}
+
+
+def get_executor(name: str) -> BoundedExecutor:
+    """
+    Get a named executor, creating it if the app has not started it yet
+
+    Args:
+        name: IO or CPU
+    """
+    with _executors_lock:
+        executor = _executors.get(name)
+        if executor is None:
+            if name not in _SIZES:
+                raise ValueError(f"Unknown executor: {name}")
+            executor = _executors[name] = BoundedExecutor(name, _SIZES[name]())
+        return executor
+
+
+def start_executors() -> Dict[str, int]:
+    """
+    Create the I/O and CPU executors
+
+    Returns:
+        Dict mapping executor name to its thread count
+    """
+    return {name: get_executor(name).max_workers for name in _SIZES}
+
+
+def shutdown_executors(wait: bool = True) -> None:
+    """Shut down every executor, waiting for running tasks unless told not to"""
+    with _executors_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=wait)
+
+
+def executor_stats() -> Dict[str, Dict[str, Any]]:
+    """Get the load of every executor"""
+    with _executors_lock:
+        executors = list(_executors.values())
+    return {executor.name: executor.stats() for executor in executors}
+
+
+async def run_io(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run blocking I/O, such as a Storage upload or Firestore call, on the I/O executor"""
+    return await get_executor(IO).run(func, *args, **kwargs)
+
+
+async def run_cpu(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run CPU-bound work, such as PDF parsing, on the CPU executor"""
+    return await get_executor(CPU).run(func, *args, **kwargs)
@@ -67,7 +67,8 @@ def save_resume_file(user_id, file_name, file_content):
     Args:
         user_id: User ID
         file_name: Original file name
-        file_content: File content bytes
+        file_content: File content bytes, or a binary file object positioned
+            at the start, which is uploaded in chunks rather than read whole
 
     Returns:
         str: Public URL of the uploaded file
@@ -80,7 +81,10 @@ def save_resume_file(user_id, file_name, file_content):
 
     # Upload the file
     blob = bucket.blob(file_path)
-    blob.upload_from_string(file_content, content_type="application/pdf")
+    if hasattr(file_content, "read"):
+        blob.upload_from_file(file_content, content_type="application/pdf")
+    else:
+        blob.upload_from_string(file_content, content_type="application/pdf")
 
     # Make the file publicly accessible
     blob.make_public()
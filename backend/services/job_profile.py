@@ -0,0 +1,265 @@
+import os
+import re
+import asyncio
+import hashlib
+import unicodedata
+import google.generativeai as genai  # type: ignore
+from typing import Dict, Any, List, Optional, Set
+from datetime import timedelta
+from .analysis_cache import create_analysis_cache
+from .cache_store import create_cache_store
+from .singleflight import SingleFlight
+from .json_repair import parse_json_object
+from .model_registry import get_model
+from .model_scheduler import scheduled_call
+from .model_telemetry import record_cache_lookup, record_parse_failure
+from .resume_compressor import estimate_tokens
+
+# Job descriptions don't change once posted, so profiles can live much longer
+# than analysis results
+_profile_ttl = timedelta(days=7)
+
+# Job profiles are shared across resumes and users, and persisted in the
+# host-local store so popular postings are only analyzed once per host
+_job_profile_cache = create_analysis_cache(
+    default_ttl=_profile_ttl.total_seconds(),
+    store=create_cache_store(namespace="job_profile"),
+)
+
+_inflight_profiles = SingleFlight()
+_background_profiles: Set["asyncio.Future[Optional[Dict[str, Any]]]"] = set()
+
+# Seconds an analysis waits for a job profile that isn't cached before going
+# ahead with the raw job description; the extraction carries on and caches
+# the profile for later requests
+JOB_PROFILE_WAIT_SECONDS = float(os.getenv("JOB_PROFILE_WAIT_SECONDS", "3"))
+
+# Seconds a failed extraction is remembered, so a job description the model
+# can't profile doesn't cost a model call on every request
+JOB_PROFILE_FAILURE_TTL_SECONDS = float(os.getenv("JOB_PROFILE_FAILURE_TTL_SECONDS", "300"))
+
+# Cached in place of a profile that could not be extracted
+_FAILED_PROFILE = {"extraction_failed": True}
+
+JOB_PROFILE_MODEL = os.getenv("JOB_PROFILE_MODEL", "gemini-1.5-flash")
+
+_profile_generation_config = {
+    "temperature": 0.0,
+    "top_p": 0.7,
+    "top_k": 20,
+    "max_output_tokens": 512,
+}
+
+SENIORITY_LEVELS = ["intern", "entry", "mid", "senior", "lead", "manager", "executive"]
+
+
+def job_profile_model() -> genai.GenerativeModel:
+    """Get the shared Gemini model used to extract job profiles"""
+    return get_model(JOB_PROFILE_MODEL, _profile_generation_config)
+
+
+def normalize_job_description(job_description: str) -> str:
+    """
+    Normalize a job description so trivially different copies of the same
+    posting (case, whitespace, bullets, smart quotes) share one fingerprint
+
+    Args:
+        job_description: Raw job description text
+
+    Returns:
+        Normalized job description
+    """
+    text = unicodedata.normalize("NFKC", job_description).lower()
+    text = re.sub(r"[•▪●–—*\-]+\s", " ", text)
+    text = re.sub(r"\s+", " ", text)
+    return text.strip()
+
+
+def job_description_fingerprint(job_description: str) -> str:
+    """
+    Generate a stable fingerprint for a job description
+
+    Args:
+        job_description: Raw job description text
+
+    Returns:
+        Hex digest of the normalized job description
+    """
+    normalized = normalize_job_description(job_description)
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+async def get_job_profile(
+    job_description: str, wait: Optional[float] = JOB_PROFILE_WAIT_SECONDS
+) -> Optional[Dict[str, Any]]:
+    """
+    Get the compact pre-analyzed profile of a job description, computing it
+    with Gemini on a cache miss
+
+    Args:
+        job_description: Raw job description text
+        wait: Seconds to wait for an extraction before returning None while
+            it finishes in the background, or None to wait for it
+
+    Returns:
+        Dict with job_title, seniority, industry, required_skills and related
+        fields, or None if the profile is not available (yet)
+    """
+    fingerprint = job_description_fingerprint(job_description)
+    cached_profile = await _job_profile_cache.get_async(fingerprint)
+    record_cache_lookup("job_profile", cached_profile is not None)
+    if cached_profile is not None:
+        return None if cached_profile.get("extraction_failed") else cached_profile
+
+    task = asyncio.ensure_future(_inflight_profiles.do(
+        fingerprint, lambda: _extract_job_profile(job_description, fingerprint)
+    ))
+    # Keep the extraction alive for later requests if this one moves on
+    _background_profiles.add(task)
+    task.add_done_callback(_background_profiles.discard)
+    try:
+        return await asyncio.wait_for(asyncio.shield(task), timeout=wait)
+    except asyncio.TimeoutError:
+        print(f"Job profile not ready after {wait:g}s, using the job description")
+        return None
+
+
+async def _extract_job_profile(
+    job_description: str, fingerprint: str
+) -> Optional[Dict[str, Any]]:
+    """
+    Extract a job profile with Gemini and cache it, or cache the failure
+    for JOB_PROFILE_FAILURE_TTL_SECONDS
+
+    Args:
+        job_description: Raw job description text
+        fingerprint: Fingerprint of the job description
+
+    Returns:
+        Dict containing the job profile, or None on failure
+    """
+    # Profiles are extracted from the whole posting, but very long postings
+    # are mostly boilerplate about the company and benefits
+    max_job_desc_length = 6000
+    if len(job_description) > max_job_desc_length:
+        job_description = job_description[:max_job_desc_length] + "..."
+
+    prompt = f"""
+    Extract a structured profile from this job description.
+
+    JOB DESCRIPTION:
+    {job_description}
+
+    Respond with ONLY a JSON object in this exact format:
+    {{
+        "job_title": "<job title>",
+        "seniority": "<one of: {', '.join(SENIORITY_LEVELS)}>",
+        "industry": "<industry name>",
+        "min_years_experience": <number or null>,
+        "required_skills": ["<skill1>", "<skill2>", ...],
+        "preferred_skills": ["<skill1>", "<skill2>", ...],
+        "key_responsibilities": ["<short responsibility1>", ...],
+        "education": "<required education or certifications, empty if none>"
+    }}
+
+    Keep each list to at most 15 short items.
+    """
+
+    try:
+        model = job_profile_model()
+        response = await asyncio.wait_for(
+            scheduled_call(
+                JOB_PROFILE_MODEL,
+                lambda: model.generate_content_async(prompt),
+                prompt_tokens=estimate_tokens(prompt),
+                max_output_tokens=_profile_generation_config["max_output_tokens"],
+            ),
+            timeout=20,
+        )
+        profile = _parse_profile(response.text)
+        if profile is None:
+            record_parse_failure(JOB_PROFILE_MODEL)
+    except Exception as e:
+        print(f"Error extracting job profile: {str(e)}")
+        profile = None
+
+    if profile is None:
+        await _job_profile_cache.set_async(
+            fingerprint, _FAILED_PROFILE, ttl=JOB_PROFILE_FAILURE_TTL_SECONDS
+        )
+        return None
+
+    profile["fingerprint"] = fingerprint
+    await _job_profile_cache.set_async(fingerprint, profile)
+    return profile
+
+
+def _parse_profile(response_text: str) -> Optional[Dict[str, Any]]:
+    """
+    Parse and validate a job profile from the model response
+
+    Args:
+        response_text: Raw model response
+
+    Returns:
+        Dict containing the validated profile, or None if unusable
+    """
+    raw = parse_json_object(response_text)
+    if raw is None or not raw.get("job_title"):
+        return None
+
+    def _string_list(value: Any) -> List[str]:
+        if not isinstance(value, list):
+            return []
+        return [str(item).strip() for item in value if str(item).strip()][:15]
+
+    seniority = str(raw.get("seniority", "")).strip().lower()
+    min_years = raw.get("min_years_experience")
+    try:
+        min_years = float(min_years) if min_years is not None else None
+    except (TypeError, ValueError):
+        min_years = None
+
+    return {
+        "job_title": str(raw["job_title"]).strip(),
+        "seniority": seniority if seniority in SENIORITY_LEVELS else "",
+        "industry": str(raw.get("industry", "")).strip(),
+        "min_years_experience": min_years,
+        "required_skills": _string_list(raw.get("required_skills")),
+        "preferred_skills": _string_list(raw.get("preferred_skills")),
+        "key_responsibilities": _string_list(raw.get("key_responsibilities")),
+        "education": str(raw.get("education", "") or "").strip(),
+    }
+
+
+def format_job_profile(profile: Dict[str, Any]) -> str:
+    """
+    Render a job profile as compact prompt text
+
+    Args:
+        profile: Job profile from get_job_profile
+
+    Returns:
+        Compact multi-line description of the job
+    """
+    lines = [f"Job title: {profile['job_title']}"]
+    if profile.get("seniority"):
+        lines.append(f"Seniority: {profile['seniority']}")
+    if profile.get("industry"):
+        lines.append(f"Industry: {profile['industry']}")
+    if profile.get("min_years_experience") is not None:
+        lines.append(f"Minimum experience: {profile['min_years_experience']:g} years")
+    if profile.get("required_skills"):
+        lines.append(f"Required skills: {', '.join(profile['required_skills'])}")
+    if profile.get("preferred_skills"):
+        lines.append(f"Preferred skills: {', '.join(profile['preferred_skills'])}")
+    if profile.get("key_responsibilities"):
+        lines.append(f"Key responsibilities: {'; '.join(profile['key_responsibilities'])}")
+    if profile.get("education"):
+        lines.append(f"Education: {profile['education']}")
+    return "\n".join(lines)
+
+
+def job_profile_cache_stats() -> Dict[str, Any]:
+    """Get job profile cache statistics"""
+    return {**_job_profile_cache.stats(), "single_flight": _inflight_profiles.stats()}
@@ -0,0 +1,479 @@
+import asyncio
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from .metrics import counter, gauge, histogram
+from .executors import run_io
+
+# Workers per process pulling jobs off the queue
+JOB_QUEUE_WORKERS = int(os.getenv("JOB_QUEUE_WORKERS", "4"))
+
+# Queued jobs per process before new submissions are refused
+JOB_QUEUE_MAX_DEPTH = int(os.getenv("JOB_QUEUE_MAX_DEPTH", "1000"))
+
+# Finished jobs stay readable for a day
+JOB_RESULT_TTL_SECONDS = int(os.getenv("JOB_RESULT_TTL_SECONDS", str(24 * 60 * 60)))
+
+# Live processes refresh their unfinished jobs on every sweep, so jobs
+# untouched for this long belong to a process that died and are taken over
+JOB_RECOVERY_AFTER_SECONDS = int(os.getenv("JOB_RECOVERY_AFTER_SECONDS", "300"))
+
+# How often workers look for orphaned jobs and purge expired ones
+JOB_SWEEP_INTERVAL_SECONDS = 60
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+_WAIT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+_queue_depth = gauge("job_queue_depth", "Jobs waiting for a worker in this process")
+_jobs_running = gauge("job_queue_running", "Jobs being processed in this process")
+_oldest_wait = gauge(
+    "job_queue_oldest_wait_seconds", "Time the oldest queued job in this process has waited"
+)
+_wait_seconds = histogram(
+    "job_queue_wait_seconds", "Time jobs spent queued before a worker picked them up",
+    ["kind"], _WAIT_BUCKETS,
+)
+_run_seconds = histogram(
+    "job_queue_run_seconds", "Time workers spent processing jobs", ["kind", "status"],
+)
+_jobs_total = counter("job_queue_jobs_total", "Jobs finished, by outcome", ["kind", "status"])
+_rejected_total = counter("job_queue_rejected_total", "Jobs refused because the queue was full")
+
+
+class QueueFullError(Exception):
+    """The job queue is at JOB_QUEUE_MAX_DEPTH"""
+
+
+class MemoryJobBackend:
+    """Job records kept in process memory; lost on restart"""
+
+    def __init__(self):
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def save(self, job: Dict[str, Any]) -> None:
+        """Insert or replace a job record"""
+        with self._lock:
+            self._jobs[job["id"]] = dict(job)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job record, or None if unknown"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def touch(self, job_ids: List[str], now: float) -> None:
+        """Mark jobs as still owned by a live process"""
+        with self._lock:
+            for job_id in job_ids:
+                if job_id in self._jobs:
+                    self._jobs[job_id]["updated_at"] = now
+
+    def claim_stale(self, older_than: float) -> List[Dict[str, Any]]:
+        """
+        Take over unfinished jobs not updated since a point in time
+
+        Args:
+            older_than: Unix time; unfinished jobs updated before it are claimed
+
+        Returns:
+            Claimed job records, reset to queued
+        """
+        now = time.time()
+        claimed = []
+        with self._lock:
+            for job in self._jobs.values():
+                if job["status"] in (QUEUED, RUNNING) and job["updated_at"] < older_than:
+                    job.update(status=QUEUED, updated_at=now)
+                    claimed.append(dict(job))
+        return claimed
+
+    def purge(self, finished_before: float) -> int:
+        """
+        Delete finished jobs
+
+        Args:
+            finished_before: Unix time; jobs finished before it are deleted
+
+        Returns:
+            int: Number of jobs removed
+        """
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job["finished_at"] is not None and job["finished_at"] < finished_before
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+        return len(expired)
+
+
+class SQLiteJobBackend:
+    """
+    Durable host-local job records in a SQLite file
+
+    Shared by every worker process on the host, so any process can answer a
+    status request and a job queued by a process that died is picked up by
+    another one.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                record TEXT NOT NULL,
+                status TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                finished_at REAL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, updated_at)")
+        conn.commit()
+
+    def save(self, job: Dict[str, Any]) -> None:
+        """Insert or replace a job record"""
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO jobs (id, record, status, updated_at, finished_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (job["id"], json.dumps(job, default=str), job["status"],
+             job["updated_at"], job["finished_at"]),
+        )
+        conn.commit()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job record, or None if unknown"""
+        row = self._connection().execute(
+            "SELECT record FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def touch(self, job_ids: List[str], now: float) -> None:
+        """Mark jobs as still owned by a live process"""
+        if not job_ids:
+            return
+        conn = self._connection()
+        conn.executemany(
+            "UPDATE jobs SET updated_at = ? WHERE id = ? AND finished_at IS NULL",
+            [(now, job_id) for job_id in job_ids],
+        )
+        conn.commit()
+
+    def claim_stale(self, older_than: float) -> List[Dict[str, Any]]:
+        """
+        Take over unfinished jobs not updated since a point in time
+
+        Each job is claimed with a conditional update, so two processes
+        sweeping at once never both take the same job.
+
+        Args:
+            older_than: Unix time; unfinished jobs updated before it are claimed
+
+        Returns:
+            Claimed job records, reset to queued
+        """
+        conn = self._connection()
+        rows = conn.execute(
+            "SELECT id, record, updated_at FROM jobs "
+            "WHERE status IN (?, ?) AND updated_at < ?",
+            (QUEUED, RUNNING, older_than),
+        ).fetchall()
+
+        claimed = []
+        now = time.time()
+        for job_id, record, updated_at in rows:
+            job = json.loads(record)
+            job.update(status=QUEUED, updated_at=now)
+            cursor = conn.execute(
+                "UPDATE jobs SET record = ?, status = ?, updated_at = ? "
+                "WHERE id = ? AND updated_at = ?",
+                (json.dumps(job, default=str), QUEUED, now, job_id, updated_at),
+            )
+            if cursor.rowcount == 1:
+                claimed.append(job)
+        conn.commit()
+        return claimed
+
+    def purge(self, finished_before: float) -> int:
+        """
+        Delete finished jobs
+
+        Args:
+            finished_before: Unix time; jobs finished before it are deleted
+
+        Returns:
+            int: Number of jobs removed
+        """
+        conn = self._connection()
+        cursor = conn.execute(
+            "DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?",
+            (finished_before,),
+        )
+        conn.commit()
+        return cursor.rowcount
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+        return conn
+
+
+def create_job_backend():
+    """
+    Create the job backend configured from environment variables
+
+    JOB_QUEUE_BACKEND selects "sqlite" (the default, durable and shared by
+    the workers on a host, at JOB_QUEUE_DB_PATH) or "memory".
+
+    Returns:
+        A job backend
+    """
+    backend = os.getenv("JOB_QUEUE_BACKEND", "sqlite")
+    if backend == "memory":
+        return MemoryJobBackend()
+    if backend != "sqlite":
+        raise ValueError(f"Unknown JOB_QUEUE_BACKEND: {backend}")
+
+    default_path = os.path.join(tempfile.gettempdir(), "naukriguru", "jobs.sqlite3")
+    path = os.getenv("JOB_QUEUE_DB_PATH", default_path)
+    try:
+        return SQLiteJobBackend(path)
+    except (sqlite3.Error, OSError) as e:
+        print(f"Error initializing job store, keeping jobs in memory: {str(e)}")
+        return MemoryJobBackend()
+
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+class JobQueue:
+    """
+    In-process queue of background jobs worked by a pool of asyncio workers
+
+    Submitting a job records it in the backend and queues its ID; a worker
+    runs the handler registered for the job's kind and records the result
+    or error. Job records, including their payloads, go through the
+    backend, so with a durable backend any process can report a job's
+    status and unfinished jobs of a process that died are taken over by a
+    live one after JOB_RECOVERY_AFTER_SECONDS.
+    """
+
+    def __init__(
+        self,
+        backend=None,
+        workers: int = JOB_QUEUE_WORKERS,
+        max_depth: int = JOB_QUEUE_MAX_DEPTH,
+    ):
+        self.backend = backend if backend is not None else create_job_backend()
+        self.workers = workers
+        self.max_depth = max_depth
+        self._handlers: Dict[str, JobHandler] = {}
+        self._queue: "asyncio.Queue[str]" = asyncio.Queue()
+        # job ID -> time it was queued in this process
+        self._queued_at: Dict[str, float] = {}
+        self._running: Dict[str, float] = {}
+        self._tasks: List["asyncio.Task[None]"] = []
+
+        _queue_depth.set_function(lambda: len(self._queued_at))
+        _jobs_running.set_function(lambda: len(self._running))
+        _oldest_wait.set_function(self._oldest_wait)
+
+    def register(self, kind: str, handler: JobHandler) -> None:
+        """
+        Register the coroutine function that processes jobs of a kind
+
+        Args:
+            kind: Job kind, such as "analysis"
+            handler: Called with the job payload; its return value becomes
+                the job result and must be JSON-serializable
+        """
+        self._handlers[kind] = handler
+
+    async def submit(
+        self, kind: str, payload: Dict[str, Any], user_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Queue a job
+
+        Args:
+            kind: Job kind with a registered handler
+            payload: JSON-serializable handler input
+            user_id: Owner of the job, checked when its status is read
+
+        Returns:
+            The new job record
+
+        Raises:
+            QueueFullError: If max_depth jobs are already queued
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"No handler registered for job kind: {kind}")
+        if len(self._queued_at) >= self.max_depth:
+            _rejected_total.inc()
+            raise QueueFullError(f"Job queue is full ({self.max_depth} jobs waiting)")
+
+        now = time.time()
+        job = {
+            "id": uuid.uuid4().hex,
+            "kind": kind,
+            "user_id": user_id,
+            "status": QUEUED,
+            "payload": payload,
+            "result": None,
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+            "started_at": None,
+            "finished_at": None,
+        }
+        await run_io(self.backend.save, job)
+        self._enqueue(job["id"])
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a job's current record
+
+        Args:
+            job_id: Job ID
+
+        Returns:
+            The job record, or None if unknown or purged
+        """
+        return await run_io(self.backend.get, job_id)
+
+    def position(self, job_id: str) -> Optional[int]:
+        """Get a job's 1-based position among the jobs queued in this process, if queued here"""
+        if job_id not in self._queued_at:
+            return None
+        return 1 + sum(1 for other, at in self._queued_at.items()
+                       if at < self._queued_at[job_id])
+
+    def start(self) -> None:
+        """Start the workers and the sweeper for orphaned and expired jobs"""
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"job-worker-{i}")
+            for i in range(self.workers)
+        ]
+        self._tasks.append(asyncio.create_task(self._sweeper(), name="job-sweeper"))
+
+    async def stop(self) -> None:
+        """
+        Stop the workers
+
+        Jobs still queued or running stay unfinished in the backend and are
+        taken over by the next process to sweep once they go stale.
+        """
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get queue statistics for this process"""
+        return {
+            "workers": self.workers,
+            "queued": len(self._queued_at),
+            "running": len(self._running),
+            "oldest_wait_seconds": self._oldest_wait(),
+        }
+
+    def _enqueue(self, job_id: str) -> None:
+        self._queued_at[job_id] = time.time()
+        self._queue.put_nowait(job_id)
+
+    def _oldest_wait(self) -> float:
+        if not self._queued_at:
+            return 0.0
+        return time.time() - min(self._queued_at.values())
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            queued_at = self._queued_at.pop(job_id, None)
+            try:
+                await self._process(job_id, queued_at)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # A failing backend must not take the worker down with it
+                print(f"Error processing job {job_id}: {str(e)}")
+
+    async def _process(self, job_id: str, queued_at: Optional[float]) -> None:
+        job = await run_io(self.backend.get, job_id)
+        if job is None or job["status"] != QUEUED:
+            return
+
+        started = time.time()
+        _wait_seconds.observe(started - (queued_at or job["created_at"]), kind=job["kind"])
+        job.update(status=RUNNING, started_at=started, updated_at=started)
+        await run_io(self.backend.save, job)
+
+        self._running[job_id] = started
+        try:
+            handler = self._handlers[job["kind"]]
+            job["result"] = await handler(job["payload"])
+            job["status"] = SUCCEEDED
+        except asyncio.CancelledError:
+            # Shutting down; leave the job for another process to take over
+            raise
+        except Exception as e:
+            print(f"Job {job_id} ({job['kind']}) failed: {str(e)}")
+            job["error"] = str(e)
+            job["status"] = FAILED
+        finally:
+            self._running.pop(job_id, None)
+
+        finished = time.time()
+        job.update(finished_at=finished, updated_at=finished)
+        await run_io(self.backend.save, job)
+        _run_seconds.observe(finished - started, kind=job["kind"], status=job["status"])
+        _jobs_total.inc(kind=job["kind"], status=job["status"])
+
+    async def _sweeper(self) -> None:
+        while True:
+            try:
+                now = time.time()
+                await run_io(
+                    self.backend.touch, list(self._queued_at) + list(self._running), now
+                )
+                claimed = await run_io(
+                    self.backend.claim_stale, now - JOB_RECOVERY_AFTER_SECONDS
+                )
+                for job in claimed:
+                    if job["kind"] in self._handlers:
+                        print(f"Recovered unfinished job {job['id']}")
+                        self._enqueue(job["id"])
+                await run_io(self.backend.purge, now - JOB_RESULT_TTL_SECONDS)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error sweeping job queue: {str(e)}")
+            await asyncio.sleep(JOB_SWEEP_INTERVAL_SECONDS)
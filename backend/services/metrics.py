@@ -0,0 +1,311 @@
+import abc
+import bisect
+import math
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Bucket upper bounds in seconds, from sub-millisecond cache hits up to
+# model calls near the analysis timeout
+DEFAULT_LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0,
+)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class _Metric(abc.ABC):
+    """Base for a named metric family with a fixed set of label names"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _label_values(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name} expects labels {list(self.labelnames)}, got {sorted(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    @abc.abstractmethod
+    def samples(self) -> Iterable[Tuple[str, LabelValues, Sequence[str], float]]:
+        """Yield (sample name, label values, extra label names/values, value) tuples"""
+
+    def render(self) -> List[str]:
+        """Render the family in the Prometheus text exposition format"""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        for sample_name, values, extra, value in self.samples():
+            names = self.labelnames + tuple(extra[0::2])
+            all_values = values + tuple(extra[1::2])
+            lines.append(f"{sample_name}{_format_labels(names, all_values)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    """A monotonically increasing count, such as requests served"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """Add to the count for a label combination"""
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        """Get the count for a label combination"""
+        with self._lock:
+            return self._values.get(self._label_values(labels), 0.0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        if not items and not self.labelnames:
+            # Export an unlabeled metric from the start, so rates work from zero
+            items = [((), 0.0)]
+        for values, value in items:
+            yield self.name, values, (), value
+
+
+class Gauge(_Metric):
+    """
+    A value that goes up and down, such as a queue depth
+
+    A gauge without labels can read its value from a callback at render
+    time instead, so the exported value is never stale.
+    """
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        function: Optional[Callable[[], float]] = None,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._function = function
+
+    def set(self, value: float, **labels: str) -> None:
+        """Set the value for a label combination"""
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """Add to the value for a label combination"""
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        """Subtract from the value for a label combination"""
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Read the value from a callback whenever the gauge is rendered"""
+        self._function = function
+
+    def value(self, **labels: str) -> float:
+        """Get the current value for a label combination"""
+        if self._function is not None:
+            return float(self._function())
+        with self._lock:
+            return self._values.get(self._label_values(labels), 0.0)
+
+    def samples(self):
+        if self._function is not None:
+            try:
+                value = float(self._function())
+            except Exception as e:
+                print(f"Error reading gauge {self.name}: {str(e)}")
+                return
+            yield self.name, (), (), value
+            return
+        with self._lock:
+            items = sorted(self._values.items())
+        if not items and not self.labelnames:
+            # Export an unlabeled metric from the start, so rates work from zero
+            items = [((), 0.0)]
+        for values, value in items:
+            yield self.name, values, (), value
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative buckets, such as request latencies"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> (per-bucket counts with a final +Inf slot, sum, count)
+        self._values: Dict[LabelValues, List] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Record an observation for a label combination"""
+        key = self._label_values(labels)
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][slot] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def count(self, **labels: str) -> int:
+        """Get the number of observations for a label combination"""
+        with self._lock:
+            entry = self._values.get(self._label_values(labels))
+            return entry[2] if entry else 0
+
+    def sum(self, **labels: str) -> float:
+        """Get the sum of the observations for a label combination"""
+        with self._lock:
+            entry = self._values.get(self._label_values(labels))
+            return entry[1] if entry else 0.0
+
+    def samples(self):
+        with self._lock:
+            items = [
+                (key, list(entry[0]), entry[1], entry[2])
+                for key, entry in sorted(self._values.items())
+            ]
+        for values, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket", values, ("le", _format_value(bound)), cumulative
+            yield f"{self.name}_sum", values, (), total
+            yield f"{self.name}_count", values, (), count
+
+
+class MetricsRegistry:
+    """
+    Process-wide collection of metric families rendered for scraping
+
+    Families are created once by name; asking for an existing name returns
+    the same family, so modules can declare their metrics at import time.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Get or create a counter"""
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        function: Optional[Callable[[], float]] = None,
+    ) -> Gauge:
+        """Get or create a gauge"""
+        return self._get_or_create(Gauge, name, documentation, labelnames, function)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    ) -> Histogram:
+        """Get or create a histogram"""
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets)
+
+    def render(self) -> str:
+        """
+        Render every family in the Prometheus text exposition format
+
+        Returns:
+            str: Exposition text, ending with a newline
+        """
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Shared registry served by the /metrics endpoint
+REGISTRY = MetricsRegistry()
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    """Get or create a counter in the shared registry"""
+    return REGISTRY.counter(name, documentation, labelnames)
+
+
+def gauge(
+    name: str,
+    documentation: str,
+    labelnames: Sequence[str] = (),
+    function: Optional[Callable[[], float]] = None,
+) -> Gauge:
+    """Get or create a gauge in the shared registry"""
+    return REGISTRY.gauge(name, documentation, labelnames, function)
+
+
+def histogram(
+    name: str,
+    documentation: str,
+    labelnames: Sequence[str] = (),
+    buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+) -> Histogram:
+    """Get or create a histogram in the shared registry"""
+    return REGISTRY.histogram(name, documentation, labelnames, buckets)
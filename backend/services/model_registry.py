@@ -0,0 +1,157 @@
+import os
+import time
+import asyncio
+import threading
+import google.generativeai as genai  # type: ignore
+from google.ai import generativelanguage as glm  # type: ignore
+from google.generativeai import client as genai_client  # type: ignore
+from typing import Dict, Any, FrozenSet, List, Optional, Tuple
+
+# Pre-connect the Gemini channel when the app starts
+MODEL_PREWARM = os.getenv("MODEL_PREWARM", "true").lower() in ("1", "true", "yes")
+
+# Seconds between keep-alive requests on an idle channel, 0 to disable.
+# Load balancers drop idle HTTP/2 connections after a few minutes.
+MODEL_KEEPALIVE_SECONDS = float(os.getenv("MODEL_KEEPALIVE_SECONDS", "240"))
+
+# Models built so far, keyed by (model name, generation config)
+_models: Dict[Tuple[str, FrozenSet[Tuple[str, Any]]], genai.GenerativeModel] = {}
+_models_lock = threading.Lock()
+
+_keepalive_task: Optional["asyncio.Task[None]"] = None
+_last_used = 0.0
+
+_registry_stats = {"created": 0, "reused": 0, "warmups": 0, "warmup_failures": 0}
+
+
+def get_model(
+    model_name: str, generation_config: Optional[Dict[str, Any]] = None
+) -> genai.GenerativeModel:
+    """
+    Get the shared GenerativeModel for a model name and generation config,
+    building it on first use
+
+    All models share the process-wide Gemini client, so reusing them also
+    reuses its warm gRPC channel.
+
+    Args:
+        model_name: Gemini model name
+        generation_config: Default generation config for the model
+
+    Returns:
+        The shared GenerativeModel
+    """
+    global _last_used
+    # Generation configs are flat dicts of scalars
+    key = (model_name, frozenset((generation_config or {}).items()))
+    _last_used = time.monotonic()
+
+    model = _models.get(key)
+    if model is not None:
+        _registry_stats["reused"] += 1
+        return model
+
+    with _models_lock:
+        model = _models.get(key)
+        if model is None:
+            model = genai.GenerativeModel(
+                model_name=model_name,
+                generation_config=generation_config
+            )
+            _models[key] = model
+            _registry_stats["created"] += 1
+        else:
+            _registry_stats["reused"] += 1
+    return model
+
+
+async def _ping(model: genai.GenerativeModel, timeout: float) -> float:
+    """
+    Send a count_tokens request for a model, which opens the channel and
+    validates the model name without generating anything
+
+    Returns:
+        float: Round-trip time in seconds
+    """
+    start = time.perf_counter()
+    await asyncio.wait_for(
+        genai_client.get_default_generative_async_client().count_tokens(
+            model=model.model_name,
+            contents=[glm.Content(parts=[glm.Part(text="ping")])],
+        ),
+        timeout=timeout,
+    )
+    return time.perf_counter() - start
+
+
+async def warm_up_models(
+    models: Optional[List[genai.GenerativeModel]] = None, timeout: float = 10
+) -> Dict[str, Optional[float]]:
+    """
+    Pre-connect the Gemini channel for the given models
+
+    Args:
+        models: Models to warm up, defaults to every registered model
+        timeout: Time budget per model in seconds
+
+    Returns:
+        Dict mapping model name to round-trip time in seconds, or None if the
+        warm-up request failed
+    """
+    if models is None:
+        models = list(_models.values())
+    by_name = {model.model_name: model for model in models}
+    results = await asyncio.gather(
+        *(_ping(model, timeout) for model in by_name.values()), return_exceptions=True
+    )
+
+    timings: Dict[str, Optional[float]] = {}
+    for name, result in zip(by_name, results):
+        if isinstance(result, BaseException):
+            _registry_stats["warmup_failures"] += 1
+            print(f"Error warming up model {name}: {str(result) or type(result).__name__}")
+            timings[name] = None
+        else:
+            _registry_stats["warmups"] += 1
+            timings[name] = round(result, 3)
+    return timings
+
+
+async def _keepalive_loop(interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        # Only ping channels that would otherwise sit idle
+        if time.monotonic() - _last_used >= interval:
+            await warm_up_models()
+
+
+def start_keepalive(interval: float = MODEL_KEEPALIVE_SECONDS) -> None:
+    """
+    Start a background task that keeps the Gemini channel warm while idle
+
+    Must be called from the event loop serving requests.
+
+    Args:
+        interval: Seconds between keep-alive requests, 0 to disable
+    """
+    global _keepalive_task
+    if interval <= 0 or (_keepalive_task is not None and not _keepalive_task.done()):
+        return
+    _keepalive_task = asyncio.ensure_future(_keepalive_loop(interval))
+
+
+def stop_keepalive() -> None:
+    """Stop the keep-alive task"""
+    global _keepalive_task
+    if _keepalive_task is not None:
+        _keepalive_task.cancel()
+        _keepalive_task = None
+
+
+def model_registry_stats() -> Dict[str, Any]:
+    """Get model registry statistics"""
+    return {
+        **_registry_stats,
+        "models": sorted({name for name, _ in _models}),
+        "keepalive": _keepalive_task is not None and not _keepalive_task.done(),
+    }
@@ -0,0 +1,478 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from .metrics import counter, gauge, histogram
+from .model_telemetry import record_model_call
+
+# Requests and tokens per minute allowed for each model, unless overridden in
+# MODEL_RATE_LIMITS as "model=rpm:tpm,model=rpm:tpm"; 0 means unlimited
+MODEL_RPM_LIMIT = int(os.getenv("MODEL_RPM_LIMIT", "60"))
+MODEL_TPM_LIMIT = int(os.getenv("MODEL_TPM_LIMIT", "1000000"))
+
+# Model calls in flight at once across every model in this process
+MODEL_MAX_CONCURRENCY = int(os.getenv("MODEL_MAX_CONCURRENCY", "16"))
+
+# Longest a call waits for its turn before giving up
+MODEL_QUEUE_TIMEOUT_SECONDS = float(os.getenv("MODEL_QUEUE_TIMEOUT_SECONDS", "30"))
+
+# How long a model is paused after the provider answers 429 without a
+# Retry-After hint
+RATE_LIMIT_BACKOFF_SECONDS = float(os.getenv("MODEL_RATE_LIMIT_BACKOFF_SECONDS", "10"))
+
+# Priority lanes, most urgent first: requests a user is waiting on, queued
+# jobs, then bulk work such as recruiter batches
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+BATCH = "batch"
+LANE_PRIORITIES = {INTERACTIVE: 0, BACKGROUND: 1, BATCH: 2}
+
+_lane: "contextvars.ContextVar[str]" = contextvars.ContextVar("model_lane", default=INTERACTIVE)
+
+_wait_seconds = histogram(
+    "model_scheduler_wait_seconds", "Time model calls waited for a slot and rate budget",
+    ["model", "lane"],
+)
+_latency_seconds = histogram(
+    "model_scheduler_latency_seconds", "Model call latency including the scheduler wait",
+    ["model", "lane"],
+)
+_rate_limited_total = counter(
+    "model_rate_limited_total",
+    "Model calls rejected by the provider with 429 or timed out waiting in the scheduler",
+    ["model", "source"],
+)
+
+
+class ModelRateLimited(Exception):
+    """
+    A model call was rate limited, by the provider or by waiting too long in
+    the scheduler, rather than failing on its own
+    """
+
+    def __init__(self, model: str, detail: str, retry_after: Optional[float] = None):
+        self.model = model
+        self.retry_after = retry_after
+        super().__init__(f"{model} rate limited: {detail}")
+
+
+def _parse_limits(value: str) -> Dict[str, Tuple[int, int]]:
+    """Parse per-model limits from a "model=rpm:tpm,model=rpm:tpm" string"""
+    limits = {}
+    for item in value.split(","):
+        if "=" in item and ":" in item:
+            name, rates = item.split("=", 1)
+            rpm, tpm = rates.split(":", 1)
+            limits[name.strip()] = (int(rpm), int(tpm))
+    return limits
+
+
+MODEL_RATE_LIMITS = _parse_limits(os.getenv("MODEL_RATE_LIMITS", ""))
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """
+    Whether an exception from a model SDK means the provider rate limited us
+
+    Covers google.api_core's ResourceExhausted, openai's RateLimitError and
+    any error carrying an HTTP 429 status.
+    """
+    if isinstance(error, ModelRateLimited):
+        return True
+    if type(error).__name__ in ("ResourceExhausted", "RateLimitError", "TooManyRequests"):
+        return True
+    for attribute in ("code", "status_code", "http_status", "status"):
+        if getattr(error, attribute, None) == 429:
+            return True
+    return False
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    """Get the provider's Retry-After hint from a rate limit error, if any"""
+    headers = getattr(error, "headers", None) or getattr(error, "headers_", None)
+    try:
+        value = headers.get("retry-after") or headers.get("Retry-After") if headers else None
+        return float(value) if value is not None else None
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+class TokenBucket:
+    """
+    Budget refilled continuously at ``rate_per_minute``, holding at most one
+    minute's worth
+
+    A limit of 0 disables the bucket.
+    """
+
+    def __init__(self, rate_per_minute: int, now: float):
+        self.capacity = float(rate_per_minute)
+        self.rate = rate_per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = now
+        self.paused_until = 0.0
+
+    @property
+    def unlimited(self) -> bool:
+        return self.capacity <= 0
+
+    def _refill(self, now: float) -> None:
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until ``amount`` can be taken, 0 if it can be taken now"""
+        if now < self.paused_until:
+            return self.paused_until - now
+        if self.unlimited:
+            return 0.0
+        self._refill(now)
+        # A request larger than the whole bucket waits for a full bucket
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float, now: float) -> None:
+        """Take ``amount``; the balance may go negative when settling usage"""
+        if self.unlimited:
+            return
+        self._refill(now)
+        self.tokens -= min(amount, self.capacity)
+
+    def pause(self, seconds: float, now: float) -> None:
+        """Refuse everything for a while, such as after a provider 429"""
+        self.paused_until = max(self.paused_until, now + seconds)
+
+
+class _Waiter:
+    def __init__(self, model: str, tokens: int, lane: str, future: "asyncio.Future[None]"):
+        self.model = model
+        self.tokens = tokens
+        self.lane = lane
+        self.future = future
+
+
+class ModelScheduler:
+    """
+    Admission control in front of every model call
+
+    Each model has a requests-per-minute and a tokens-per-minute token
+    bucket, and a semaphore bounds the calls in flight across all models.
+    Calls that can't start right away wait in a priority queue ordered by
+    lane, then arrival. A waiting call only blocks later calls for the same
+    model, so a model that is out of budget doesn't hold up the others.
+    Token reservations are estimates and are corrected once the provider
+    reports the actual usage.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = MODEL_MAX_CONCURRENCY,
+        rpm: int = MODEL_RPM_LIMIT,
+        tpm: int = MODEL_TPM_LIMIT,
+        limits: Optional[Dict[str, Tuple[int, int]]] = None,
+        queue_timeout: float = MODEL_QUEUE_TIMEOUT_SECONDS,
+    ):
+        self.max_concurrency = max_concurrency
+        self.rpm = rpm
+        self.tpm = tpm
+        self.limits = MODEL_RATE_LIMITS if limits is None else limits
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self._heap: List[Tuple[int, int, _Waiter]] = []
+        self._sequence = itertools.count()
+        self._buckets: Dict[str, Tuple[TokenBucket, TokenBucket]] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def _model_buckets(self, model: str, now: float) -> Tuple[TokenBucket, TokenBucket]:
+        buckets = self._buckets.get(model)
+        if buckets is None:
+            rpm, tpm = self.limits.get(model, (self.rpm, self.tpm))
+            buckets = self._buckets[model] = (TokenBucket(rpm, now), TokenBucket(tpm, now))
+        return buckets
+
+    @property
+    def queued(self) -> int:
+        """Calls waiting for their turn"""
+        return sum(1 for _, _, waiter in self._heap if not waiter.future.done())
+
+    async def acquire(self, model: str, tokens: int, lane: str) -> None:
+        """
+        Wait until a call may start, and reserve its slot and budget
+
+        Args:
+            model: Model name the call is for
+            tokens: Estimated prompt and output tokens
+            lane: Priority lane
+
+        Raises:
+            ModelRateLimited: If the call waited longer than queue_timeout
+        """
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(model, tokens, lane, loop.create_future())
+        priority = LANE_PRIORITIES.get(lane, len(LANE_PRIORITIES))
+        heapq.heappush(self._heap, (priority, next(self._sequence), waiter))
+        self._dispatch()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            if not waiter.future.done():
+                waiter.future.cancel()
+                self._dispatch()
+                _rate_limited_total.inc(model=model, source="queue_timeout")
+                raise ModelRateLimited(
+                    model, f"waited over {self.queue_timeout:g}s for a slot", self.queue_timeout
+                )
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Granted just as the caller went away; hand the slot back
+                self.release()
+            else:
+                waiter.future.cancel()
+                self._dispatch()
+            raise
+
+    def release(self) -> None:
+        """Give back the concurrency slot of a finished call"""
+        self.in_flight -= 1
+        self._dispatch()
+
+    def settle(self, model: str, reserved: int, actual: int) -> None:
+        """
+        Correct a token reservation with the usage the provider reported
+
+        Args:
+            model: Model name
+            reserved: Tokens reserved when the call started
+            actual: Tokens the call actually used
+        """
+        now = asyncio.get_running_loop().time()
+        _, token_bucket = self._model_buckets(model, now)
+        token_bucket.take(actual - reserved, now)
+        self._dispatch()
+
+    def rate_limited(self, model: str, retry_after: Optional[float]) -> None:
+        """
+        Pause a model after the provider rejected a call with 429
+
+        Args:
+            model: Model name
+            retry_after: Provider's Retry-After hint in seconds, if any
+        """
+        now = asyncio.get_running_loop().time()
+        request_bucket, _ = self._model_buckets(model, now)
+        request_bucket.pause(retry_after or RATE_LIMIT_BACKOFF_SECONDS, now)
+        _rate_limited_total.inc(model=model, source="provider")
+
+    def stats(self) -> Dict[str, Any]:
+        """Get scheduler state"""
+        return {
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "queued": self.queued,
+        }
+
+    def _dispatch(self) -> None:
+        """Start every waiting call that has a slot and budget, in priority order"""
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        blocked_models = set()
+        next_check: Optional[float] = None
+        remaining: List[Tuple[int, int, _Waiter]] = []
+
+        while self._heap:
+            entry = heapq.heappop(self._heap)
+            waiter = entry[2]
+            if waiter.future.done():
+                continue
+            if self.in_flight >= self.max_concurrency or waiter.model in blocked_models:
+                remaining.append(entry)
+                continue
+
+            request_bucket, token_bucket = self._model_buckets(waiter.model, now)
+            wait = max(
+                request_bucket.wait_time(1, now), token_bucket.wait_time(waiter.tokens, now)
+            )
+            if wait > 0:
+                # Later calls for this model must not overtake this one
+                blocked_models.add(waiter.model)
+                next_check = wait if next_check is None else min(next_check, wait)
+                remaining.append(entry)
+                continue
+
+            request_bucket.take(1, now)
+            token_bucket.take(waiter.tokens, now)
+            self.in_flight += 1
+            waiter.future.set_result(None)
+
+        for entry in remaining:
+            heapq.heappush(self._heap, entry)
+
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if next_check is not None:
+            self._timer = loop.call_later(next_check, self._dispatch)
+
+
+_scheduler: Optional[ModelScheduler] = None
+
+_queued = gauge(
+    "model_scheduler_queued", "Model calls waiting in the scheduler",
+    function=lambda: _scheduler.queued if _scheduler else 0,
+)
+_in_flight = gauge(
+    "model_scheduler_in_flight", "Model calls in flight",
+    function=lambda: _scheduler.in_flight if _scheduler else 0,
+)
+
+
+def get_scheduler() -> ModelScheduler:
+    """Get the process-wide model scheduler"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = ModelScheduler()
+    return _scheduler
+
+
+def current_lane() -> str:
+    """Get the priority lane of model calls made from the current context"""
+    return _lane.get()
+
+
+def set_lane(lane: str) -> "contextvars.Token[str]":
+    """
+    Set the priority lane for model calls made from the current context,
+    including tasks created from it
+
+    Args:
+        lane: One of LANE_PRIORITIES
+
+    Returns:
+        Token to restore the previous lane with reset_lane
+    """
+    if lane not in LANE_PRIORITIES:
+        raise ValueError(f"Unknown model lane: {lane}")
+    return _lane.set(lane)
+
+
+def reset_lane(token: "contextvars.Token[str]") -> None:
+    """Restore the lane that was set before set_lane"""
+    _lane.reset(token)
+
+
+def _usage_tokens(response: Any) -> Optional[int]:
+    """Get the total token count a provider reported for a response, if any"""
+    usage = getattr(response, "usage_metadata", None)
+    total = getattr(usage, "total_token_count", None) if usage is not None else None
+    if total is None:
+        usage = getattr(response, "usage", None)
+        if isinstance(usage, dict):
+            total = usage.get("total_tokens")
+        elif usage is not None:
+            total = getattr(usage, "total_tokens", None)
+    return int(total) if total else None
+
+
+@asynccontextmanager
+async def model_slot(
+    model: str, prompt_tokens: int, max_output_tokens: int, lane: Optional[str] = None
+) -> AsyncIterator[Callable[..., None]]:
+    """
+    Hold a scheduler slot for a model call, including any streaming
+
+    Yields a function to call with the provider response, which corrects
+    the token reservation with the reported usage; for a streamed response,
+    pass the last chunk and the full generated text. The call is recorded
+    in the model telemetry when the block exits. A provider 429 raised
+    inside the block pauses the model and is re-raised as ModelRateLimited.
+
+    Args:
+        model: Model name
+        prompt_tokens: Estimated prompt tokens
+        max_output_tokens: Most tokens the call may generate
+        lane: Priority lane, defaults to the current context's lane
+
+    Raises:
+        ModelRateLimited: If the call timed out in the queue or the provider
+            rate limited it
+    """
+    scheduler = get_scheduler()
+    lane = lane or current_lane()
+    tokens = prompt_tokens + max_output_tokens
+    loop = asyncio.get_running_loop()
+    queued_at = loop.time()
+    await scheduler.acquire(model, tokens, lane)
+    started = loop.time()
+    _wait_seconds.observe(started - queued_at, model=model, lane=lane)
+    result: Dict[str, Any] = {"response": None, "output_text": None}
+
+    def record_usage(response: Any, output_text: Optional[str] = None) -> None:
+        result["response"] = response
+        result["output_text"] = output_text
+        actual = _usage_tokens(response)
+        if actual is not None:
+            scheduler.settle(model, tokens, actual)
+
+    outcome = "error"
+    try:
+        yield record_usage
+        outcome = "success"
+    except asyncio.TimeoutError:
+        outcome = "timeout"
+        raise
+    except asyncio.CancelledError:
+        outcome = "cancelled"
+        raise
+    except Exception as e:
+        if is_rate_limit_error(e):
+            outcome = "rate_limited"
+            if not isinstance(e, ModelRateLimited):
+                retry_after = _retry_after(e)
+                scheduler.rate_limited(model, retry_after)
+                raise ModelRateLimited(model, str(e), retry_after) from e
+        raise
+    finally:
+        scheduler.release()
+        finished = loop.time()
+        _latency_seconds.observe(finished - queued_at, model=model, lane=lane)
+        record_model_call(
+            model, finished - started, outcome, result["response"], prompt_tokens,
+            result["output_text"],
+        )
+
+
+async def scheduled_call(
+    model: str,
+    call: Callable[[], Awaitable[Any]],
+    prompt_tokens: int,
+    max_output_tokens: int,
+    lane: Optional[str] = None,
+) -> Any:
+    """
+    Make a model call once the scheduler lets it through
+
+    Args:
+        model: Model name
+        call: Starts the call and returns its response
+        prompt_tokens: Estimated prompt tokens
+        max_output_tokens: Most tokens the call may generate
+        lane: Priority lane, defaults to the current context's lane
+
+    Returns:
+        The call's response
+
+    Raises:
+        ModelRateLimited: If the call timed out in the queue or the provider
+            rate limited it
+    """
+    async with model_slot(model, prompt_tokens, max_output_tokens, lane) as record_usage:
+        response = await call()
+        record_usage(response)
+        return response
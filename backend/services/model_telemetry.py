@@ -0,0 +1,230 @@
+import contextvars
+import os
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+from .metrics import counter, histogram
+
+# Estimated USD per million prompt and output tokens, overridable as
+# "model=prompt:output,model=prompt:output" in MODEL_PRICES
+DEFAULT_MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    "gemini-1.5-pro": (1.25, 5.0),
+    "gemini-1.5-ultra": (1.25, 5.0),
+    "gemini-1.5-flash": (0.075, 0.3),
+    "gpt-4": (30.0, 60.0),
+}
+
+_TOKEN_BUCKETS = (100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+_COST_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+_DEPTH_BUCKETS = (0, 1, 2, 3, 4)
+
+
+def _parse_prices(value: str) -> Dict[str, Tuple[float, float]]:
+    """Parse per-model prices from a "model=prompt:output,model=prompt:output" string"""
+    prices = {}
+    for item in value.split(","):
+        if "=" in item and ":" in item:
+            name, rates = item.split("=", 1)
+            prompt, output = rates.split(":", 1)
+            prices[name.strip()] = (float(prompt), float(output))
+    return prices
+
+
+MODEL_PRICES = {**DEFAULT_MODEL_PRICES, **_parse_prices(os.getenv("MODEL_PRICES", ""))}
+
+_calls_total = counter(
+    "model_calls_total", "Model calls by outcome", ["model", "outcome"]
+)
+_call_seconds = histogram(
+    "model_call_latency_seconds", "Model call latency, excluding the scheduler wait",
+    ["model", "outcome"],
+)
+_tokens_total = counter(
+    "model_tokens_total",
+    "Tokens sent and generated; source is reported when the provider returned usage, "
+    "estimated when counted from the text",
+    ["model", "kind", "source"],
+)
+_call_tokens = histogram(
+    "model_call_tokens", "Tokens per model call", ["model", "kind"], _TOKEN_BUCKETS,
+)
+_cost_total = counter("model_cost_usd_total", "Estimated model spend in USD", ["model"])
+_request_cost = histogram(
+    "model_request_cost_usd", "Estimated model spend per request in USD", ["operation"],
+    _COST_BUCKETS,
+)
+_retries_total = counter(
+    "model_retries_total", "Model calls made again for the same request", ["model", "reason"]
+)
+_parse_failures_total = counter(
+    "model_parse_failures_total", "Model responses that could not be parsed", ["model"]
+)
+_fallback_depth = histogram(
+    "model_fallback_depth",
+    "Position of the provider that answered in the fallback chain, 0 for the first choice",
+    ["provider"], _DEPTH_BUCKETS,
+)
+_cache_total = counter("model_cache_lookups_total", "Result cache lookups", ["cache", "result"])
+
+
+class CostTracker:
+    """Running total of the model calls made for one request"""
+
+    def __init__(self, operation: str):
+        self.operation = operation
+        self.cost = 0.0
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+
+
+_tracker: "contextvars.ContextVar[Optional[CostTracker]]" = contextvars.ContextVar(
+    "model_cost_tracker", default=None
+)
+
+
+def rough_token_count(text: str) -> int:
+    """Roughly count the tokens in a text, at about four characters per token"""
+    return len(text) // 4 + 1 if text else 0
+
+
+def _response_text(response: Any) -> str:
+    """Get the generated text of a Gemini or OpenAI response, or an empty string"""
+    try:
+        choices = getattr(response, "choices", None)
+        if choices:
+            return choices[0].message.content or ""
+        return getattr(response, "text", "") or ""
+    except Exception:
+        # Gemini raises on .text when the response was blocked
+        return ""
+
+
+def _reported_usage(response: Any) -> Optional[Tuple[int, int]]:
+    """Get (prompt, output) token counts the provider reported, if any"""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is not None and getattr(usage, "prompt_token_count", None) is not None:
+        return int(usage.prompt_token_count), int(getattr(usage, "candidates_token_count", 0) or 0)
+    usage = getattr(response, "usage", None)
+    if isinstance(usage, dict):
+        usage = type("Usage", (), usage)
+    if usage is not None and getattr(usage, "prompt_tokens", None) is not None:
+        return int(usage.prompt_tokens), int(getattr(usage, "completion_tokens", 0) or 0)
+    return None
+
+
+def estimate_cost(model: str, prompt_tokens: int, output_tokens: int) -> float:
+    """
+    Estimate the price of a model call
+
+    Args:
+        model: Model name
+        prompt_tokens: Tokens sent
+        output_tokens: Tokens generated
+
+    Returns:
+        float: Estimated cost in USD, 0 for models without a known price
+    """
+    prompt_price, output_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + output_tokens * output_price) / 1_000_000
+
+
+def record_model_call(
+    model: str,
+    seconds: float,
+    outcome: str,
+    response: Any = None,
+    prompt_tokens: int = 0,
+    output_text: Optional[str] = None,
+) -> Tuple[int, int]:
+    """
+    Record one model call
+
+    Token counts come from the provider's usage metadata when the response
+    has it, and are otherwise estimated from the prompt and generated text.
+
+    Args:
+        model: Model name
+        seconds: Call latency
+        outcome: success, error, timeout, cancelled (including a caller's
+            deadline expiring) or rate_limited
+        response: Provider response, if the call returned one
+        prompt_tokens: Estimated prompt tokens, used without usage metadata
+        output_text: Generated text, for streamed responses whose last chunk
+            holds only part of it
+
+    Returns:
+        Tuple of (prompt tokens, output tokens) recorded
+    """
+    _calls_total.inc(model=model, outcome=outcome)
+    _call_seconds.observe(seconds, model=model, outcome=outcome)
+
+    usage = _reported_usage(response) if response is not None else None
+    if usage is not None:
+        source = "reported"
+        prompt, output = usage
+    else:
+        source = "estimated"
+        # A call the provider turned away as rate limited used no tokens
+        prompt = prompt_tokens if outcome != "rate_limited" else 0
+        if output_text is None:
+            output_text = _response_text(response) if response is not None else ""
+        output = rough_token_count(output_text)
+
+    _tokens_total.inc(prompt, model=model, kind="prompt", source=source)
+    _tokens_total.inc(output, model=model, kind="output", source=source)
+    _call_tokens.observe(prompt, model=model, kind="prompt")
+    _call_tokens.observe(output, model=model, kind="output")
+
+    cost = estimate_cost(model, prompt, output)
+    _cost_total.inc(cost, model=model)
+    tracker = _tracker.get()
+    if tracker is not None:
+        tracker.cost += cost
+        tracker.calls += 1
+        tracker.prompt_tokens += prompt
+        tracker.output_tokens += output
+    return prompt, output
+
+
+def record_retry(model: str, reason: str, count: int = 1) -> None:
+    """Record model calls made again for the same request, such as a fallback"""
+    _retries_total.inc(count, model=model, reason=reason)
+
+
+def record_parse_failure(model: str) -> None:
+    """Record a model response that could not be parsed"""
+    _parse_failures_total.inc(model=model)
+
+
+def record_fallback_depth(provider: str, depth: int) -> None:
+    """Record which position in the fallback chain answered a request"""
+    _fallback_depth.observe(depth, provider=provider)
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    """Record a result cache lookup"""
+    _cache_total.inc(cache=cache, result="hit" if hit else "miss")
+
+
+@contextmanager
+def track_request_cost(operation: str) -> Iterator[CostTracker]:
+    """
+    Total the model calls made while the block runs, including calls in
+    tasks it starts, and record the total for the operation
+
+    Args:
+        operation: Request kind, such as "analysis"
+
+    Yields:
+        The CostTracker being filled in
+    """
+    tracker = CostTracker(operation)
+    # Restored by value rather than with a token, as an async generator may
+    # be closed from another context than the one it started in
+    previous = _tracker.get()
+    _tracker.set(tracker)
+    try:
+        yield tracker
+    finally:
+        _tracker.set(previous)
+        _request_cost.observe(tracker.cost, operation=operation)
@@ -1,10 +1,30 @@
 import io
+import mmap
+import os
+import threading
+import time
+import multiprocessing
 from io import BytesIO
 from PyPDF2 import PdfReader
-from typing import Union, Dict, List
+from contextlib import contextmanager
+from typing import Any, Union, Dict, Iterator, List, Optional, Tuple
 import concurrent.futures
+from concurrent.futures.process import BrokenProcessPool
 import re
 
+# How pages are extracted: "process" sends large PDFs to a long-lived pool
+# of worker processes and extracts small ones in the calling thread;
+# "inline" extracts every PDF in the calling thread
+PDF_EXTRACTION_ENGINE = os.getenv("PDF_EXTRACTION_ENGINE", "process").lower()
+
+# Worker processes in the extraction pool
+PDF_PROCESS_WORKERS = int(os.getenv("PDF_PROCESS_WORKERS", str(os.cpu_count() or 1)))
+
+# Page count from which PDFs go to the process pool; 0 picks the cutoff
+# from measured extraction and pool dispatch costs
+PDF_PROCESS_MIN_PAGES = int(os.getenv("PDF_PROCESS_MIN_PAGES", "0"))
+
+
 def _clean_extracted_text(text: str) -> str:
     """
     Clean and normalize extracted text
@@ -33,6 +53,7 @@ def _clean_extracted_text(text: str) -> str:
     
     return text.strip()
 
+
 def _extract_page_text(page) -> str:
     """
     Extract text from a single PDF page
@@ -52,16 +73,218 @@ def _extract_page_text(page) -> str:
         print(f"Error extracting text from page: {str(e)}")
         return ""
 
-def extract_text_from_pdf(file_content: Union[bytes, BytesIO]) -> str:
+
+@contextmanager
+def _mapped_file(path: str) -> Iterator[mmap.mmap]:
+    """Map a PDF file read-only, so PyPDF2 reads it without a copy in memory"""
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+
+def _extract_page_range(
+    source: Union[bytes, str], start: int, end: int
+) -> Tuple[List[str], float]:
+    """
+    Extract the text of a range of pages, in a pool worker process
+
+    Args:
+        source: The whole PDF file, or the path of a spooled upload
+        start: First page index
+        end: Page index after the last page
+
+    Returns:
+        Tuple of (text of each page, seconds spent extracting)
+    """
+    started = time.perf_counter()
+    if isinstance(source, str):
+        with _mapped_file(source) as mapped:
+            pdf_reader = PdfReader(mapped)
+            texts = [_extract_page_text(pdf_reader.pages[index]) for index in range(start, end)]
+    else:
+        pdf_reader = PdfReader(io.BytesIO(source))
+        texts = [_extract_page_text(pdf_reader.pages[index]) for index in range(start, end)]
+    return texts, time.perf_counter() - started
+
+
+class _ExtractionCosts:
+    """
+    Running estimates of what extraction costs in-process and through the
+    process pool, for choosing between them
+
+    Splitting n pages over p workers saves about n * per_page * (1 - 1/p)
+    seconds and costs a fixed dispatch overhead (pickling the PDF, each
+    worker parsing it again, and collecting the results), so the pool is
+    worth it from n > overhead / (per_page * (1 - 1/p)) pages. With a
+    single worker it never is.
+    """
+
+    def __init__(self, per_page: float = 0.02, overhead: float = 0.05, weight: float = 0.2):
+        self.per_page = per_page
+        self.overhead = overhead
+        self.weight = weight
+        self._lock = threading.Lock()
+
+    def record_pages(self, pages: int, seconds: float) -> None:
+        """Record the time extracting pages took, without any dispatch"""
+        if pages > 0:
+            with self._lock:
+                self.per_page += self.weight * (seconds / pages - self.per_page)
+
+    def record_overhead(self, seconds: float) -> None:
+        """Record the time a pool dispatch added beyond its slowest worker"""
+        with self._lock:
+            self.overhead += self.weight * (max(seconds, 0.0) - self.overhead)
+
+    def min_pages(self, workers: int) -> Optional[int]:
+        """Smallest page count worth sending to the pool, or None if none is"""
+        if workers < 2:
+            return None
+        with self._lock:
+            saving_per_page = self.per_page * (1 - 1 / workers)
+            if saving_per_page <= 0:
+                return None
+            return max(2, int(self.overhead / saving_per_page) + 1)
+
+
+_extraction_costs = _ExtractionCosts()
+
+_process_pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+
+
+def _use_process_pool(total_pages: int) -> bool:
+    """Whether to extract a PDF of this many pages in the process pool"""
+    if PDF_EXTRACTION_ENGINE != "process" or total_pages < 2:
+        return False
+    if PDF_PROCESS_MIN_PAGES > 0:
+        return PDF_PROCESS_WORKERS > 0 and total_pages >= PDF_PROCESS_MIN_PAGES
+    min_pages = _extraction_costs.min_pages(min(PDF_PROCESS_WORKERS, total_pages))
+    return min_pages is not None and total_pages >= min_pages
+
+
+def get_process_pool() -> concurrent.futures.ProcessPoolExecutor:
+    """Get the long-lived extraction process pool, starting it on first use"""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            # Spawned rather than forked, as the server process runs threads
+            _process_pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=max(PDF_PROCESS_WORKERS, 1),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _process_pool
+
+
+def start_process_pool() -> bool:
+    """
+    Start the extraction worker processes ahead of the first large PDF,
+    if the process engine can ever use them
+
+    Returns:
+        bool: Whether the pool was started
+    """
+    if PDF_EXTRACTION_ENGINE != "process":
+        return False
+    if PDF_PROCESS_MIN_PAGES <= 0 and PDF_PROCESS_WORKERS < 2:
+        return False
+    pool = get_process_pool()
+    # Workers are spawned on the first submission
+    list(pool.map(abs, range(max(PDF_PROCESS_WORKERS, 1))))
+    return True
+
+
+def shutdown_process_pool() -> None:
+    """Stop the extraction worker processes"""
+    global _process_pool
+    with _process_pool_lock:
+        pool, _process_pool = _process_pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _extract_pages_in_process(pdf_reader: PdfReader, total_pages: int) -> str:
+    """Extract every page in the calling thread, recording the cost"""
+    started = time.perf_counter()
+    text = "".join(_extract_page_text(page) for page in pdf_reader.pages)
+    _extraction_costs.record_pages(total_pages, time.perf_counter() - started)
+    return text
+
+
+def _extract_pages_in_pool(source: Union[bytes, str], total_pages: int) -> str:
+    """
+    Extract pages in the process pool, one contiguous range per worker
+
+    Each task is sent the PDF bytes once and parses its own copy, or the path
+    of a spooled upload, which it maps without copying.
+    """
+    workers = max(min(PDF_PROCESS_WORKERS, total_pages), 1)
+    size = -(-total_pages // workers)
+    ranges = [(start, min(start + size, total_pages)) for start in range(0, total_pages, size)]
+
+    started = time.perf_counter()
+    pool = get_process_pool()
+    futures = [pool.submit(_extract_page_range, source, start, end) for start, end in ranges]
+    results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - started
+
+    slowest = max(seconds for _, seconds in results)
+    for (start, end), (_, seconds) in zip(ranges, results):
+        _extraction_costs.record_pages(end - start, seconds)
+    _extraction_costs.record_overhead(elapsed - slowest)
+
+    return "".join(text for texts, _ in results for text in texts)
+
+
+def _failed_document(
+    message: str, page_count: int = 0, metadata: Optional[Dict[str, str]] = None
+) -> Dict[str, Any]:
+    return {
+        "text": message, "extracted": False, "page_count": page_count, "metadata": metadata or {}
+    }
+
+
+def extract_text_from_pdf(file_content: Union[bytes, BytesIO, str]) -> str:
     """
     Extract text from a PDF file with enhanced processing and fallbacks
     
     Args:
-        file_content: PDF file content as bytes or BytesIO
+        file_content: PDF file content as bytes or BytesIO, or the path of a
+            spooled upload
+        
+    Returns:
+        str: Extracted text from the PDF, or a message saying why none was
+    """
+    return extract_pdf_document(file_content)["text"]
+
+
+def extract_pdf_document(file_content: Union[bytes, BytesIO, str]) -> Dict[str, Any]:
+    """
+    Extract the text, page count and metadata of a PDF file
+    
+    Args:
+        file_content: PDF file content as bytes or BytesIO, or the path of a
+            spooled upload, which is mapped rather than read into memory
         
     Returns:
-        str: Extracted text from the PDF
+        Dict with the cleaned text, page_count, metadata and whether any text
+        was extracted; when none was, text holds a message saying why
     """
+    if isinstance(file_content, str):
+        try:
+            with _mapped_file(file_content) as mapped:
+                return _extract_document(mapped, file_content)
+        except (OSError, ValueError) as e:
+            error_message = f"Error extracting text from PDF: {str(e)}"
+            print(error_message)
+            return _failed_document(error_message)
+    return _extract_document(file_content, None)
+
+
+def _extract_document(
+    file_content: Union[bytes, BytesIO, mmap.mmap], path: Optional[str]
+) -> Dict[str, Any]:
+    """Extract a PDF for extract_pdf_document; pool workers map path when given"""
     try:
         # Convert bytes to BytesIO if needed
         if isinstance(file_content, bytes):
@@ -76,11 +299,14 @@ def extract_text_from_pdf(file_content: Union[bytes, BytesIO]) -> str:
             pdf_reader = PdfReader(file_content)
         except Exception as e:
             print(f"Error creating PDF reader: {str(e)}")
-            return f"Error: Could not read the PDF file. The file may be corrupted or password-protected. {str(e)}"
+            return _failed_document(
+                "Error: Could not read the PDF file. The file may be corrupted or "
+                f"password-protected. {str(e)}"
+            )
         
         # Check if PDF has pages
         if not pdf_reader.pages or len(pdf_reader.pages) == 0:
-            return "Error: The PDF file contains no pages."
+            return _failed_document("Error: The PDF file contains no pages.")
             
         # Get total pages for logging
         total_pages = len(pdf_reader.pages)
@@ -100,52 +326,68 @@ def extract_text_from_pdf(file_content: Union[bytes, BytesIO]) -> str:
         except Exception as meta_e:
             print(f"Error extracting metadata: {str(meta_e)}")
         
-        # Use parallel processing for multi-page PDFs
-        if total_pages > 1:
-            # Calculate optimal max workers based on page count
-            max_workers = min(total_pages, 8)  # Cap at 8 workers to avoid resource depletion
-            
-            with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-                # Process pages in batches for better memory management
-                batch_size = 10
-                text_parts: List[str] = []
-                
-                for batch_start in range(0, total_pages, batch_size):
-                    batch_end = min(batch_start + batch_size, total_pages)
-                    batch_pages = list(pdf_reader.pages[batch_start:batch_end])
-                    
-                    batch_results = list(executor.map(_extract_page_text, batch_pages))
-                    text_parts.extend(batch_results)
-                    
-                    # Log progress for long documents
-                    if total_pages > 20:
-                        print(f"Processed pages {batch_start+1}-{batch_end} of {total_pages}")
-                
-                text = "".join(text_parts)
-        else:
-            # For single page PDFs, just extract directly
-            text = _extract_page_text(pdf_reader.pages[0])
+        # Page extraction is pure Python and holds the GIL, so large PDFs
+        # are split across worker processes and small ones extracted here
+        text = None
+        if _use_process_pool(total_pages):
+            try:
+                text = _extract_pages_in_pool(path or file_content.getvalue(), total_pages)
+            except (BrokenProcessPool, OSError) as e:
+                print(f"Process pool extraction failed, extracting in-process: {str(e)}")
+                shutdown_process_pool()
+        if text is None:
+            text = _extract_pages_in_process(pdf_reader, total_pages)
 
         # Clean and process the extracted text
         cleaned_text = _clean_extracted_text(text)
         
         if not cleaned_text.strip():
             # If no text was extracted, we return a clear error message
-            result = ("No text could be extracted from this PDF. "
-                     "The file might be scanned or image-based without embedded text. "
-                     "Try using a PDF with searchable text.")
-        else:
-            # Return successfully extracted and cleaned text
-            result = cleaned_text
-            
-            # Log extraction statistics
-            words = len(result.split())
-            chars = len(result)
-            print(f"Extracted {words} words ({chars} characters) from {total_pages} page{'s' if total_pages > 1 else ''}")
-        
-        return result
+            return _failed_document(
+                "No text could be extracted from this PDF. "
+                "The file might be scanned or image-based without embedded text. "
+                "Try using a PDF with searchable text.",
+                total_pages,
+                metadata,
+            )
+
+        # Log extraction statistics
+        words = len(cleaned_text.split())
+        chars = len(cleaned_text)
+        print(
+            f"Extracted {words} words ({chars} characters) from {total_pages} "
+            f"page{'s' if total_pages > 1 else ''}"
+        )
+
+        return {
+            "text": cleaned_text, "extracted": True, "page_count": total_pages, "metadata": metadata
+        }
 
     except Exception as e:
         error_message = f"Error extracting text from PDF: {str(e)}"
         print(error_message)
-        return error_message
+        return _failed_document(error_message)
+
+
+def count_pdf_pages(file_content: Union[bytes, str]) -> Optional[int]:
+    """
+    Count the pages of a PDF without extracting any text
+
+    The pages are counted by walking the page tree, which doesn't parse
+    their content. The tree's own /Count is not trusted, since the file
+    sets it.
+
+    Args:
+        file_content: PDF file content, or the path of a spooled upload
+
+    Returns:
+        Page count, or None if the file could not be read as a PDF
+    """
+    try:
+        if isinstance(file_content, str):
+            with _mapped_file(file_content) as mapped:
+                return len(PdfReader(mapped).pages)
+        return len(PdfReader(io.BytesIO(file_content)).pages)
+    except Exception as e:
+        print(f"Error counting PDF pages: {str(e)}")
+        return None
@@ -0,0 +1,326 @@
+import math
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from .metrics import counter
+
+# Per-user limits as "requests/seconds" pairs, all enforced at once. The
+# defaults leave room for one multi-job request of MULTI_JOB_MAX_JOBS
+# postings a minute while capping sustained use.
+USER_RATE_LIMITS = os.getenv("USER_RATE_LIMITS", "20/60,300/86400")
+USER_BATCH_RATE_LIMITS = os.getenv("USER_BATCH_RATE_LIMITS", "5/3600")
+
+# How often each worker merges its counts with the other workers on the host
+RATE_LIMIT_SYNC_SECONDS = float(os.getenv("RATE_LIMIT_SYNC_SECONDS", "2"))
+
+_rejected_total = counter(
+    "user_rate_limited_total", "Requests rejected by per-user quotas", ["limiter"]
+)
+
+# (limiter, key, window seconds, window start) -> count
+WindowKey = Tuple[str, str, int, int]
+
+
+def parse_limits(value: str) -> List[Tuple[int, int]]:
+    """
+    Parse limits from a "requests/seconds,requests/seconds" string
+
+    Args:
+        value: Limits string, such as "20/60,300/86400"
+
+    Returns:
+        List of (requests, window seconds) tuples
+    """
+    limits = []
+    for item in value.split(","):
+        if "/" in item:
+            requests, seconds = item.split("/", 1)
+            limits.append((int(requests), int(seconds)))
+    return limits
+
+
+class QuotaExceeded(Exception):
+    """A caller is over one of its rate limits"""
+
+    def __init__(self, limiter: str, limit: int, window: int, retry_after: float):
+        self.limiter = limiter
+        self.limit = limit
+        self.window = window
+        self.retry_after = retry_after
+        super().__init__(
+            f"Rate limit exceeded: at most {limit} requests per {window} seconds. "
+            f"Try again in {math.ceil(retry_after)} seconds."
+        )
+
+
+class SQLiteQuotaStore:
+    """
+    Window counts shared by every worker process on the host through a
+    SQLite file
+
+    Workers add the requests they counted since their last sync and read
+    back the host-wide totals in one transaction.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS rate_windows (
+                limiter TEXT NOT NULL,
+                key TEXT NOT NULL,
+                window INTEGER NOT NULL,
+                start INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (limiter, key, window, start)
+            )
+            """
+        )
+        conn.commit()
+
+    def add_and_fetch(
+        self, limiter: str, deltas: Dict[WindowKey, int], now: float
+    ) -> Dict[WindowKey, int]:
+        """
+        Add local counts and read the shared totals
+
+        Args:
+            limiter: Limiter name
+            deltas: Requests counted locally since the last sync, per window
+            now: Current Unix time; windows that no longer affect the
+                sliding estimate are left out
+
+        Returns:
+            Dict mapping every live window of the limiter to its host-wide count
+        """
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                "INSERT INTO rate_windows (limiter, key, window, start, count) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (limiter, key, window, start) "
+                "DO UPDATE SET count = count + excluded.count",
+                [key + (delta,) for key, delta in deltas.items() if delta],
+            )
+            rows = conn.execute(
+                "SELECT key, window, start, count FROM rate_windows "
+                "WHERE limiter = ? AND start + 2 * window > ?",
+                (limiter, now),
+            ).fetchall()
+        return {(limiter, key, window, start): count for key, window, start, count in rows}
+
+    def purge(self, before: float) -> int:
+        """
+        Delete windows that ended before a point in time
+
+        Returns:
+            int: Number of windows removed
+        """
+        conn = self._connection()
+        with conn:
+            cursor = conn.execute(
+                "DELETE FROM rate_windows WHERE start + 2 * window < ?", (before,)
+            )
+        return cursor.rowcount
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+        return conn
+
+
+class SlidingWindowLimiter:
+    """
+    Per-key sliding-window rate limiter enforced from process memory
+
+    Counts are kept in fixed windows aligned to wall-clock time, and the
+    sliding-window estimate weights the previous window by how much of it
+    still overlaps the last ``window`` seconds. Checks never leave the
+    process: each worker adds its own unsynced requests to the host-wide
+    totals it read at the last sync, and a background thread merges counts
+    through the shared store every ``sync_interval`` seconds. Between syncs
+    the workers of a host can together overshoot a limit by at most the
+    requests they admit in one interval.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        limits: List[Tuple[int, int]],
+        store: Optional[SQLiteQuotaStore] = None,
+        sync_interval: float = RATE_LIMIT_SYNC_SECONDS,
+    ):
+        self.name = name
+        self.limits = limits
+        self.store = store
+        self.sync_interval = sync_interval
+        # Host-wide count at the last sync, including this worker's synced requests
+        self._synced: Dict[WindowKey, int] = {}
+        # Requests this worker admitted since the last sync
+        self._pending: Dict[WindowKey, int] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._syncer: Optional[threading.Thread] = None
+        self.rejected = 0
+
+    def _count(self, key: WindowKey) -> int:
+        return self._synced.get(key, 0) + self._pending.get(key, 0)
+
+    def check(self, key: str, cost: int = 1, now: Optional[float] = None) -> None:
+        """
+        Admit a request for a key, counting it against every limit
+
+        Args:
+            key: Caller identity, such as a user ID
+            cost: Units the request consumes
+            now: Current Unix time, for tests
+
+        Raises:
+            QuotaExceeded: If admitting the request would break a limit;
+                nothing is counted in that case
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            windows = []
+            for limit, window in self.limits:
+                start = int(now // window) * window
+                current = (self.name, key, window, start)
+                previous = (self.name, key, window, start - window)
+                elapsed = now - start
+                estimate = self._count(previous) * (1 - elapsed / window) + self._count(current)
+                if estimate + cost > limit:
+                    retry_after = self._retry_after(
+                        limit, window, elapsed, self._count(previous), self._count(current), cost
+                    )
+                    self.rejected += 1
+                    _rejected_total.inc(limiter=self.name)
+                    raise QuotaExceeded(self.name, limit, window, retry_after)
+                windows.append(current)
+
+            for current in windows:
+                self._pending[current] = self._pending.get(current, 0) + cost
+
+    @staticmethod
+    def _retry_after(
+        limit: int, window: int, elapsed: float, previous: int, current: int, cost: int
+    ) -> float:
+        """Seconds until a request of ``cost`` fits under the limit, if nothing else arrives"""
+        room = limit - cost - current
+        if room >= 0:
+            # Wait for enough of the previous window to slide out
+            wait = window * (1 - room / previous) - elapsed if previous else 0.0
+        else:
+            # The current window alone is over; it becomes the previous one
+            # at the next boundary and has to slide out far enough
+            room = limit - cost
+            wait = window - elapsed
+            if current:
+                wait += max(0.0, window * (1 - room / current))
+        return max(1.0, wait)
+
+    def sync(self, now: Optional[float] = None) -> None:
+        """Merge this worker's counts with the shared store and drop expired windows"""
+        now = time.time() if now is None else now
+        with self._lock:
+            # Windows still inside the sliding range
+            self._synced = {
+                key: count for key, count in self._synced.items() if key[3] + 2 * key[2] > now
+            }
+            self._pending = {
+                key: count for key, count in self._pending.items() if key[3] + 2 * key[2] > now
+            }
+            if self.store is None:
+                return
+            deltas = dict(self._pending)
+
+        # Every live window is read back, so this worker also learns about
+        # keys only other workers have seen
+        totals = self.store.add_and_fetch(self.name, deltas, now)
+
+        with self._lock:
+            for key, delta in deltas.items():
+                remaining = self._pending.get(key, 0) - delta
+                if remaining > 0:
+                    self._pending[key] = remaining
+                else:
+                    self._pending.pop(key, None)
+            self._synced = totals
+
+    def start_sync(self) -> None:
+        """Start the background thread merging counts with the shared store"""
+        if self.store is None or (self._syncer is not None and self._syncer.is_alive()):
+            return
+        self._stop_event.clear()
+        self._syncer = threading.Thread(
+            target=self._sync_loop, name=f"rate-limit-sync-{self.name}", daemon=True
+        )
+        self._syncer.start()
+
+    def stop_sync(self) -> None:
+        """Stop the background sync thread after a final sync"""
+        self._stop_event.set()
+        if self._syncer is not None:
+            self._syncer.join(timeout=self.sync_interval + 1)
+            self._syncer = None
+
+    def _sync_loop(self) -> None:
+        last_purge = 0.0
+        while True:
+            stopping = self._stop_event.wait(self.sync_interval)
+            try:
+                self.sync()
+                now = time.time()
+                if now - last_purge > 3600:
+                    self.store.purge(now)
+                    last_purge = now
+            except Exception as e:
+                print(f"Error syncing rate limits for {self.name}: {str(e)}")
+            if stopping:
+                return
+
+    def stats(self) -> Dict[str, int]:
+        """Get limiter statistics"""
+        with self._lock:
+            return {
+                "tracked_windows": len(set(self._synced) | set(self._pending)),
+                "unsynced_windows": len(self._pending),
+                "rejected": self.rejected,
+            }
+
+
+def create_quota_store() -> Optional[SQLiteQuotaStore]:
+    """
+    Create the shared quota store configured from environment variables
+
+    Set RATE_LIMIT_DB_PATH to an empty string to keep every worker's
+    counts to itself.
+
+    Returns:
+        SQLiteQuotaStore, or None if disabled or unavailable
+    """
+    default_path = os.path.join(tempfile.gettempdir(), "naukriguru", "rate_limits.sqlite3")
+    path = os.getenv("RATE_LIMIT_DB_PATH", default_path)
+    if not path:
+        return None
+
+    try:
+        return SQLiteQuotaStore(path)
+    except (sqlite3.Error, OSError) as e:
+        print(f"Error initializing shared rate limit store: {str(e)}")
+        return None
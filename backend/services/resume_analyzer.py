@@ -1,15 +1,72 @@
 import os
 import json
 import google.generativeai as genai  # type: ignore
-from typing import Dict, Any, List
+from typing import Dict, Any, List, AsyncIterator, Optional, Set, Tuple
 import hashlib
 import functools
 import asyncio
 from datetime import datetime, timedelta
+from .analysis_cache import create_analysis_cache
+from .cache_store import create_cache_store
+from .singleflight import SingleFlight
+from .job_profile import get_job_profile, format_job_profile, job_profile_model
+from .model_registry import get_model, warm_up_models
+from .scoring import score_resume, SCORED_FIELDS, SKILL_FIELDS
+from .similarity import cosine_similarity, similarity_score
+from .json_repair import TolerantJSONParser, parse_json_object
+from .resume_compressor import compress_resume, compress_job_description, estimate_tokens
+from .model_scheduler import ModelRateLimited, model_slot, scheduled_call
+from .model_telemetry import (
+    record_cache_lookup, record_parse_failure, record_retry, track_request_cost,
+)
 
-# Simple in-memory cache for analysis results
-_analysis_cache = {}
-_cache_ttl = timedelta(hours=24)  # Cache results for 24 hours
+# Only reuse very recent results (1 hour) so industry insights stay current
+_cache_ttl = timedelta(hours=1)
+
+# Bounded in-memory cache for analysis results, backed by a host-local
+# SQLite store shared across uvicorn workers and restarts
+_analysis_cache = create_analysis_cache(
+    default_ttl=_cache_ttl.total_seconds(),
+    store=create_cache_store(namespace="analysis"),
+)
+
+# Registry of in-flight analyses so identical concurrent requests share one model call
+_inflight_analyses = SingleFlight()
+
+# Increased to 50 seconds to allow for web searches and detailed analysis
+ANALYSIS_TIMEOUT_SECONDS = 50
+
+ANALYSIS_MODEL = "gemini-1.5-pro"
+ANALYSIS_MAX_OUTPUT_TOKENS = 1024
+
+# Prompt budgets for the resume and, when no job profile is available, the
+# raw job description
+RESUME_TOKEN_BUDGET = int(os.getenv("RESUME_TOKEN_BUDGET", "2000"))
+JOB_DESCRIPTION_TOKEN_BUDGET = int(os.getenv("JOB_DESCRIPTION_TOKEN_BUDGET", "500"))
+
+# One resume against several job descriptions: job sections of at most
+# PACKED_JOB_TOKEN_LIMIT tokens are packed into shared model requests, up to
+# MAX_PACKED_JOBS jobs and PACKED_JOBS_TOKEN_BUDGET tokens of job sections per
+# request, so the resume tokens are paid once per request instead of per job
+MULTI_JOB_MAX_JOBS = int(os.getenv("MULTI_JOB_MAX_JOBS", "20"))
+PACKED_JOB_TOKEN_LIMIT = int(os.getenv("PACKED_JOB_TOKEN_LIMIT", "400"))
+PACKED_JOBS_TOKEN_BUDGET = int(os.getenv("PACKED_JOBS_TOKEN_BUDGET", "1200"))
+MAX_PACKED_JOBS = int(os.getenv("MAX_PACKED_JOBS", "4"))
+MULTI_JOB_CONCURRENCY = int(os.getenv("MULTI_JOB_CONCURRENCY", "4"))
+
+# A packed request writes one result per job, so it gets more time and room
+PACKED_ANALYSIS_TIMEOUT_SECONDS = 90
+PACKED_MAX_OUTPUT_TOKENS = ANALYSIS_MAX_OUTPUT_TOKENS * MAX_PACKED_JOBS
+
+# Top-level fields of the model output pushed to streaming clients as soon as
+# they are parsed; scores are computed locally and sent before the model call
+STREAMED_FIELDS = [
+    "job_title",
+    "feedback",
+    "improvement_areas",
+    "industry_insights",
+    "formatting_checks",
+]
 
 def _generate_cache_key(resume_text: str, job_description: str) -> str:
     """Generate a unique cache key based on resume text and job description"""
@@ -29,343 +86,932 @@ async def analyze_resume_with_gemini(
     Returns:
         Dict containing analysis results
     """
-    # Check cache first
-    cache_key = _generate_cache_key(resume_text, job_description)
-    if cache_key in _analysis_cache:
-        cached_result, timestamp = _analysis_cache[cache_key]
-        # Only use cached results if they are very recent (1 hour)
-        # This ensures industry insights are always current
-        if datetime.now() - timestamp < timedelta(hours=1):
+    with track_request_cost("analysis"):
+        # Check cache first
+        cache_key = _generate_cache_key(resume_text, job_description)
+        cached_result = await _analysis_cache.get_async(cache_key)
+        record_cache_lookup("analysis", cached_result is not None)
+        if cached_result is not None:
             print("Using cached analysis result")
             return cached_result
 
-    # Truncate long texts to reduce token usage
-    max_resume_length = 8000  # Approximately 2000 tokens
-    max_job_desc_length = 2000  # Approximately 500 tokens
-    
-    if len(resume_text) > max_resume_length:
-        resume_text = resume_text[:max_resume_length] + "..."
-    
-    if len(job_description) > max_job_desc_length:
-        job_description = job_description[:max_job_desc_length] + "..."
-    
-    try:
-        # Configure the model with optimized settings
-        generation_config = {
-            "temperature": 0.1,  # Lower temperature for more deterministic results
-            "top_p": 0.7,
-            "top_k": 20,
-            "max_output_tokens": 1024,  # Reduced token limit for faster response
-        }
-        
-        model = genai.GenerativeModel(
-            model_name="gemini-1.5-pro",
-            generation_config=generation_config
+        # Identical concurrent requests await the same model call
+        return await _inflight_analyses.do(
+            cache_key, lambda: _run_analysis(resume_text, job_description, cache_key)
         )
 
-        # Get current year for industry insights
-        current_year = datetime.now().year
+async def _run_analysis(
+    resume_text: str, job_description: str, cache_key: str
+) -> Dict[str, Any]:
+    """
+    Run a single uncached Gemini analysis and cache a successful result
 
-        # Create a more structured and efficient prompt
-        prompt = f"""
-        You are an expert resume analyzer for job applications. Analyze this resume against the job description.
-        
-        INSTRUCTIONS:
-        1. Analyze the resume content and job description thoroughly
-        2. Extract the job title from the job description
-        3. Identify matching skills between the resume and job description
-        4. Provide personalized and specific improvement areas tailored to this exact resume and job
-        5. Create industry-specific insights based on LATEST industry trends and best practices for {current_year}
-        6. Include specific job market trends and hiring patterns that are current for {current_year}
-        7. Pay special attention to Applicant Tracking System (ATS) optimization techniques
-        8. Analyze the resume formatting for ATS compatibility and readability
-        9. Provide specific feedback on font, layout, and page setup
-        10. Conduct brief web research if needed to ensure industry insights are current
-        
-        RESUME:
-        {resume_text}
-        
-        JOB DESCRIPTION:
-        {job_description}
-        
-        Respond with ONLY a JSON object in this exact format:
-        {{
-            "match_score": <number 0-100>,
-            "feedback": "<begin with a 2-sentence introduction summary followed by 4-6 specific detailed points as complete sentences>",
-            "skills_match": ["<skill1>", "<skill2>", ...],
-            "improvement_areas": ["<specific suggestion1>", "<specific suggestion2>", ...],
-            "searchability_issues": <number of issues 0-15>,
-            "hard_skills_issues": <number of issues 0-15>,
-            "soft_skills_issues": <number of issues 0-15>,
-            "recruiter_tips_issues": <number of issues 0-15>,
-            "formatting_issues": <number of issues 0-15>,
-            "keywords_match_percentage": <number 0-100>,
-            "experience_level_percentage": <number 0-100>,
-            "skills_relevance_percentage": <number 0-100>,
-            "job_title": "<extracted job title>",
-            "industry_insights": {{
-                "industry": "<industry name>",
-                "title": "<industry title for {current_year}>",
-                "current_year": {current_year},
-                "market_overview": "<1-2 sentence current market overview for this industry in {current_year}>",
-                "recommendations": [
-                    "<actionable industry recommendation 1 with {current_year} trends>",
-                    "<actionable industry recommendation 2 with {current_year} trends>",
-                    "<actionable industry recommendation 3 with {current_year} trends>",
-                    "<actionable industry recommendation 4 with {current_year} trends>",
-                    "<actionable industry recommendation 5 with focus on ATS and {current_year} trends>"
-                ]
-            }},
-            "formatting_checks": {{
-                "font_check": {{
-                    "passed": <boolean true/false>,
-                    "details": [
-                        "<specific font check observation 1>",
-                        "<specific font check observation 2>",
-                        "<specific font check observation 3>"
-                    ]
-                }},
-                "layout_check": {{
-                    "passed": <boolean true/false>,
-                    "details": [
-                        "<specific layout check observation 1>",
-                        "<specific layout check observation 2>",
-                        "<specific layout check observation 3>"
-                    ]
-                }},
-                "page_setup_check": {{
-                    "passed": <boolean true/false>,
-                    "details": [
-                        "<specific page setup check observation 1>",
-                        "<specific page setup check observation 2>",
-                        "<specific page setup check observation 3>"
-                    ]
-                }}
-            }}
-        }}
-        
-        IMPORTANT NOTES:
-        - Format the feedback as a short 2-sentence intro paragraph followed by 4-6 detailed bullet points
-        - Do NOT use asterisks (*) or any symbols at the beginning of points
-        - Ensure all improvement areas are specific, actionable, and tailored to this exact resume
-        - Industry insights MUST include up-to-date information and trends from {current_year}
-        - Use your internet search capability if needed to verify latest industry trends for {current_year}
-        - Include 2-3 ATS-specific optimization tips in the recommendations that reflect {current_year} trends
-        - All feedback should be constructive, specific, and directly relevant to the job
-        - Personalize all feedback to the candidate's experience level and role
-        - Provide detailed formatting checks focused on ATS compatibility and recruiter readability
-        - Make sure all industry insights reflect the latest hiring patterns and job market conditions
-        """
-
-        # Generate the response with timeout
+    Args:
+        resume_text: Extracted text from the resume
+        job_description: Job description text
+        cache_key: Cache key for the resume/job description pair
+
+    Returns:
+        Dict containing analysis results
+    """
+    # A previous flight may have finished between the cache check and now
+    cached_result = await _analysis_cache.get_async(cache_key)
+    if cached_result is not None:
+        return cached_result
+
+    resume_text, job_section, job_profile, scores = await _prepare_analysis_inputs(
+        resume_text, job_description
+    )
+    return await _generate_analysis(resume_text, job_section, job_profile, scores, cache_key)
+
+async def _generate_analysis(
+    resume_text: str,
+    job_section: str,
+    job_profile: Optional[Dict[str, Any]],
+    scores: Dict[str, Any],
+    cache_key: str,
+) -> Dict[str, Any]:
+    """
+    Call the model for one prepared analysis and cache a successful result
+
+    Args:
+        resume_text: Resume text, already compressed
+        job_section: Job profile or job description section
+        job_profile: Job profile used for the analysis, if any
+        scores: Local scores from score_resume
+        cache_key: Cache key for the resume/job description pair
+
+    Returns:
+        Dict containing analysis results
+    """
+    try:
+        model = _analysis_model()
+        prompt = _build_analysis_prompt(resume_text, job_section, scores)
+
+        # Generate the response with timeout, which includes any wait for
+        # the model scheduler
         response = await asyncio.wait_for(
-            model.generate_content_async(prompt),
-            timeout=50  # Increase to 50 second timeout to allow for web searches and detailed analysis
+            scheduled_call(
+                ANALYSIS_MODEL,
+                lambda: model.generate_content_async(prompt),
+                prompt_tokens=estimate_tokens(prompt),
+                max_output_tokens=ANALYSIS_MAX_OUTPUT_TOKENS,
+            ),
+            timeout=ANALYSIS_TIMEOUT_SECONDS
         )
         response_text = response.text
 
-        # Extract JSON from response
-        try:
-            # Try to parse the response as JSON directly
-            result = json.loads(response_text)
-        except json.JSONDecodeError:
-            # If direct parsing fails, try to extract JSON from the text
-            import re
-
-            json_match = re.search(
-                r"```json\s*(.*?)\s*```|```\s*(.*?)\s*```|{\s*\"match_score\".*}",
-                response_text,
-                re.DOTALL
-            )
-            if json_match:
-                json_str = json_match.group(1) or json_match.group(2) or json_match.group(0)
-                try:
-                    # Try again with cleaned JSON string
-                    json_str = json_str.strip()
-                    result = json.loads(json_str)
-                except json.JSONDecodeError as e:
-                    print(f"JSON decode error: {str(e)}")
-                    # Fallback to a default structure
-                    current_year = datetime.now().year
-                    result = create_default_analysis_result(current_year)
-            else:
-                # Fallback to a default structure
-                current_year = datetime.now().year
-                result = create_default_analysis_result(current_year)
-
-        # Ensure all required fields are present
-        required_fields = [
-            "match_score",
-            "feedback",
-            "skills_match",
-            "improvement_areas",
-            # Issue metrics fields
-            "searchability_issues",
-            "hard_skills_issues",
-            "soft_skills_issues",
-            "recruiter_tips_issues",
-            "formatting_issues",
-            # Keyword metrics fields
-            "keywords_match_percentage",
-            "experience_level_percentage",
-            "skills_relevance_percentage",
-            # Job title and industry insights
-            "job_title",
-            "industry_insights",
-            # Formatting checks
-            "formatting_checks"
-        ]
-        
-        for field in required_fields:
-            if field not in result:
-                if field == "match_score":
-                    result[field] = 0
-                elif field == "feedback":
-                    result[field] = "No specific feedback available."
-                elif field in ["skills_match", "improvement_areas"]:
-                    result[field] = []
-                elif field in ["keywords_match_percentage", "experience_level_percentage", "skills_relevance_percentage"]:
-                    result[field] = 0  # Ensure percentage fields have default values
-                elif field == "job_title":
-                    result[field] = "Unknown Position"
-                elif field == "industry_insights":
-                    current_year = datetime.now().year
-                    result[field] = {
-                        "industry": "General",
-                        "title": f"General Resume Recommendations for {current_year}",
-                        "current_year": current_year,
-                        "market_overview": f"The job market in {current_year} emphasizes digital skills and adaptability across all industries.",
-                        "recommendations": [
-                            f"Tailor your resume to match job descriptions",
-                            f"Quantify achievements with specific metrics",
-                            f"Use relevant keywords for ATS systems",
-                            f"Ensure your resume has a clean, professional format",
-                            f"Highlight your most relevant skills first"
-                        ]
-                    }
-                elif field == "formatting_checks":
-                    result[field] = create_default_formatting_checks()
-                else:
-                    # Default to 0 for all numeric metrics
-                    result[field] = 0
-        
-        # Validate numeric fields to ensure they are integers or can be converted to integers
-        numeric_fields = [
-            "match_score", 
-            "keywords_match_percentage", 
-            "experience_level_percentage", 
-            "skills_relevance_percentage",
-            "searchability_issues",
-            "hard_skills_issues",
-            "soft_skills_issues",
-            "recruiter_tips_issues",
-            "formatting_issues"
-        ]
-        
-        for field in numeric_fields:
-            try:
-                # Try to convert the value to an integer if it's not already
-                if not isinstance(result[field], (int, float)):
-                    result[field] = int(float(str(result[field]).strip()))
-            except (ValueError, TypeError):
-                # If conversion fails, set a default value
-                result[field] = 0
-                
-        # Ensure nested fields exist and have proper values
-        if "industry_insights" in result and isinstance(result["industry_insights"], dict):
-            if "recommendations" not in result["industry_insights"] or not isinstance(result["industry_insights"]["recommendations"], list):
-                result["industry_insights"]["recommendations"] = []
-                
-        # Ensure formatting_checks structure is valid
-        if "formatting_checks" in result:
-            for check_type in ["font_check", "layout_check", "page_setup_check"]:
-                if check_type not in result["formatting_checks"] or not isinstance(result["formatting_checks"][check_type], dict):
-                    result["formatting_checks"][check_type] = {"passed": True, "details": []}
-                if "details" not in result["formatting_checks"][check_type] or not isinstance(result["formatting_checks"][check_type]["details"], list):
-                    result["formatting_checks"][check_type]["details"] = []
-                if "passed" not in result["formatting_checks"][check_type]:
-                    result["formatting_checks"][check_type]["passed"] = True
-
-        # Limit the size of arrays to improve response time
-        if len(result.get("skills_match", [])) > 10:
-            result["skills_match"] = result["skills_match"][:10]
-            
-        if len(result.get("improvement_areas", [])) > 5:
-            result["improvement_areas"] = result["improvement_areas"][:5]
+        result = _parse_analysis_response(response_text)
+        result = _normalize_analysis_result(_apply_scores(result, scores), job_profile)
 
         # Cache the result
-        _analysis_cache[cache_key] = (result, datetime.now())
+        await _analysis_cache.set_async(cache_key, result)
         
         return result
 
     except asyncio.TimeoutError:
         print("Analysis timed out")
-        return {
-            "match_score": 0,
-            "feedback": "Analysis timed out. Please try again with a shorter resume or job description.",
-            "skills_match": [],
-            "improvement_areas": ["Try simplifying your resume or job description."],
-            "formatting_checks": {
-                "font_check": {
-                    "passed": True,
-                    "details": [
-                        "Use standard fonts like Arial, Calibri, or Times New Roman for best ATS compatibility",
-                        "Keep font size between 10-12pt for body text",
-                        "Use consistent font styling throughout your resume"
-                    ]
-                },
-                "layout_check": {
-                    "passed": True,
-                    "details": [
-                        "Use a single-column layout for better ATS readability",
-                        "Avoid tables, text boxes, and complex formatting",
-                        "Use standard section headings like 'Experience' and 'Education'"
-                    ]
-                },
-                "page_setup_check": {
-                    "passed": True,
-                    "details": [
-                        "Use standard margins (0.5-1 inch)",
-                        "Save your resume as a PDF file",
-                        "Keep your resume to 1-2 pages maximum"
-                    ]
-                }
-            }
-        }
+        return _apply_scores(_timeout_analysis_result(), scores)
+    except ModelRateLimited as e:
+        print(str(e))
+        return _apply_scores(_rate_limited_analysis_result(), scores)
     except Exception as e:
         print(f"Error analyzing resume: {str(e)}")
-        return {
-            "match_score": 0,
-            "feedback": f"Error analyzing resume: {str(e)}",
-            "skills_match": [],
-            "improvement_areas": ["An error occurred during analysis."],
-            "formatting_checks": {
-                "font_check": {
-                    "passed": True,
-                    "details": [
-                        "Use standard fonts like Arial, Calibri, or Times New Roman for best ATS compatibility",
-                        "Keep font size between 10-12pt for body text",
-                        "Use consistent font styling throughout your resume"
-                    ]
-                },
-                "layout_check": {
-                    "passed": True,
-                    "details": [
-                        "Use a single-column layout for better ATS readability",
-                        "Avoid tables, text boxes, and complex formatting",
-                        "Use standard section headings like 'Experience' and 'Education'"
-                    ]
-                },
-                "page_setup_check": {
-                    "passed": True,
-                    "details": [
-                        "Use standard margins (0.5-1 inch)",
-                        "Save your resume as a PDF file",
-                        "Keep your resume to 1-2 pages maximum"
+        return _apply_scores(_error_analysis_result(e), scores)
+
+async def stream_analysis_with_gemini(
+    resume_text: str, job_description: str
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Analyze a resume against a job description, streaming progress events
+
+    Yields ``model_started`` once the model call is issued, a ``field`` event
+    for each top-level result field as soon as it can be parsed from the
+    partial model output, and finally a ``result`` event with the complete,
+    normalized analysis (the same shape analyze_resume_with_gemini returns).
+
+    Args:
+        resume_text: Extracted text from the resume
+        job_description: Job description text
+
+    Yields:
+        Dicts with an ``event`` name and ``data`` payload
+    """
+    with track_request_cost("analysis"):
+        async for event in _stream_analysis(resume_text, job_description):
+            yield event
+
+async def _stream_analysis(
+    resume_text: str, job_description: str
+) -> AsyncIterator[Dict[str, Any]]:
+    cache_key = _generate_cache_key(resume_text, job_description)
+    cached_result = await _analysis_cache.get_async(cache_key)
+    record_cache_lookup("analysis", cached_result is not None)
+    if cached_result is not None:
+        yield {"event": "result", "data": cached_result}
+        return
+
+    resume_text, job_section, job_profile, scores = await _prepare_analysis_inputs(
+        resume_text, job_description
+    )
+    if job_profile:
+        yield {"event": "job_profile", "data": {"job_title": job_profile["job_title"]}}
+
+    # Locally computed scores are final, so clients can render them right away
+    for field in SCORED_FIELDS + SKILL_FIELDS:
+        yield {"event": "field", "data": {"field": field, "value": scores[field]}}
+
+    try:
+        model = _analysis_model()
+        prompt = _build_analysis_prompt(resume_text, job_section, scores)
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + ANALYSIS_TIMEOUT_SECONDS
+
+        # The scheduler slot is held until the stream ends, and any wait for
+        # it counts against the deadline
+        async with model_slot(
+            ANALYSIS_MODEL, estimate_tokens(prompt), ANALYSIS_MAX_OUTPUT_TOKENS
+        ) as record_usage:
+            response = await asyncio.wait_for(
+                model.generate_content_async(prompt, stream=True),
+                timeout=max(deadline - loop.time(), 0)
+            )
+            yield {"event": "model_started", "data": {}}
+
+            parser = TolerantJSONParser(object_only=True)
+            response_text = ""
+            chunks = response.__aiter__()
+            chunk = None
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(
+                        chunks.__anext__(), timeout=max(deadline - loop.time(), 0)
+                    )
+                except StopAsyncIteration:
+                    break
+
+                response_text += chunk.text
+                for field, value in parser.feed(chunk.text):
+                    if field in STREAMED_FIELDS:
+                        yield {"event": "field", "data": {"field": field, "value": value}}
+            # The last chunk carries the usage of the whole response
+            record_usage(chunk, response_text)
+
+        result = _parse_analysis_response(response_text)
+        result = _normalize_analysis_result(_apply_scores(result, scores), job_profile)
+        await _analysis_cache.set_async(cache_key, result)
+        yield {"event": "result", "data": result}
+
+    except asyncio.TimeoutError:
+        print("Streaming analysis timed out")
+        yield {"event": "result", "data": _apply_scores(_timeout_analysis_result(), scores)}
+    except ModelRateLimited as e:
+        print(str(e))
+        yield {"event": "result", "data": _apply_scores(_rate_limited_analysis_result(), scores)}
+    except Exception as e:
+        print(f"Error streaming resume analysis: {str(e)}")
+        yield {"event": "result", "data": _apply_scores(_error_analysis_result(e), scores)}
+
+async def analyze_resume_against_jobs(
+    resume_text: str, job_descriptions: List[str]
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Analyze one resume against several job descriptions, yielding each
+    result as soon as it is ready
+
+    The resume is compressed once and every job's profile and local scores
+    are prepared concurrently. Jobs with short job sections are packed into
+    shared model requests that return one result per job; the rest, and any
+    job a packed response leaves out, are analyzed on their own. Identical
+    job descriptions share one analysis, and cached results come first.
+
+    Args:
+        resume_text: Extracted text from the resume
+        job_descriptions: Job description texts
+
+    Yields:
+        A ``result`` event per job description, in completion order, with its
+        ``index`` in job_descriptions and the analysis (the same shape
+        analyze_resume_with_gemini returns), then a ``done`` event with the
+        number of model requests made
+    """
+    with track_request_cost("multi_analysis"):
+        async for event in _analyze_resume_against_jobs(resume_text, job_descriptions):
+            yield event
+
+async def _analyze_resume_against_jobs(
+    resume_text: str, job_descriptions: List[str]
+) -> AsyncIterator[Dict[str, Any]]:
+    indexes_by_key: Dict[str, List[int]] = {}
+    for index, job_description in enumerate(job_descriptions):
+        indexes_by_key.setdefault(
+            _generate_cache_key(resume_text, job_description), []
+        ).append(index)
+
+    pending: List[Tuple[str, List[int]]] = []
+    for cache_key, indexes in indexes_by_key.items():
+        cached_result = await _analysis_cache.get_async(cache_key)
+        record_cache_lookup("analysis", cached_result is not None)
+        if cached_result is None:
+            pending.append((cache_key, indexes))
+            continue
+        for index in indexes:
+            yield {
+                "event": "result",
+                "data": {"index": index, "packed": False, "result": cached_result},
+            }
+
+    stats = {"model_requests": 0}
+    if pending:
+        compressed_resume = compress_resume(resume_text, RESUME_TOKEN_BUDGET)
+        prepared = await asyncio.gather(*(
+            _prepare_job_inputs(resume_text, job_descriptions[indexes[0]])
+            for _, indexes in pending
+        ))
+        jobs = [
+            {
+                "cache_key": cache_key,
+                "indexes": indexes,
+                "job_section": job_section,
+                "job_profile": job_profile,
+                "scores": scores,
+            }
+            for (cache_key, indexes), (job_section, job_profile, scores) in zip(pending, prepared)
+        ]
+
+        events: "asyncio.Queue[Tuple[Dict[str, Any], Dict[str, Any], bool]]" = asyncio.Queue()
+        slots = asyncio.Semaphore(MULTI_JOB_CONCURRENCY)
+        def report_failure(group: List[Dict[str, Any]], task: "asyncio.Task[None]") -> None:
+            # A group that fails outright still owes a result for each job;
+            # jobs it already answered are skipped below
+            if task.cancelled() or task.exception() is None:
+                return
+            error = task.exception()
+            print(f"Error analyzing job group: {str(error)}")
+            for job in group:
+                result = _apply_scores(_error_analysis_result(error), job["scores"])
+                events.put_nowait((job, result, False))
+
+        tasks = []
+        for group in _pack_jobs(jobs):
+            task = asyncio.create_task(
+                _analyze_job_group(compressed_resume, group, slots, events, stats)
+            )
+            task.add_done_callback(functools.partial(report_failure, group))
+            tasks.append(task)
+        try:
+            answered: Set[str] = set()
+            while len(answered) < len(jobs):
+                job, result, packed = await events.get()
+                if job["cache_key"] in answered:
+                    continue
+                answered.add(job["cache_key"])
+                for index in job["indexes"]:
+                    yield {
+                        "event": "result",
+                        "data": {"index": index, "packed": packed, "result": result},
+                    }
+        finally:
+            # The client went away or every job finished; stop any stragglers
+            for task in tasks:
+                task.cancel()
+
+    yield {"event": "done", "data": {"jobs": len(job_descriptions), **stats}}
+
+def _pack_jobs(jobs: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """
+    Group prepared jobs into model requests
+
+    Jobs whose section fits PACKED_JOB_TOKEN_LIMIT are packed in order, up to
+    MAX_PACKED_JOBS jobs and PACKED_JOBS_TOKEN_BUDGET section tokens per
+    group; every other job gets a group of its own.
+
+    Args:
+        jobs: Prepared jobs with a ``job_section``
+
+    Returns:
+        List of job groups
+    """
+    groups: List[List[Dict[str, Any]]] = []
+    current: List[Dict[str, Any]] = []
+    current_tokens = 0
+    for job in jobs:
+        tokens = estimate_tokens(job["job_section"])
+        if tokens > PACKED_JOB_TOKEN_LIMIT:
+            groups.append([job])
+            continue
+        if current and (len(current) >= MAX_PACKED_JOBS
+                        or current_tokens + tokens > PACKED_JOBS_TOKEN_BUDGET):
+            groups.append(current)
+            current, current_tokens = [], 0
+        current.append(job)
+        current_tokens += tokens
+    if current:
+        groups.append(current)
+    return groups
+
+async def _analyze_job_group(
+    resume_text: str,
+    group: List[Dict[str, Any]],
+    slots: asyncio.Semaphore,
+    events: "asyncio.Queue[Tuple[Dict[str, Any], Dict[str, Any], bool]]",
+    stats: Dict[str, int],
+) -> None:
+    """
+    Analyze a group of prepared jobs, putting (job, result, packed) on the
+    queue as each finishes
+    """
+    async with slots:
+        remaining = group
+        if len(group) > 1:
+            remaining = []
+            stats["model_requests"] += 1
+            results = await _run_packed_analysis(resume_text, group)
+            for job, result in zip(group, results):
+                if result is None:
+                    remaining.append(job)
+                    continue
+                await events.put((job, result, True))
+            if remaining:
+                print(f"Packed analysis returned {len(group) - len(remaining)} of "
+                      f"{len(group)} results; analyzing the rest separately")
+                record_retry(ANALYSIS_MODEL, "packed_incomplete", len(remaining))
+
+        async def analyze(job: Dict[str, Any]) -> None:
+            stats["model_requests"] += 1
+            # Identical concurrent requests await the same model call
+            result = await _inflight_analyses.do(
+                job["cache_key"],
+                lambda: _generate_analysis(
+                    resume_text, job["job_section"], job["job_profile"],
+                    job["scores"], job["cache_key"],
+                ),
+            )
+            await events.put((job, result, False))
+
+        await asyncio.gather(*(analyze(job) for job in remaining))
+
+async def _run_packed_analysis(
+    resume_text: str, group: List[Dict[str, Any]]
+) -> List[Optional[Dict[str, Any]]]:
+    """
+    Analyze a resume against a group of jobs in one model request and cache
+    each result
+
+    Args:
+        resume_text: Resume text, already compressed
+        group: Prepared jobs
+
+    Returns:
+        The normalized result for each job in order, or None for the jobs
+        the response left out
+    """
+    try:
+        model = _packed_analysis_model()
+        prompt = _build_packed_analysis_prompt(
+            resume_text, [(job["job_section"], job["scores"]) for job in group]
+        )
+        response = await asyncio.wait_for(
+            scheduled_call(
+                ANALYSIS_MODEL,
+                lambda: model.generate_content_async(prompt),
+                prompt_tokens=estimate_tokens(prompt),
+                max_output_tokens=PACKED_MAX_OUTPUT_TOKENS,
+            ),
+            timeout=PACKED_ANALYSIS_TIMEOUT_SECONDS
+        )
+        parsed = _parse_packed_analysis_response(response.text, len(group))
+    except asyncio.TimeoutError:
+        print("Packed analysis timed out")
+        return [_apply_scores(_timeout_analysis_result(), job["scores"]) for job in group]
+    except ModelRateLimited as e:
+        print(str(e))
+        return [_apply_scores(_rate_limited_analysis_result(), job["scores"]) for job in group]
+    except Exception as e:
+        print(f"Error in packed resume analysis: {str(e)}")
+        return [None] * len(group)
+
+    results: List[Optional[Dict[str, Any]]] = []
+    for job, result in zip(group, parsed):
+        if result is not None:
+            result = _normalize_analysis_result(
+                _apply_scores(result, job["scores"]), job["job_profile"]
+            )
+            await _analysis_cache.set_async(job["cache_key"], result)
+        results.append(result)
+    return results
+
+async def _prepare_analysis_inputs(
+    resume_text: str, job_description: str
+) -> Tuple[str, str, Optional[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Prepare the resume text, job section and local scores for the analysis prompt
+
+    Args:
+        resume_text: Extracted text from the resume
+        job_description: Job description text
+
+    Returns:
+        Tuple of (resume text, job section for the prompt, job profile or None,
+        local scores)
+    """
+    job_section, job_profile, scores = await _prepare_job_inputs(resume_text, job_description)
+
+    # Compress long texts to the token budget by section priority, so skills
+    # and experience survive even when they come late in the document
+    resume_text = compress_resume(resume_text, RESUME_TOKEN_BUDGET)
+
+    return resume_text, job_section, job_profile, scores
+
+async def _prepare_job_inputs(
+    resume_text: str, job_description: str
+) -> Tuple[str, Optional[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Prepare the job section and local scores for one job description
+
+    Args:
+        resume_text: Extracted text from the resume, uncompressed
+        job_description: Job description text
+
+    Returns:
+        Tuple of (job section for the prompt, job profile or None, local scores)
+    """
+    # Use the cached compact job profile instead of the raw job description
+    # when available; it is shared across every resume checked against the JD
+    job_profile = await get_job_profile(job_description)
+
+    # Scores are computed locally from the full texts, so the model only
+    # writes the prose. Text similarity is a model-free signal of how close
+    # the resume reads to the posting, and stands in for the components the
+    # job description gives too little to score.
+    semantic_score = similarity_score(cosine_similarity(resume_text, job_description))
+    scores = score_resume(resume_text, job_description, job_profile, semantic_score)
+
+    if job_profile:
+        job_section = (
+            "JOB PROFILE (pre-analyzed from the job description):\n"
+            f"{format_job_profile(job_profile)}"
+        )
+    else:
+        job_description = compress_job_description(job_description, JOB_DESCRIPTION_TOKEN_BUDGET)
+        job_section = f"JOB DESCRIPTION:\n{job_description}"
+
+    return job_section, job_profile, scores
+
+def _apply_scores(result: Dict[str, Any], scores: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Set the locally computed scores and matched skills on an analysis result
+
+    Args:
+        result: Analysis result from the model or a fallback
+        scores: Local scores from score_resume
+
+    Returns:
+        The analysis result
+    """
+    for field in SCORED_FIELDS + SKILL_FIELDS:
+        result[field] = scores[field]
+    return result
+
+def _analysis_model():
+    """Create the Gemini model used for resume analysis"""
+    # Configure the model with optimized settings
+    generation_config = {
+        "temperature": 0.1,  # Lower temperature for more deterministic results
+        "top_p": 0.7,
+        "top_k": 20,
+        "max_output_tokens": ANALYSIS_MAX_OUTPUT_TOKENS,  # Reduced token limit for faster response
+    }
+    
+    # Built once per process and shared, along with its warm channel
+    return get_model(ANALYSIS_MODEL, generation_config)
+
+def _packed_analysis_model():
+    """Create the Gemini model used for packed multi-job analyses"""
+    generation_config = {
+        "temperature": 0.1,
+        "top_p": 0.7,
+        "top_k": 20,
+        # Room for one full result per packed job
+        "max_output_tokens": PACKED_MAX_OUTPUT_TOKENS,
+    }
+    return get_model(ANALYSIS_MODEL, generation_config)
+
+async def prewarm_analysis_models() -> Dict[str, Optional[float]]:
+    """
+    Build the analysis and job profile models and pre-connect their channel
+
+    Returns:
+        Dict mapping model name to warm-up round-trip time, or None on failure
+    """
+    return await warm_up_models([_analysis_model(), job_profile_model()])
+
+def _build_analysis_prompt(resume_text: str, job_section: str, scores: Dict[str, Any]) -> str:
+    """
+    Build the resume analysis prompt
+
+    Args:
+        resume_text: Resume text, already compressed
+        job_section: Job profile or job description section
+        scores: Local scores from score_resume, given to the model as context
+
+    Returns:
+        The prompt text
+    """
+    # Get current year for industry insights
+    current_year = datetime.now().year
+
+    # Create a more structured and efficient prompt
+    prompt = f"""
+    You are an expert resume analyzer for job applications.
+    Analyze this resume against the job description.
+    
+    INSTRUCTIONS:
+    {_analysis_instructions(current_year)}
+    
+    RESUME:
+    {resume_text}
+    
+    {job_section}
+    
+    PRE-COMPUTED SCORES:
+    {_score_section(scores)}
+    
+    Respond with ONLY a JSON object in this exact format:
+    {{
+{_response_fields(current_year)}
+    }}
+    
+    IMPORTANT NOTES:
+    {_analysis_notes(current_year)}
+    """
+
+    return prompt
+
+def _build_packed_analysis_prompt(
+    resume_text: str, jobs: List[Tuple[str, Dict[str, Any]]]
+) -> str:
+    """
+    Build a prompt analyzing one resume against several jobs in one request
+
+    The resume appears once, followed by a numbered section per job, and the
+    model answers with one result per job in the single-analysis format.
+
+    Args:
+        resume_text: Resume text, already compressed
+        jobs: (job section, local scores) for each job, in order
+
+    Returns:
+        The prompt text
+    """
+    current_year = datetime.now().year
+
+    job_sections = "\n    \n    ".join(
+        f"JOB {number}:\n{job_section}\n    \n    "
+        f"PRE-COMPUTED SCORES FOR JOB {number}:\n{_score_section(scores)}"
+        for number, (job_section, scores) in enumerate(jobs, 1)
+    )
+
+    prompt = f"""
+    You are an expert resume analyzer for job applications.
+    Analyze this resume separately against each of the {len(jobs)} jobs below.
+    
+    INSTRUCTIONS (apply them to each job on its own):
+    {_analysis_instructions(current_year)}
+    
+    RESUME:
+    {resume_text}
+    
+    {job_sections}
+    
+    Respond with ONLY a JSON object holding exactly {len(jobs)} results, one per job,
+    in this exact format:
+    {{
+        "results": [
+            {{
+                "job_index": <number of the job this result is for, 1 to {len(jobs)}>,
+{_response_fields(current_year, indent=8)}
+            }},
+            ...
+        ]
+    }}
+    
+    IMPORTANT NOTES:
+    {_analysis_notes(current_year)}
+    - Analyze each job independently; never carry feedback from one job over to another
+    """
+
+    return prompt
+
+def _score_section(scores: Dict[str, Any]) -> str:
+    """Format local scores from score_resume for the prompt"""
+    components = scores["score_components"]
+    return "\n".join([
+        f"Overall match: {scores['match_score']}/100",
+        f"Keyword match: {components['keywords']}%, experience level: {components['experience']}%, "
+        f"skills: {components['skills']}%, title relevance: {components['title']}%, "
+        f"domain: {components['domain']}%, education: {components['education']}%",
+        f"Text similarity to the job description: {scores['semantic_similarity']}%",
+        f"Years of experience: {scores['years_of_experience']:g}",
+        f"Matched skills: {', '.join(scores['skills_match']) or 'none'}",
+        f"Missing skills: {', '.join(scores['missing_skills']) or 'none'}",
+        f"Missing soft skills: {', '.join(scores['missing_soft_skills']) or 'none'}",
+    ])
+
+def _analysis_instructions(current_year: int) -> str:
+    """Numbered analysis instructions shared by the single and packed prompts"""
+    return f"""1. Analyze the resume content and job description thoroughly
+    2. Extract the job title from the job description
+    3. Use the pre-computed scores below as the basis of your feedback; do not re-score the resume
+    4. Provide personalized and specific improvement areas tailored to this exact resume and job
+    5. Create industry-specific insights based on LATEST industry trends and best practices
+       for {current_year}
+    6. Include specific job market trends and hiring patterns that are current for {current_year}
+    7. Pay special attention to Applicant Tracking System (ATS) optimization techniques
+    8. Analyze the resume formatting for ATS compatibility and readability
+    9. Provide specific feedback on font, layout, and page setup
+    10. Conduct brief web research if needed to ensure industry insights are current"""
+
+def _response_fields(current_year: int, indent: int = 0) -> str:
+    """Fields of one analysis result in the response format, indented by ``indent`` spaces"""
+    feedback = (
+        "<begin with a 2-sentence introduction summary followed by "
+        "4-6 specific detailed points as complete sentences>"
+    )
+    fields = f"""        "feedback": "{feedback}",
+        "improvement_areas": ["<specific suggestion1>", "<specific suggestion2>", ...],
+        "job_title": "<extracted job title>",
+        "industry_insights": {{
+            "industry": "<industry name>",
+            "title": "<industry title for {current_year}>",
+            "current_year": {current_year},
+            "market_overview": "<1-2 sentence market overview for this industry in {current_year}>",
+            "recommendations": [
+                "<actionable industry recommendation 1 with {current_year} trends>",
+                "<actionable industry recommendation 2 with {current_year} trends>",
+                "<actionable industry recommendation 3 with {current_year} trends>",
+                "<actionable industry recommendation 4 with {current_year} trends>",
+                "<actionable industry recommendation 5 with focus on ATS and {current_year} trends>"
+            ]
+        }},
+        "formatting_checks": {{
+            "font_check": {{
+                "passed": <boolean true/false>,
+                "details": [
+                    "<specific font check observation 1>",
+                    "<specific font check observation 2>",
+                    "<specific font check observation 3>"
+                ]
+            }},
+            "layout_check": {{
+                "passed": <boolean true/false>,
+                "details": [
+                    "<specific layout check observation 1>",
+                    "<specific layout check observation 2>",
+                    "<specific layout check observation 3>"
+                ]
+            }},
+            "page_setup_check": {{
+                "passed": <boolean true/false>,
+                "details": [
+                    "<specific page setup check observation 1>",
+                    "<specific page setup check observation 2>",
+                    "<specific page setup check observation 3>"
+                ]
+            }}
+        }}"""
+    if indent:
+        fields = "\n".join(" " * indent + line for line in fields.split("\n"))
+    return fields
+
+def _analysis_notes(current_year: int) -> str:
+    """Closing notes shared by the single and packed prompts"""
+    return f"""- Format the feedback as a short 2-sentence intro paragraph followed by 4-6
+      detailed bullet points
+    - Do NOT use asterisks (*) or any symbols at the beginning of points
+    - Ensure all improvement areas are specific, actionable, and tailored to this exact resume
+    - Industry insights MUST include up-to-date information and trends from {current_year}
+    - Use your internet search capability if needed to verify latest industry trends
+      for {current_year}
+    - Include 2-3 ATS-specific optimization tips in the recommendations that reflect
+      {current_year} trends
+    - All feedback should be constructive, specific, and directly relevant to the job
+    - Personalize all feedback to the candidate's experience level and role
+    - Provide detailed formatting checks focused on ATS compatibility and recruiter readability
+    - Make sure all industry insights reflect the latest hiring patterns and job market
+      conditions"""
+
+def _parse_analysis_response(response_text: str) -> Dict[str, Any]:
+    """
+    Extract the analysis JSON from the model response
+
+    Args:
+        response_text: Raw model response
+
+    Returns:
+        Dict parsed from the response, or the default analysis result
+    """
+    # Extract and repair the JSON in a single linear-time pass
+    result = parse_json_object(response_text)
+    if result is None:
+        print("Could not parse analysis JSON from model response")
+        record_parse_failure(ANALYSIS_MODEL)
+        # Fallback to a default structure
+        current_year = datetime.now().year
+        result = create_default_analysis_result(current_year)
+
+    return result
+
+def _parse_packed_analysis_response(
+    response_text: str, count: int
+) -> List[Optional[Dict[str, Any]]]:
+    """
+    Extract the per-job results from a packed analysis response
+
+    Args:
+        response_text: Raw model response
+        count: Number of jobs in the request
+
+    Returns:
+        The parsed result for each job in order, or None for the jobs
+        missing from the response
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * count
+    parsed = parse_json_object(response_text)
+    entries = parsed.get("results") if parsed else None
+    if not isinstance(entries, list):
+        print("Could not parse packed analysis JSON from model response")
+        record_parse_failure(ANALYSIS_MODEL)
+        return results
+
+    for position, entry in enumerate(entries):
+        if not isinstance(entry, dict):
+            continue
+        job_index = entry.pop("job_index", None)
+        # Trust the job number the model gave, then the entry's position
+        if not (isinstance(job_index, int) and 1 <= job_index <= count
+                and results[job_index - 1] is None):
+            job_index = position + 1
+        if job_index <= count and results[job_index - 1] is None:
+            results[job_index - 1] = entry
+    return results
+
+def _normalize_analysis_result(
+    result: Dict[str, Any], job_profile: Optional[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    Fill in missing fields and coerce types in a parsed analysis result
+
+    Args:
+        result: Parsed analysis result
+        job_profile: Job profile used for the analysis, if any
+
+    Returns:
+        The normalized analysis result
+    """
+    # The job title extracted by the job profile stage is authoritative
+    if job_profile and not result.get("job_title"):
+        result["job_title"] = job_profile["job_title"]
+
+    # Ensure all required fields are present
+    required_fields = [
+        "match_score",
+        "feedback",
+        "skills_match",
+        "improvement_areas",
+        # Issue metrics fields
+        "searchability_issues",
+        "hard_skills_issues",
+        "soft_skills_issues",
+        "recruiter_tips_issues",
+        "formatting_issues",
+        # Keyword metrics fields
+        "keywords_match_percentage",
+        "experience_level_percentage",
+        "skills_relevance_percentage",
+        # Job title and industry insights
+        "job_title",
+        "industry_insights",
+        # Formatting checks
+        "formatting_checks"
+    ]
+    
+    for field in required_fields:
+        if field not in result:
+            if field == "match_score":
+                result[field] = 0
+            elif field == "feedback":
+                result[field] = "No specific feedback available."
+            elif field in ["skills_match", "improvement_areas"]:
+                result[field] = []
+            elif field in [
+                "keywords_match_percentage",
+                "experience_level_percentage",
+                "skills_relevance_percentage",
+            ]:
+                result[field] = 0  # Ensure percentage fields have default values
+            elif field == "job_title":
+                result[field] = "Unknown Position"
+            elif field == "industry_insights":
+                current_year = datetime.now().year
+                result[field] = {
+                    "industry": "General",
+                    "title": f"General Resume Recommendations for {current_year}",
+                    "current_year": current_year,
+                    "market_overview": (
+                        f"The job market in {current_year} emphasizes digital skills "
+                        "and adaptability across all industries."
+                    ),
+                    "recommendations": [
+                        f"Tailor your resume to match job descriptions",
+                        f"Quantify achievements with specific metrics",
+                        f"Use relevant keywords for ATS systems",
+                        f"Ensure your resume has a clean, professional format",
+                        f"Highlight your most relevant skills first"
                     ]
                 }
-            }
-        }
+            elif field == "formatting_checks":
+                result[field] = create_default_formatting_checks()
+            else:
+                # Default to 0 for all numeric metrics
+                result[field] = 0
+    
+    # Validate numeric fields to ensure they are integers or can be converted to integers
+    numeric_fields = [
+        "match_score", 
+        "keywords_match_percentage", 
+        "experience_level_percentage", 
+        "skills_relevance_percentage",
+        "searchability_issues",
+        "hard_skills_issues",
+        "soft_skills_issues",
+        "recruiter_tips_issues",
+        "formatting_issues"
+    ]
+    
+    for field in numeric_fields:
+        try:
+            # Try to convert the value to an integer if it's not already
+            if not isinstance(result[field], (int, float)):
+                result[field] = int(float(str(result[field]).strip()))
+        except (ValueError, TypeError):
+            # If conversion fails, set a default value
+            result[field] = 0
+            
+    # Ensure nested fields exist and have proper values
+    if "industry_insights" in result and isinstance(result["industry_insights"], dict):
+        insights = result["industry_insights"]
+        if not isinstance(insights.get("recommendations"), list):
+            insights["recommendations"] = []
+            
+    # Ensure formatting_checks structure is valid
+    if "formatting_checks" in result:
+        checks = result["formatting_checks"]
+        for check_type in ["font_check", "layout_check", "page_setup_check"]:
+            if not isinstance(checks.get(check_type), dict):
+                checks[check_type] = {"passed": True, "details": []}
+            if not isinstance(checks[check_type].get("details"), list):
+                checks[check_type]["details"] = []
+            if "passed" not in result["formatting_checks"][check_type]:
+                result["formatting_checks"][check_type]["passed"] = True
+
+    # Limit the size of arrays to improve response time
+    if len(result.get("skills_match", [])) > 10:
+        result["skills_match"] = result["skills_match"][:10]
+        
+    if len(result.get("improvement_areas", [])) > 5:
+        result["improvement_areas"] = result["improvement_areas"][:5]
+
+    return result
+
+def _failed_analysis_result(feedback: str, improvement_area: str) -> Dict[str, Any]:
+    """Create the minimal result returned when an analysis fails"""
+    return {
+        "match_score": 0,
+        "feedback": feedback,
+        "skills_match": [],
+        "improvement_areas": [improvement_area],
+        "formatting_checks": create_default_formatting_checks()
+    }
+
+def _timeout_analysis_result() -> Dict[str, Any]:
+    return _failed_analysis_result(
+        "Analysis timed out. Please try again with a shorter resume or job description.",
+        "Try simplifying your resume or job description."
+    )
+
+def _rate_limited_analysis_result() -> Dict[str, Any]:
+    return _failed_analysis_result(
+        "The analysis service is busy right now. Please try again in a minute.",
+        "Try again shortly."
+    )
+
+def _error_analysis_result(error: Exception) -> Dict[str, Any]:
+    return _failed_analysis_result(
+        f"Error analyzing resume: {str(error)}",
+        "An error occurred during analysis."
+    )
 
 # Helper function to create default formatting checks
 def create_default_formatting_checks():
@@ -0,0 +1,404 @@
+import asyncio
+import contextlib
+import hashlib
+import json
+import mmap
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+import zlib
+from typing import Any, Dict, Iterator, List, Optional, Set, Union
+from .executors import run_cpu, run_io
+from .model_telemetry import record_cache_lookup
+from .pdf_parser import extract_pdf_document
+from .resume_compressor import segment_sections
+from .singleflight import SingleFlight
+from .skill_taxonomy import get_skill_taxonomy
+
+# Bump when extraction, cleaning or the derived fields change, so profiles
+# parsed by older code are not served again
+RESUME_PROFILE_VERSION = 1
+
+# Host-local store of parsed resumes; an empty path disables it
+RESUME_CACHE_DB_PATH = os.getenv(
+    "RESUME_CACHE_DB_PATH",
+    os.path.join(tempfile.gettempdir(), "naukriguru", "resume_cache.sqlite3"),
+)
+
+# Compressed bytes kept on disk before the least recently used profiles are evicted
+RESUME_CACHE_MAX_BYTES = int(os.getenv("RESUME_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# Optional tier shared across hosts: "storage" keeps profiles in the Cloud
+# Storage bucket next to the uploads, "" keeps them on this host only
+RESUME_CACHE_REMOTE = os.getenv("RESUME_CACHE_REMOTE", "").lower()
+RESUME_CACHE_REMOTE_PREFIX = "resume_cache"
+
+
+def pdf_fingerprint(pdf: Union[bytes, str]) -> str:
+    """
+    Get the content address of a PDF
+
+    Args:
+        pdf: PDF file content, or the path of a spooled upload
+
+    Returns:
+        Hex SHA-256 of the content
+    """
+    if isinstance(pdf, str):
+        with open(pdf, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return hashlib.sha256(mapped).hexdigest()
+    return hashlib.sha256(pdf).hexdigest()
+
+
+def _encode(profile: Dict[str, Any]) -> bytes:
+    return zlib.compress(json.dumps(profile, separators=(",", ":"), default=str).encode("utf-8"))
+
+
+def _decode(blob: bytes) -> Dict[str, Any]:
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+class ResumeProfileStore:
+    """
+    Host-local store of parsed resumes, keyed by PDF content hash
+
+    Profiles are kept zlib-compressed in a SQLite file in WAL mode, shared by
+    every worker on the host and kept across restarts. Once the compressed
+    size passes max_bytes, the least recently read profiles are evicted.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.errors = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS resume_profiles (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_resume_profiles_last_used "
+            "ON resume_profiles (last_used)"
+        )
+        conn.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a stored profile, marking it as recently used
+
+        Args:
+            key: Cache key
+
+        Returns:
+            The profile, or None if missing
+        """
+        try:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT value FROM resume_profiles WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            conn.execute(
+                "UPDATE resume_profiles SET last_used = ? WHERE key = ?", (time.time(), key)
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            self.errors += 1
+            print(f"Error reading resume cache: {str(e)}")
+            return None
+
+        self.hits += 1
+        return _decode(row[0])
+
+    def set(self, key: str, blob: bytes) -> None:
+        """
+        Store a compressed profile and evict old ones past the size limit
+
+        Args:
+            key: Cache key
+            blob: Profile as encoded by _encode
+        """
+        try:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO resume_profiles (key, value, size, last_used) "
+                "VALUES (?, ?, ?, ?)",
+                (key, blob, len(blob), time.time()),
+            )
+            conn.commit()
+            self._evict(conn)
+        except sqlite3.Error as e:
+            self.errors += 1
+            print(f"Error writing resume cache: {str(e)}")
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM resume_profiles").fetchone()[0]
+        excess = total - self.max_bytes
+        if excess <= 0:
+            return
+
+        victims: List[str] = []
+        for key, size in conn.execute(
+            "SELECT key, size FROM resume_profiles ORDER BY last_used"
+        ):
+            victims.append(key)
+            excess -= size
+            if excess <= 0:
+                break
+        conn.executemany("DELETE FROM resume_profiles WHERE key = ?", [(key,) for key in victims])
+        conn.commit()
+        self.evictions += len(victims)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get store statistics
+
+        Returns:
+            Dict containing entry count, stored bytes and hit/miss/eviction/error counters
+        """
+        try:
+            entries, size = self._connection().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM resume_profiles"
+            ).fetchone()
+        except sqlite3.Error:
+            entries = size = None
+        return {
+            "path": self.path,
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "errors": self.errors,
+        }
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+        return conn
+
+
+def create_resume_profile_store() -> Optional[ResumeProfileStore]:
+    """
+    Create the host-local resume profile store configured from environment variables
+
+    Returns:
+        ResumeProfileStore, or None if disabled or unavailable
+    """
+    if not RESUME_CACHE_DB_PATH:
+        return None
+    try:
+        return ResumeProfileStore(RESUME_CACHE_DB_PATH, RESUME_CACHE_MAX_BYTES)
+    except (sqlite3.Error, OSError) as e:
+        print(f"Error initializing resume cache: {str(e)}")
+        return None
+
+
+def _remote_path(key: str) -> str:
+    return f"{RESUME_CACHE_REMOTE_PREFIX}/{key}.json.z"
+
+
+def _get_remote(key: str) -> Optional[Dict[str, Any]]:
+    """Get a profile from the shared Storage tier, if enabled"""
+    if RESUME_CACHE_REMOTE != "storage":
+        return None
+    from .firebase_admin import bucket
+
+    if not bucket:
+        return None
+    try:
+        return _decode(bucket.blob(_remote_path(key)).download_as_bytes())
+    except Exception:
+        # Most often the profile isn't there yet
+        return None
+
+
+def _set_remote(key: str, blob: bytes) -> None:
+    """Store a profile in the shared Storage tier, if enabled"""
+    if RESUME_CACHE_REMOTE != "storage":
+        return
+    from .firebase_admin import bucket
+
+    if not bucket:
+        return
+    try:
+        bucket.blob(_remote_path(key)).upload_from_string(
+            blob, content_type="application/octet-stream"
+        )
+    except Exception as e:
+        print(f"Error writing resume cache to Storage: {str(e)}")
+
+
+def build_resume_profile(pdf: Union[bytes, str]) -> Dict[str, Any]:
+    """
+    Parse a PDF into a resume profile
+
+    Args:
+        pdf: PDF file content, or the path of a spooled upload
+
+    Returns:
+        Dict with the cleaned text, whether any text was extracted, page
+        count, PDF metadata, word count, sections (title, category and span
+        in the text) and canonical skill IDs
+    """
+    document = extract_pdf_document(pdf)
+    text = document["text"]
+    profile = {
+        "version": RESUME_PROFILE_VERSION,
+        "text": text,
+        "extracted": document["extracted"],
+        "page_count": document["page_count"],
+        "metadata": {name: str(value) for name, value in document["metadata"].items()},
+        "words": 0,
+        "sections": [],
+        "skill_ids": [],
+    }
+    if document["extracted"]:
+        profile["words"] = len(text.split())
+        profile["sections"] = [
+            {
+                "title": section.title,
+                "category": section.category,
+                "start": section.start,
+                "end": section.end,
+            }
+            for section in segment_sections(text)
+        ]
+        profile["skill_ids"] = get_skill_taxonomy().find_ids(text)
+    return profile
+
+
+_store = create_resume_profile_store()
+_inflight_profiles = SingleFlight()
+_remote_writes: Set["asyncio.Future[None]"] = set()
+
+
+async def get_resume_profile(
+    pdf: Union[bytes, str], fingerprint: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Get the parsed profile of a PDF, parsing it only if no cache tier has it
+
+    Lookups go to the host-local store, then the shared Storage tier when
+    enabled; a parsed profile is written back to both. Concurrent uploads of
+    the same file share one parse. PDFs without extractable text are not
+    cached.
+
+    Args:
+        pdf: PDF file content, or the path of a spooled upload
+        fingerprint: pdf_fingerprint of the content, if already computed
+
+    Returns:
+        Profile as built by build_resume_profile, with "cached" set when it
+        came from a cache tier
+    """
+    if fingerprint is None:
+        fingerprint = await run_cpu(pdf_fingerprint, pdf)
+    key = f"v{RESUME_PROFILE_VERSION}/{fingerprint}"
+    return await _inflight_profiles.do(key, lambda: _load_resume_profile(key, pdf))
+
+
+@contextlib.contextmanager
+def _own_link(pdf: Union[bytes, str]) -> Iterator[Union[bytes, str]]:
+    """
+    Give a shared parse its own hard link to a spooled upload
+
+    The request whose upload started a parse may close it, deleting the
+    file, while other requests are still waiting on the parse. The link
+    keeps the content on disk until the parse is done, without copying it.
+    """
+    if not isinstance(pdf, str):
+        yield pdf
+        return
+    link = f"{pdf}.{uuid.uuid4().hex[:8]}"
+    try:
+        os.link(pdf, link)
+    except OSError as e:
+        print(f"Error linking spooled resume, parsing it in place: {str(e)}")
+        yield pdf
+        return
+    try:
+        yield link
+    finally:
+        with contextlib.suppress(OSError):
+            os.unlink(link)
+
+
+async def _load_resume_profile(key: str, pdf: Union[bytes, str]) -> Dict[str, Any]:
+    # Linked before the first await, so before the caller can close the upload
+    with _own_link(pdf) as source:
+        return await _lookup_or_build_profile(key, source)
+
+
+async def _lookup_or_build_profile(key: str, pdf: Union[bytes, str]) -> Dict[str, Any]:
+    profile = await run_io(_store.get, key) if _store is not None else None
+    if profile is None and RESUME_CACHE_REMOTE:
+        profile = await run_io(_get_remote, key)
+        if profile is not None and _store is not None:
+            await run_io(_store.set, key, _encode(profile))
+    record_cache_lookup("resume_profile", profile is not None)
+    if profile is not None:
+        return {**profile, "cached": True}
+
+    profile = await run_cpu(build_resume_profile, pdf)
+    if profile["extracted"]:
+        blob = _encode(profile)
+        if _store is not None:
+            await run_io(_store.set, key, blob)
+        if RESUME_CACHE_REMOTE:
+            # The caller doesn't need to wait for the shared copy
+            task = asyncio.ensure_future(run_io(_set_remote, key, blob))
+            _remote_writes.add(task)
+            task.add_done_callback(_remote_writes.discard)
+    return {**profile, "cached": False}
+
+
+async def extract_resume_text(pdf: Union[bytes, str], fingerprint: Optional[str] = None) -> str:
+    """
+    Get the extracted text of a PDF, from the resume cache when it has been parsed before
+
+    Args:
+        pdf: PDF file content, or the path of a spooled upload
+        fingerprint: pdf_fingerprint of the content, if already computed
+
+    Returns:
+        str: Extracted text, or a message saying why none was
+    """
+    return (await get_resume_profile(pdf, fingerprint))["text"]
+
+
+def resume_cache_stats() -> Dict[str, Any]:
+    """Get resume profile cache statistics"""
+    return {
+        "store": _store.stats() if _store is not None else None,
+        "remote": RESUME_CACHE_REMOTE or None,
+        "single_flight": _inflight_profiles.stats(),
+    }
@@ -0,0 +1,336 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+# Section name -> (category, priority). Lower priority values are kept first
+# when the token budget is tight.
+RESUME_SECTIONS: Dict[str, Tuple[str, int]] = {
+    "technical skills": ("skills", 0),
+    "core competencies": ("skills", 0),
+    "key skills": ("skills", 0),
+    "skills": ("skills", 0),
+    "tools and technologies": ("skills", 0),
+    "technologies": ("skills", 0),
+    "professional experience": ("experience", 1),
+    "work experience": ("experience", 1),
+    "employment history": ("experience", 1),
+    "experience": ("experience", 1),
+    "internships": ("experience", 1),
+    "professional summary": ("summary", 2),
+    "career objective": ("summary", 2),
+    "summary": ("summary", 2),
+    "objective": ("summary", 2),
+    "profile": ("summary", 2),
+    "education": ("education", 3),
+    "academic qualifications": ("education", 3),
+    "qualifications": ("education", 3),
+    "certifications": ("certifications", 4),
+    "certificates": ("certifications", 4),
+    "licenses": ("certifications", 4),
+    "projects": ("projects", 5),
+    "key projects": ("projects", 5),
+    "achievements": ("achievements", 6),
+    "awards": ("achievements", 6),
+    "publications": ("achievements", 6),
+    "languages": ("other", 8),
+    "hobbies": ("other", 9),
+    "interests": ("other", 9),
+    "personal details": ("other", 9),
+    "declaration": ("other", 9),
+    "references": ("other", 9),
+}
+
+JOB_DESCRIPTION_SECTIONS: Dict[str, Tuple[str, int]] = {
+    "requirements": ("requirements", 0),
+    "qualifications": ("requirements", 0),
+    "required skills": ("requirements", 0),
+    "skills": ("requirements", 0),
+    "must have": ("requirements", 0),
+    "what you'll need": ("requirements", 0),
+    "responsibilities": ("responsibilities", 1),
+    "key responsibilities": ("responsibilities", 1),
+    "what you'll do": ("responsibilities", 1),
+    "job description": ("responsibilities", 1),
+    "nice to have": ("preferred", 2),
+    "preferred qualifications": ("preferred", 2),
+    "good to have": ("preferred", 2),
+    "about the role": ("summary", 2),
+    "about the company": ("company", 8),
+    "about us": ("company", 8),
+    "benefits": ("company", 9),
+    "perks": ("company", 9),
+    "equal opportunity": ("company", 9),
+}
+
+# Text before the first recognised header (name, contact details, headline)
+PREAMBLE_PRIORITY = 2
+PREAMBLE = "preamble"
+
+# Line breaks, sentence ends, bullets and dash-separated clauses (but not date
+# ranges such as "Jan 2021 - Present")
+_UNIT_SPLIT = re.compile(
+    r"\n+|(?<=[.!?;])\s+(?=[A-Z0-9])|\s*[•▪●◦■►]\s*|(?<=[^\d\s])\s+[-–]\s+(?=[A-Z])"
+)
+_PAGE_MARKER = re.compile(r"^(page\s*\d+(\s*(of|/)\s*\d+)?|\d+\s*/\s*\d+)$", re.IGNORECASE)
+_INLINE_PAGE_MARKER = re.compile(r"\bpage\s*\d+\s*(of|/)\s*\d+\b", re.IGNORECASE)
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+_header_patterns: Dict[int, "re.Pattern[str]"] = {}
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of model tokens in a text without a tokenizer
+
+    Words count as one token plus one per further five characters, and each
+    punctuation mark as one token, which tracks SentencePiece/BPE counts for
+    English resume text closely enough for budgeting.
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        int: Estimated token count
+    """
+    return sum(1 + (len(token) - 1) // 5 for token in _TOKEN.findall(text))
+
+
+class Section:
+    """A titled run of text units within a document"""
+
+    def __init__(self, title: str, category: str, priority: int, start: int = 0, end: int = 0):
+        self.title = title
+        self.category = category
+        self.priority = priority
+        # Span of the section body in the source text
+        self.start = start
+        self.end = end
+        self.units: List[str] = []
+
+    @property
+    def heading(self) -> str:
+        """The title as rendered before the section's units"""
+        return f"{self.title}:" if self.title else ""
+
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.heading) + sum(estimate_tokens(unit) for unit in self.units)
+
+
+def _header_pattern(headers: Dict[str, Tuple[str, int]]) -> "re.Pattern[str]":
+    pattern = _header_patterns.get(id(headers))
+    if pattern is None:
+        # Longest names first so "work experience" wins over "experience"
+        names = sorted(headers, key=len, reverse=True)
+        alternation = "|".join(re.escape(name).replace(r"\ ", r"\s+") for name in names)
+        pattern = re.compile(r"(?<![\w])(%s)(?![\w])\s*:?" % alternation, re.IGNORECASE)
+        _header_patterns[id(headers)] = pattern
+    return pattern
+
+
+def _is_header(text: str, match: "re.Match[str]") -> bool:
+    found = match.group(1)
+    if found.isupper() or match.group(0).rstrip().endswith(":"):
+        return True
+    if not found.istitle():
+        return False
+    # A Title Case name counts only at the start of a line or sentence
+    before = text[:match.start()].rstrip(" \t")
+    return not before or before[-1] in "\n.!?:|•▪●◦■►"
+
+
+def segment_sections(
+    text: str, headers: Optional[Dict[str, Tuple[str, int]]] = None
+) -> List[Section]:
+    """
+    Split a document into sections at recognised headers
+
+    Works on text whose line breaks were collapsed by extraction: headers are
+    recognised when written in capitals, followed by a colon, or in Title
+    Case at the start of a sentence.
+
+    Args:
+        text: Document text
+        headers: Section name map, defaults to RESUME_SECTIONS
+
+    Returns:
+        List of sections in document order, starting with the preamble
+    """
+    headers = RESUME_SECTIONS if headers is None else headers
+    pattern = _header_pattern(headers)
+
+    boundaries = []
+    for match in pattern.finditer(text):
+        if _is_header(text, match):
+            name = re.sub(r"\s+", " ", match.group(1).lower())
+            boundaries.append((match.start(), match.end(), match.group(1).strip(), headers[name]))
+
+    sections = []
+    preamble_end = boundaries[0][0] if boundaries else len(text)
+    preamble = Section("", PREAMBLE, PREAMBLE_PRIORITY, 0, preamble_end)
+    preamble.units = _split_units(text[:preamble_end])
+    sections.append(preamble)
+
+    for index, (_, end, title, (category, priority)) in enumerate(boundaries):
+        next_start = boundaries[index + 1][0] if index + 1 < len(boundaries) else len(text)
+        section = Section(title, category, priority, end, next_start)
+        section.units = _split_units(text[end:next_start])
+        sections.append(section)
+
+    return sections
+
+
+def _split_units(text: str) -> List[str]:
+    units = []
+    for unit in _UNIT_SPLIT.split(_INLINE_PAGE_MARKER.sub(" ", text)):
+        unit = unit.strip(" \t|,;")
+        if unit and not _PAGE_MARKER.match(unit):
+            units.append(unit)
+    return units
+
+
+def _deduplicate(sections: List[Section]) -> List[Section]:
+    """
+    Drop repeated units (page headers/footers, repeated contact lines) and
+    merge sections whose header appears more than once
+    """
+    seen = set()
+    merged: Dict[str, Section] = {}
+    result = []
+    for section in sections:
+        units = []
+        for unit in section.units:
+            key = re.sub(r"[\d\W_]+", " ", unit.lower()).strip()
+            # Very short units such as "Python" or "2019" are legitimately repeated
+            if len(key) > 12 and key in seen:
+                continue
+            seen.add(key)
+            units.append(unit)
+        section.units = units
+
+        target = merged.get(section.category)
+        if target is not None and section.category not in (PREAMBLE, "other"):
+            target.units.extend(section.units)
+            continue
+        merged[section.category] = section
+        result.append(section)
+    return result
+
+
+def compress_text(
+    text: str,
+    max_tokens: int,
+    headers: Optional[Dict[str, Tuple[str, int]]] = None,
+    floor_share: float = 0.08,
+) -> str:
+    """
+    Compress a document to fit a token budget, keeping the most important
+    sections
+
+    The document is segmented and de-duplicated. If it still exceeds the
+    budget, every section first gets a small floor so no section vanishes
+    completely, then the remaining budget is filled in priority order. Units
+    are kept in document order within each section, and the first one that
+    doesn't fit is cut at a word boundary to fill what is left, since a
+    section without sentence breaks is a single unit.
+
+    Args:
+        text: Document text
+        max_tokens: Token budget for the output
+        headers: Section name map, defaults to RESUME_SECTIONS
+        floor_share: Share of the budget guaranteed to each section
+
+    Returns:
+        The compressed document with one section per line
+    """
+    sections = _deduplicate(segment_sections(text, headers))
+
+    if sum(section.tokens for section in sections) <= max_tokens:
+        return _render(sections, {id(section): section.units for section in sections})
+
+    # Guarantee each section a floor, most important sections first
+    allocation: Dict[int, int] = {}
+    remaining = max_tokens
+    by_priority = sorted(sections, key=lambda section: section.priority)
+    floor = int(max_tokens * floor_share)
+    for section in by_priority:
+        grant = min(section.tokens, floor, remaining)
+        allocation[id(section)] = grant
+        remaining -= grant
+
+    # Then hand out the rest in priority order
+    for section in by_priority:
+        extra = min(section.tokens - allocation[id(section)], remaining)
+        allocation[id(section)] += extra
+        remaining -= extra
+        if remaining <= 0:
+            break
+
+    kept_units: Dict[int, List[str]] = {}
+    for section in sections:
+        budget = allocation[id(section)] - estimate_tokens(section.heading)
+        kept = kept_units[id(section)] = []
+        for unit in section.units:
+            cost = estimate_tokens(unit)
+            if cost > budget:
+                truncated = _truncate_unit(unit, budget)
+                if truncated:
+                    kept.append(truncated)
+                break
+            budget -= cost
+            kept.append(unit)
+
+    return _render(sections, kept_units)
+
+
+def _truncate_unit(unit: str, budget: int) -> str:
+    """Cut a unit after its last whole word within a token budget"""
+    # Tokens never span whitespace, so word costs add up
+    words = unit.split()
+    count = 0
+    for word in words:
+        budget -= estimate_tokens(word)
+        if budget < 0:
+            break
+        count += 1
+    return " ".join(words[:count])
+
+
+def _render(sections: List[Section], kept_units: Dict[int, List[str]]) -> str:
+    lines = []
+    for section in sections:
+        units = kept_units[id(section)]
+        if not units:
+            continue
+        body = " ".join(units)
+        lines.append(f"{section.title.upper()}: {body}" if section.title else body)
+    return "\n".join(lines)
+
+
+def compress_resume(resume_text: str, max_tokens: int = 2000) -> str:
+    """
+    Compress resume text to a token budget, prioritising skills, experience,
+    summary and education
+
+    Args:
+        resume_text: Extracted resume text
+        max_tokens: Token budget for the output
+
+    Returns:
+        Compressed resume text
+    """
+    return compress_text(resume_text, max_tokens, RESUME_SECTIONS)
+
+
+def compress_job_description(job_description: str, max_tokens: int = 500) -> str:
+    """
+    Compress a job description to a token budget, prioritising requirements
+    and responsibilities over company boilerplate
+
+    Args:
+        job_description: Job description text
+        max_tokens: Token budget for the output
+
+    Returns:
+        Compressed job description
+    """
+    return compress_text(job_description, max_tokens, JOB_DESCRIPTION_SECTIONS)
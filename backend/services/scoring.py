@@ -0,0 +1,472 @@
+import re
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple
+from .resume_compressor import segment_sections
+from .skill_matcher import SkillMatcher
+from .skill_taxonomy import SOFT_SKILLS_CATEGORY, get_skill_taxonomy, normalize_skill
+
+# README scoring system: points per component, out of 100
+SCORE_WEIGHTS = {
+    "keywords": 30,
+    "experience": 20,
+    "skills": 20,
+    "title": 15,
+    "domain": 10,
+    "education": 5,
+}
+
+# Fields computed locally instead of by the model
+SCORED_FIELDS = [
+    "match_score",
+    "keywords_match_percentage",
+    "experience_level_percentage",
+    "skills_relevance_percentage",
+    "searchability_issues",
+    "hard_skills_issues",
+    "soft_skills_issues",
+    "recruiter_tips_issues",
+    "formatting_issues",
+    "semantic_similarity",
+]
+
+# Skill fields computed locally, as display names and canonical skill IDs
+SKILL_FIELDS = ["skills_match", "matched_skill_ids", "missing_skill_ids"]
+
+MAX_ISSUES = 15
+
+ACTION_VERBS = {
+    "led", "built", "designed", "developed", "implemented", "managed", "created",
+    "improved", "reduced", "increased", "launched", "delivered", "owned", "drove",
+    "architected", "optimized", "automated", "mentored", "migrated", "achieved",
+}
+
+STOPWORDS = {
+    "a", "about", "above", "across", "after", "all", "also", "an", "and", "any", "are",
+    "as", "at", "be", "been", "being", "both", "but", "by", "can", "candidate",
+    "candidates", "company", "could", "do", "does", "each", "etc", "experience",
+    "for", "from", "good", "has", "have", "having", "he", "her", "his", "i", "if", "in",
+    "into", "is", "it", "its", "job", "join", "just", "knowledge", "looking", "may",
+    "more", "most", "must", "my", "new", "not", "of", "on", "one", "or", "other", "our",
+    "out", "over", "per", "plus", "preferred", "required", "requirements", "role",
+    "should", "skills", "so", "strong", "such", "team", "than", "that", "the", "their",
+    "them", "then", "there", "these", "they", "this", "those", "through", "to", "under",
+    "up", "us", "using", "very", "was", "we", "well", "were", "what", "when", "where",
+    "which", "while", "who", "will", "with", "within", "work", "working", "would",
+    "year", "years", "you", "your", "ability", "able", "including", "responsibilities",
+    "opportunity", "apply", "like", "least", "minimum", "etc.",
+}
+
+_MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+
+_TERM_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#./]*[a-z0-9+#]|[a-z0-9]")
+# "Jan 2019", "01/2019" or "2019"
+_DATE = (
+    r"(?:(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?,?\s*|(\d{1,2})\s*[/\-.]\s*)?"
+    r"((?:19|20)\d{2})"
+)
+_DATE_RANGE = re.compile(
+    _DATE + r"\s*(?:-|to|till|until)\s*(?:"
+    + _DATE + r"|(present|current|now|date|ongoing|till date))",
+    re.IGNORECASE,
+)
+_STATED_YEARS = re.compile(
+    r"(\d{1,2}(?:\.\d)?)\s*\+?\s*(?:years?|yrs?)(?:\s+of)?\s+(?:\w+\s+){0,3}?experience",
+    re.IGNORECASE,
+)
+_REQUIRED_YEARS = re.compile(
+    r"(\d{1,2})\s*\+?\s*(?:-|to)?\s*(?:\d{1,2}\s*)?(?:years?|yrs?)", re.IGNORECASE
+)
+_TITLE_LINE = re.compile(
+    r"(?:job title|position|role|designation)\s*[:\-]\s*([^.\n|,]{3,60})", re.IGNORECASE
+)
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+\.[\w.]+")
+_PHONE = re.compile(r"(?:\+?\d{1,3}[\s-]?)?(?:\d[\s-]?){10}")
+_METRIC = re.compile(
+    r"\d+(?:\.\d+)?\s*(?:%|percent|x\b|k\b|lakh|crore|million|users|customers)", re.IGNORECASE
+)
+
+# Degree levels: 1 diploma, 2 bachelor, 3 master, 4 doctorate
+_EDUCATION_LEVELS: List[Tuple[int, List[str]]] = [
+    (4, ["phd", "ph.d", "doctorate"]),
+    (3, ["master", "masters", "m.tech", "mtech", "m.e", "m.sc", "msc", "mba", "mca", "pgdm",
+         "post graduate", "postgraduate"]),
+    (2, ["bachelor", "bachelors", "b.tech", "btech", "b.e", "b.sc", "bsc", "bca", "b.com",
+         "bcom", "bba", "graduate", "degree"]),
+    (1, ["diploma", "12th", "hsc"]),
+]
+
+
+def _tokens(text: str) -> List[str]:
+    """Lowercase word tokens, keeping terms like c++, c#, node.js and ci/cd intact"""
+    return _TERM_TOKEN.findall(text.lower())
+
+
+def _stem(token: str) -> str:
+    for suffix in ("ing", "ers", "er", "ed", "es", "s"):
+        if len(token) > len(suffix) + 3 and token.endswith(suffix):
+            return token[: -len(suffix)]
+    return token
+
+
+def _ngrams(tokens: List[str], max_n: int = 3) -> Set[str]:
+    grams = set(tokens)
+    for n in range(2, max_n + 1):
+        for i in range(len(tokens) - n + 1):
+            grams.add(" ".join(tokens[i:i + n]))
+    return grams
+
+
+def _normalize_term(term: str) -> str:
+    return " ".join(_tokens(term))
+
+
+def _split_skills(
+    skills: Iterable[str], text: str, text_skill_ids: Iterable[str]
+) -> Tuple[List[str], List[str], List[str], List[str]]:
+    """
+    Split skills into those found in a text and those missing, dropping duplicates
+
+    Skills the taxonomy knows are compared by canonical ID, so "ReactJS" in
+    the job matches "React.js" on the resume, and a resume listing Django
+    covers a job asking for Python. Other skills are matched as written.
+
+    Returns:
+        Tuple of (found names, missing names, found skill IDs, missing skill IDs)
+    """
+    taxonomy = get_skill_taxonomy()
+    available = set(taxonomy.with_parents(text_skill_ids))
+
+    # (is known, skill ID or normalized term) in the order the skills were given
+    order: List[Tuple[bool, str]] = []
+    unknown: Dict[str, str] = {}
+    for skill in skills:
+        skill_id = taxonomy.lookup(skill)
+        # Phrases such as "AWS/GCP" or "Experience with Docker" name known skills
+        skill_ids = [skill_id] if skill_id else taxonomy.find_ids(skill, fuzzy=False)
+        order.extend((True, skill_id) for skill_id in skill_ids)
+        key = normalize_skill(skill)
+        if not skill_ids and key and key not in unknown:
+            unknown[key] = skill
+            order.append((False, key))
+
+    found_terms = set(SkillMatcher({key: key for key in unknown}).find(text)) if unknown else set()
+
+    found, missing, found_ids, missing_ids = [], [], [], []
+    for known, key in dict.fromkeys(order):
+        if not known:
+            (found if key in found_terms else missing).append(unknown[key])
+        elif key in available:
+            found.append(taxonomy.name(key))
+            found_ids.append(key)
+        else:
+            missing.append(taxonomy.name(key))
+            missing_ids.append(key)
+    return found, missing, found_ids, missing_ids
+
+
+def _percentage(part: float, whole: float) -> int:
+    return int(round(100 * part / whole)) if whole else 0
+
+
+def _job_keywords(jd_tokens: List[str], limit: int) -> List[str]:
+    counts = Counter(
+        token for token in jd_tokens
+        if token not in STOPWORDS and len(token) > 2 and not token.isdigit()
+    )
+    return [token for token, _ in counts.most_common(limit)]
+
+
+def _month_index(month: Optional[str], numeric_month: Optional[str], year: str) -> int:
+    if month:
+        value = _MONTHS[month[:3].lower()]
+    elif numeric_month and 1 <= int(numeric_month) <= 12:
+        value = int(numeric_month)
+    else:
+        value = 1
+    return int(year) * 12 + value - 1
+
+
+def years_of_experience(resume_text: str, now: Optional[datetime] = None) -> float:
+    """
+    Estimate total years of experience from the date ranges in a resume
+
+    Overlapping ranges are merged so concurrent roles aren't counted twice.
+    Falls back to explicit statements such as "5+ years of experience".
+
+    Args:
+        resume_text: Resume text
+        now: Date used for open-ended ranges, defaults to today
+
+    Returns:
+        float: Years of experience, rounded to one decimal
+    """
+    now = now or datetime.now()
+    current = now.year * 12 + now.month - 1
+
+    # Only count dates from work history, not from education or certifications
+    sections = segment_sections(resume_text)
+    work = [section for section in sections if section.category == "experience"]
+    if not work:
+        work = [s for s in sections if s.category not in ("education", "certifications")]
+    spans = [(section.start, section.end) for section in work]
+
+    intervals = []
+    for match in _DATE_RANGE.finditer(resume_text):
+        if not any(start <= match.start() < end for start, end in spans):
+            continue
+        start = _month_index(match.group(1), match.group(2), match.group(3))
+        if match.group(7):
+            end = current
+        else:
+            end = _month_index(match.group(4), match.group(5), match.group(6))
+            if not match.group(4) and not match.group(5):
+                # "2018 - 2021" covers the whole final year, up to today
+                # when that year is the current one
+                end = min(end + 11, current)
+        if start <= end <= current + 1 and end - start < 50 * 12:
+            intervals.append((start, end))
+
+    months = 0
+    last_end = -1
+    for start, end in sorted(intervals):
+        start = max(start, last_end + 1)
+        if end >= start:
+            months += end - start + 1
+            last_end = end
+
+    stated = [float(value) for value in _STATED_YEARS.findall(resume_text)]
+    return round(max([months / 12] + stated), 1)
+
+
+def required_years(
+    job_description: str, job_profile: Optional[Dict[str, Any]] = None
+) -> Optional[float]:
+    """Get the minimum years of experience a job asks for, if stated"""
+    if job_profile and job_profile.get("min_years_experience") is not None:
+        return float(job_profile["min_years_experience"])
+    values = [int(value) for value in _REQUIRED_YEARS.findall(job_description) if int(value) <= 30]
+    return float(min(values)) if values else None
+
+
+def _education_level(text: str) -> int:
+    grams = _ngrams(_tokens(text), 2)
+    for level, names in _EDUCATION_LEVELS:
+        if any(_normalize_term(name) in grams for name in names):
+            return level
+    return 0
+
+
+def _job_title(job_description: str, job_profile: Optional[Dict[str, Any]]) -> str:
+    if job_profile and job_profile.get("job_title"):
+        return job_profile["job_title"]
+    match = _TITLE_LINE.search(job_description)
+    if match:
+        return match.group(1).strip()
+    # Postings usually open with the title
+    return " ".join(job_description.split()[:6])
+
+
+def _job_skills(job_profile: Optional[Dict[str, Any]], job_skill_ids: List[str]) -> List[str]:
+    if job_profile and (job_profile.get("required_skills") or job_profile.get("preferred_skills")):
+        return list(job_profile.get("required_skills", [])) + list(
+            job_profile.get("preferred_skills", [])
+        )
+    taxonomy = get_skill_taxonomy()
+    return [
+        taxonomy.name(skill_id) for skill_id in job_skill_ids
+        if not taxonomy.in_category(skill_id, SOFT_SKILLS_CATEGORY)
+    ]
+
+
+def score_resume(
+    resume_text: str,
+    job_description: str,
+    job_profile: Optional[Dict[str, Any]] = None,
+    semantic_score: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Score a resume against a job description without calling a model
+
+    Components follow the README scoring system: keyword match (30), experience
+    level (20), technical skills (20), title relevance (15), domain knowledge
+    (10) and education (5). The result is deterministic for a given input.
+
+    Args:
+        resume_text: Extracted text from the resume
+        job_description: Job description text
+        job_profile: Pre-analyzed job profile, if available
+        semantic_score: 0-100 text similarity of the resume and job description,
+            used for the components the job gives too little to go on
+
+    Returns:
+        Dict containing the SCORED_FIELDS and SKILL_FIELDS, plus missing_skills,
+        missing_soft_skills, years_of_experience and the per-component scores
+    """
+    resume_tokens = _tokens(resume_text)
+    resume_grams = _ngrams(resume_tokens)
+    resume_stems = {_stem(token) for token in resume_tokens}
+    jd_tokens = _tokens(job_description)
+
+    # Keyword match: the most frequent meaningful terms of the posting
+    keywords = _job_keywords(jd_tokens, 30)
+    keyword_hits = sum(1 for keyword in keywords if _stem(keyword) in resume_stems)
+    keyword_score = _percentage(keyword_hits, len(keywords))
+
+    # Technical skills, resolved to canonical skill IDs through the taxonomy
+    taxonomy = get_skill_taxonomy()
+    resume_skill_ids = taxonomy.find_ids(resume_text)
+    job_skill_ids = taxonomy.find_ids(job_description)
+    job_skills = _job_skills(job_profile, job_skill_ids)
+    matched_skills, missing_skills, matched_ids, missing_ids = _split_skills(
+        job_skills, resume_text, resume_skill_ids
+    )
+    if matched_skills or missing_skills or semantic_score is None:
+        skills_score = _percentage(len(matched_skills), len(matched_skills) + len(missing_skills))
+    else:
+        # No recognisable skills in the job to compare against
+        skills_score = semantic_score
+
+    # Experience level
+    years = years_of_experience(resume_text)
+    needed = required_years(job_description, job_profile)
+    if needed:
+        experience_score = min(100, _percentage(years, needed))
+    else:
+        experience_score = min(100, 50 + int(years * 10))
+
+    # Title relevance
+    title_tokens = _tokens(_job_title(job_description, job_profile))
+    title_terms = [token for token in title_tokens if token not in STOPWORDS]
+    if title_terms and " ".join(title_terms) in resume_grams:
+        title_score = 100
+    else:
+        title_hits = sum(1 for term in title_terms if _stem(term) in resume_stems)
+        title_score = _percentage(title_hits, len(title_terms))
+
+    # Domain knowledge: industry and responsibility vocabulary beyond the top keywords
+    if job_profile and (job_profile.get("industry") or job_profile.get("key_responsibilities")):
+        domain_text = " ".join(
+            [job_profile.get("industry", "")] + job_profile.get("key_responsibilities", [])
+        )
+        domain_terms = _job_keywords(_tokens(domain_text), 20)
+    else:
+        domain_terms = _job_keywords(jd_tokens, 60)[30:]
+    domain_hits = sum(1 for term in domain_terms if _stem(term) in resume_stems)
+    if domain_terms:
+        domain_score = _percentage(domain_hits, len(domain_terms))
+    else:
+        domain_score = keyword_score if semantic_score is None else semantic_score
+
+    # Education and certifications
+    resume_level = _education_level(resume_text)
+    education_source = (job_profile or {}).get("education") or job_description
+    required_level = _education_level(education_source)
+    certified = "certified" in resume_grams or "certification" in resume_grams
+    if required_level:
+        education_score = 100 if resume_level >= required_level else (50 if resume_level else 20)
+    else:
+        education_score = 100 if resume_level >= 2 else 60
+    if certified:
+        education_score = min(100, education_score + 20)
+
+    components = {
+        "keywords": keyword_score,
+        "experience": experience_score,
+        "skills": skills_score,
+        "title": title_score,
+        "domain": domain_score,
+        "education": education_score,
+    }
+    weighted = sum(components[name] * weight for name, weight in SCORE_WEIGHTS.items())
+    match_score = int(round(weighted / 100))
+
+    resume_soft = set(resume_skill_ids)
+    missing_soft = [
+        taxonomy.name(skill_id) for skill_id in job_skill_ids
+        if taxonomy.in_category(skill_id, SOFT_SKILLS_CATEGORY) and skill_id not in resume_soft
+    ]
+
+    return {
+        "match_score": match_score,
+        "keywords_match_percentage": keyword_score,
+        "experience_level_percentage": experience_score,
+        "skills_relevance_percentage": skills_score,
+        "searchability_issues": _searchability_issues(resume_text, resume_grams, title_score),
+        "hard_skills_issues": min(MAX_ISSUES, len(missing_skills)),
+        "soft_skills_issues": min(MAX_ISSUES, len(missing_soft)),
+        "recruiter_tips_issues": _recruiter_tips_issues(resume_text, resume_tokens, years, needed),
+        "formatting_issues": _formatting_issues(resume_text, resume_tokens),
+        "semantic_similarity": semantic_score,
+        "skills_match": matched_skills,
+        "matched_skill_ids": matched_ids,
+        "missing_skill_ids": missing_ids,
+        "missing_skills": missing_skills,
+        "missing_soft_skills": missing_soft,
+        "years_of_experience": years,
+        "score_components": components,
+    }
+
+
+def _searchability_issues(resume_text: str, resume_grams: Set[str], title_score: int) -> int:
+    issues = 0
+    if not _EMAIL.search(resume_text):
+        issues += 1
+    if not _PHONE.search(resume_text):
+        issues += 1
+    if "linkedin" not in resume_grams:
+        issues += 1
+    categories = {section.category for section in segment_sections(resume_text)}
+    for category in ("summary", "experience", "skills", "education"):
+        if category not in categories:
+            issues += 1
+    if title_score < 50:
+        # The target job title doesn't appear on the resume
+        issues += 1
+    return min(MAX_ISSUES, issues)
+
+
+def _recruiter_tips_issues(
+    resume_text: str, resume_tokens: List[str], years: float, needed: Optional[float]
+) -> int:
+    issues = 0
+    metrics = len(_METRIC.findall(resume_text))
+    if metrics < 3:
+        issues += 3 - metrics
+    verbs = sum(1 for token in resume_tokens if token in ACTION_VERBS)
+    if verbs < 5:
+        issues += 1 if verbs else 2
+    words = len(resume_tokens)
+    if words < 250 or words > 1200:
+        issues += 1
+    if needed and years < needed:
+        issues += 1
+    lowered = resume_text.lower()
+    for cliche in ("hardworking", "hard working", "go-getter", "team player", "self-motivated"):
+        if cliche in lowered:
+            issues += 1
+    return min(MAX_ISSUES, issues)
+
+
+def _formatting_issues(resume_text: str, resume_tokens: List[str]) -> int:
+    issues = 0
+    sections = segment_sections(resume_text)
+    if len(sections) < 3:
+        # Few recognisable section headings
+        issues += 2
+    words = re.findall(r"[A-Za-z]{3,}", resume_text)
+    if words and sum(1 for word in words if word.isupper()) / len(words) > 0.3:
+        issues += 1
+    if len(resume_tokens) > 1200:
+        # Likely more than two pages
+        issues += 1
+    if re.search(r"[|]{2,}|_{4,}|\.{6,}", resume_text):
+        # Table borders or leader dots that confuse ATS parsers
+        issues += 1
+    personal = r"\b(?:photo|photograph|date of birth|dob|marital status)\b"
+    if re.search(personal, resume_text, re.IGNORECASE):
+        issues += 1
+    return min(MAX_ISSUES, issues)
@@ -0,0 +1,267 @@
+import os
+import threading
+import zlib
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .scoring import STOPWORDS
+from .skill_matcher import tokenize
+from .skill_taxonomy import get_skill_taxonomy
+
+# Width of the hashed feature vectors. Each stored vector takes 4 bytes per
+# dimension, so the default keeps 10,000 resumes in about 160 MB.
+SIMILARITY_DIMENSIONS = int(os.getenv("SIMILARITY_DIMENSIONS", "4096"))
+
+# Relative weight of each feature family in a vector
+WORD_WEIGHT = 1.0
+BIGRAM_WEIGHT = 0.5
+CHAR_NGRAM_WEIGHT = 0.3
+SKILL_WEIGHT = 3.0
+
+CHAR_NGRAM_SIZE = 4
+
+# Cosine similarity at which two documents count as a full match; resumes
+# and job descriptions for the same role typically land around 0.4 to 0.6
+FULL_MATCH_SIMILARITY = float(os.getenv("SIMILARITY_FULL_MATCH", "0.6"))
+
+
+def _hash_feature(feature: str, dimensions: int) -> Tuple[int, float]:
+    """Map a feature to a bucket and a sign, so collisions cancel out on average"""
+    digest = zlib.crc32(feature.encode("utf-8"))
+    return digest % dimensions, 1.0 if digest & 0x80000000 else -1.0
+
+
+@lru_cache(maxsize=65536)
+def _token_features(token: str, dimensions: int) -> Tuple[Tuple[int, float], ...]:
+    """Hashed features of a single word: the word itself and its character n-grams"""
+    index, sign = _hash_feature(f"w:{token}", dimensions)
+    features = [(index, sign * WORD_WEIGHT)]
+    padded = f"<{token}>"
+    grams = [padded[i:i + CHAR_NGRAM_SIZE] for i in range(len(padded) - CHAR_NGRAM_SIZE + 1)]
+    if grams:
+        # Spread the n-gram weight over the word, so long words don't dominate
+        weight = CHAR_NGRAM_WEIGHT / len(grams)
+        for gram in grams:
+            index, sign = _hash_feature(f"c:{gram}", dimensions)
+            features.append((index, sign * weight))
+    return tuple(features)
+
+
+class HashedVectorizer:
+    """
+    Turns documents into fixed-width float32 vectors for cosine similarity
+
+    Features are content words, word bigrams, character 4-grams (so
+    "developer" and "development" overlap) and canonical skill IDs from the
+    skill taxonomy (so "ReactJS" and "React.js" are the same feature). They
+    are hashed into ``dimensions`` buckets with sublinear term frequency, and
+    every vector is L2-normalized, so a dot product is the cosine similarity.
+    There is no corpus-wide IDF: single resume/JD pairs have no corpus, so
+    stopword removal and the skill features carry the weighting instead.
+    """
+
+    def __init__(self, dimensions: int = SIMILARITY_DIMENSIONS):
+        self.dimensions = dimensions
+
+    def vectorize(self, text: str) -> np.ndarray:
+        """
+        Vectorize a document
+
+        Args:
+            text: Document text
+
+        Returns:
+            L2-normalized float32 vector of length ``dimensions``; all zeros
+            for a document without features
+        """
+        counts: Dict[int, float] = {}
+
+        def add(index: int, value: float) -> None:
+            counts[index] = counts.get(index, 0.0) + value
+
+        words = [
+            token for token in tokenize(text)
+            if token not in STOPWORDS and len(token) > 1 and not token.isdigit()
+        ]
+        for token in words:
+            for index, value in _token_features(token, self.dimensions):
+                add(index, value)
+        for first, second in zip(words, words[1:]):
+            index, sign = _hash_feature(f"b:{first} {second}", self.dimensions)
+            add(index, sign * BIGRAM_WEIGHT)
+        for skill_id in get_skill_taxonomy().find_ids(text):
+            index, sign = _hash_feature(f"s:{skill_id}", self.dimensions)
+            add(index, sign * SKILL_WEIGHT)
+
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        if counts:
+            indices = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+            values = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+            # Sublinear term frequency, keeping the sign of the bucket
+            vector[indices] = np.sign(values) * np.log1p(np.abs(values))
+            norm = np.linalg.norm(vector)
+            if norm > 0:
+                vector /= norm
+        return vector
+
+    def vectorize_many(self, texts: Iterable[str]) -> np.ndarray:
+        """
+        Vectorize several documents
+
+        Args:
+            texts: Document texts
+
+        Returns:
+            float32 matrix with one normalized row per document
+        """
+        rows = [self.vectorize(text) for text in texts]
+        if not rows:
+            return np.zeros((0, self.dimensions), dtype=np.float32)
+        return np.vstack(rows)
+
+
+class VectorIndex:
+    """
+    In-memory store of document vectors scored in one matrix multiply
+
+    Vectors live in a single float32 matrix that grows by doubling, so scoring
+    a query against every stored document is one matrix-vector product.
+    """
+
+    def __init__(self, vectorizer: Optional[HashedVectorizer] = None, capacity: int = 1024):
+        self.vectorizer = vectorizer or HashedVectorizer()
+        self._matrix = np.zeros((capacity, self.vectorizer.dimensions), dtype=np.float32)
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add(self, doc_id: str, text: str) -> None:
+        """Vectorize and store a document, replacing any previous version"""
+        self.add_vector(doc_id, self.vectorizer.vectorize(text))
+
+    def add_vector(self, doc_id: str, vector: np.ndarray) -> None:
+        """Store a precomputed normalized vector, replacing any previous version"""
+        with self._lock:
+            row = self._rows.get(doc_id)
+            if row is None:
+                row = len(self._ids)
+                if row == self._matrix.shape[0]:
+                    grown = np.zeros(
+                        (max(1, row * 2), self.vectorizer.dimensions), dtype=np.float32
+                    )
+                    grown[:row] = self._matrix
+                    self._matrix = grown
+                self._ids.append(doc_id)
+                self._rows[doc_id] = row
+            self._matrix[row] = vector
+
+    def remove(self, doc_id: str) -> bool:
+        """
+        Remove a document
+
+        Returns:
+            bool: Whether the document was stored
+        """
+        with self._lock:
+            row = self._rows.pop(doc_id, None)
+            if row is None:
+                return False
+            # Move the last row into the gap so the matrix stays dense
+            last = len(self._ids) - 1
+            if row != last:
+                moved = self._ids[last]
+                self._matrix[row] = self._matrix[last]
+                self._ids[row] = moved
+                self._rows[moved] = row
+            self._ids.pop()
+            self._matrix[last] = 0
+            return True
+
+    def scores(self, query: str) -> Dict[str, float]:
+        """
+        Score every stored document against a query
+
+        Args:
+            query: Query text, such as a job description
+
+        Returns:
+            Dict mapping document ID to cosine similarity
+        """
+        vector = self.vectorizer.vectorize(query)
+        with self._lock:
+            similarities = self._matrix[:len(self._ids)] @ vector
+            return dict(zip(self._ids, similarities.tolist()))
+
+    def rank(self, query: str, top_k: Optional[int] = None) -> List[Tuple[str, float]]:
+        """
+        Rank the stored documents by similarity to a query
+
+        Args:
+            query: Query text, such as a job description
+            top_k: Number of results to return, defaults to all
+
+        Returns:
+            List of (document ID, cosine similarity) tuples, most similar first
+        """
+        vector = self.vectorizer.vectorize(query)
+        with self._lock:
+            count = len(self._ids)
+            if count == 0:
+                return []
+            similarities = self._matrix[:count] @ vector
+            k = count if top_k is None else min(top_k, count)
+            if k < count:
+                top = np.argpartition(-similarities, k - 1)[:k]
+            else:
+                top = np.arange(count)
+            order = top[np.argsort(-similarities[top], kind="stable")]
+            return [(self._ids[row], float(similarities[row])) for row in order]
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
+_vectorizer = HashedVectorizer()
+
+
+def cosine_similarity(first: str, second: str) -> float:
+    """
+    Cosine similarity between two documents
+
+    Args:
+        first: First document
+        second: Second document
+
+    Returns:
+        float: Similarity between 0 and 1 for related texts; 0 if either has no features
+    """
+    return float(_vectorizer.vectorize(first) @ _vectorizer.vectorize(second))
+
+
+def batch_similarity(query: str, documents: Sequence[str]) -> np.ndarray:
+    """
+    Score one query, such as a job description, against many documents
+
+    Args:
+        query: Query text
+        documents: Document texts, such as resumes
+
+    Returns:
+        float32 array of cosine similarities, one per document
+    """
+    return _vectorizer.vectorize_many(documents) @ _vectorizer.vectorize(query)
+
+
+def similarity_score(similarity: float) -> int:
+    """
+    Convert a cosine similarity to a 0-100 score
+
+    Args:
+        similarity: Cosine similarity
+
+    Returns:
+        int: Score, reaching 100 at FULL_MATCH_SIMILARITY
+    """
+    return int(round(min(1.0, max(0.0, similarity) / FULL_MATCH_SIMILARITY) * 100))
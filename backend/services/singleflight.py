@@ -0,0 +1,86 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+
+class _Call:
+    """A single in-flight call shared by a leader and its followers"""
+
+    def __init__(self, task: "asyncio.Task[Any]"):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesce identical concurrent async calls into a single execution.
+
+    The first caller for a key (the leader) starts the work as a separate
+    task; callers arriving while it is in flight (followers) await the same
+    task instead of starting their own. Results and exceptions are delivered
+    to every caller. A caller that is cancelled only stops waiting; the shared
+    task is cancelled once no callers are left waiting on it.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.cancelled = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run ``fn`` for ``key`` unless an identical call is already in flight
+
+        Args:
+            key: Key identifying identical calls
+            fn: Zero-argument coroutine function performing the work
+
+        Returns:
+            The result of the shared call
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda task: self._finish(key, call))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Every caller has gone away, so nobody needs the result
+                call.task.cancel()
+
+    def in_flight(self) -> int:
+        """Get the number of calls currently in flight"""
+        return len(self._calls)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get single-flight statistics
+
+        Returns:
+            Dict containing leader, coalesced, error and cancellation counters
+        """
+        return {
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "cancelled": self.cancelled,
+        }
+
+    def _finish(self, key: str, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+        if call.task.cancelled():
+            self.cancelled += 1
+        elif call.task.exception() is not None:
+            self.errors += 1
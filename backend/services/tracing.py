@@ -0,0 +1,323 @@
+import contextvars
+import json
+import os
+import queue
+import re
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+from .metrics import histogram
+
+# Where finished request traces go: "" (nowhere), "stdout", or "file" to
+# append them to TRACE_EXPORT_PATH. Each trace is one line of OTLP/JSON, the
+# format the OpenTelemetry Collector's file receiver and otel-desktop-viewer
+# read, so breakdowns can be built without a tracing backend.
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "").lower()
+TRACE_EXPORT_PATH = os.getenv(
+    "TRACE_EXPORT_PATH", os.path.join(tempfile.gettempdir(), "naukriguru", "traces.jsonl")
+)
+TRACE_SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "naukri-guru-api")
+
+# Send a Server-Timing header with the stages finished before the response
+# started, so browser dev tools show the breakdown for each request
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "true").lower() == "true"
+
+_request_seconds = histogram(
+    "http_request_duration_seconds", "Request latency, until the last background task finished",
+    ["route", "method", "status"],
+)
+_stage_seconds = histogram(
+    "http_request_stage_seconds", "Time spent in each stage of a request", ["route", "stage"],
+)
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+# OTLP span kinds
+_KIND_INTERNAL = 1
+_KIND_SERVER = 2
+
+
+def _new_id(size: int) -> str:
+    return os.urandom(size).hex()
+
+
+class Span:
+    """A timed stage of a request"""
+
+    def __init__(
+        self, name: str, trace_id: str, parent_id: Optional[str], kind: int = _KIND_INTERNAL
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = _new_id(8)
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes: Dict[str, Any] = {}
+        self.error = False
+        self.start_ns = time.time_ns()
+        self._started = time.perf_counter()
+        self.end_ns: Optional[int] = None
+        self.duration: Optional[float] = None
+
+    def end(self) -> None:
+        self.duration = time.perf_counter() - self._started
+        self.end_ns = self.start_ns + int(self.duration * 1e9)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """Convert the span to its OTLP/JSON form"""
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": [_otlp_attribute(key, value) for key, value in self.attributes.items()],
+            "status": {"code": 2 if self.error else 0},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+class RequestTrace:
+    """
+    The spans of one request
+
+    The route is read from the ASGI scope when needed, since FastAPI only
+    resolves it after the middleware has started the trace.
+    """
+
+    def __init__(
+        self,
+        scope: Dict[str, Any],
+        trace_id: Optional[str] = None,
+        parent_id: Optional[str] = None,
+    ):
+        self.scope = scope
+        self.root = Span(
+            scope.get("method", "") + " request", trace_id or _new_id(16), parent_id, _KIND_SERVER
+        )
+        self.spans: List[Span] = []
+
+    @property
+    def route(self) -> str:
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or "unmatched"
+
+    def server_timing(self) -> str:
+        """Format the finished stages as a Server-Timing header value"""
+        entries = [
+            f"{span.name};dur={span.duration * 1000:.1f}"
+            for span in self.spans
+            if span.duration is not None
+        ]
+        entries.append(f"total;dur={(time.perf_counter() - self.root._started) * 1000:.1f}")
+        return ", ".join(entries)
+
+
+_trace: "contextvars.ContextVar[Optional[RequestTrace]]" = contextvars.ContextVar(
+    "request_trace", default=None
+)
+_parent: "contextvars.ContextVar[Optional[Span]]" = contextvars.ContextVar(
+    "trace_parent_span", default=None
+)
+
+
+@contextmanager
+def stage(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """
+    Time a stage of the current request
+
+    The stage becomes a span of the request trace, is added to the
+    Server-Timing header if it ends before the response starts, and is
+    observed in the per-route stage histogram. Stages opened inside a stage,
+    including in tasks and threads started from it, become its children.
+    Outside a traced request this does nothing.
+
+    Args:
+        name: Stage name, a single token such as "extract_text"
+        **attributes: Span attributes
+
+    Yields:
+        The Span, or None outside a traced request
+    """
+    trace = _trace.get()
+    if trace is None:
+        yield None
+        return
+
+    parent = _parent.get() or trace.root
+    span = Span(name, trace.root.trace_id, parent.span_id)
+    span.attributes.update(attributes)
+    trace.spans.append(span)
+    token = _parent.set(span)
+    try:
+        yield span
+    except BaseException:
+        span.error = True
+        raise
+    finally:
+        _parent.reset(token)
+        span.end()
+        _stage_seconds.observe(span.duration, route=trace.route, stage=name)
+
+
+class _Exporter:
+    """Writes finished traces from a background thread, off the event loop"""
+
+    def __init__(self, target: str, path: str):
+        self.target = target
+        self.path = path
+        self._queue: "queue.SimpleQueue[str]" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def export(self, trace: RequestTrace) -> None:
+        spans = [trace.root] + trace.spans
+        record = {
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", TRACE_SERVICE_NAME)]},
+                "scopeSpans": [{
+                    "scope": {"name": __name__},
+                    "spans": [span.to_otlp() for span in spans],
+                }],
+            }]
+        }
+        self._queue.put(json.dumps(record, separators=(",", ":")))
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="trace-exporter", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            lines = [self._queue.get()]
+            while True:
+                try:
+                    lines.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(lines)
+            except Exception as e:
+                print(f"Error exporting traces: {str(e)}")
+
+    def _write(self, lines: List[str]) -> None:
+        text = "\n".join(lines) + "\n"
+        if self.target == "stdout":
+            sys.stdout.write(text)
+            sys.stdout.flush()
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(text)
+
+
+def create_exporter() -> Optional[_Exporter]:
+    """
+    Create the trace exporter configured from environment variables
+
+    Returns:
+        Exporter, or None if traces are not exported
+    """
+    if TRACE_EXPORTER in ("stdout", "file"):
+        return _Exporter(TRACE_EXPORTER, TRACE_EXPORT_PATH)
+    if TRACE_EXPORTER:
+        print(f"Unknown TRACE_EXPORTER {TRACE_EXPORTER!r}; traces will not be exported")
+    return None
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware that traces every HTTP request
+
+    Each request gets a trace, continuing the caller's W3C traceparent when
+    one is sent. Stages timed with ``stage`` while the request is handled
+    become its spans; the ones finished before the response starts are sent
+    in a Server-Timing header. The request latency is observed per route,
+    method and status once the response and any background tasks are done,
+    and the trace is then handed to the exporter, if one is configured.
+    """
+
+    def __init__(
+        self,
+        app,
+        exporter: Optional[_Exporter] = None,
+        server_timing: bool = SERVER_TIMING_ENABLED,
+    ):
+        self.app = app
+        self.exporter = exporter if exporter is not None else create_exporter()
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace_id = parent_id = None
+        for name, value in scope.get("headers", []):
+            if name == b"traceparent":
+                match = _TRACEPARENT.match(value.decode("latin-1").strip())
+                if match:
+                    trace_id, parent_id = match.groups()
+                break
+
+        trace = RequestTrace(scope, trace_id, parent_id)
+        status = 500
+
+        async def send_with_timing(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", trace.server_timing().encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        trace_token = _trace.set(trace)
+        parent_token = _parent.set(None)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        except BaseException:
+            trace.root.error = True
+            raise
+        finally:
+            _parent.reset(parent_token)
+            _trace.reset(trace_token)
+            trace.root.end()
+            route = trace.route
+            trace.root.name = f"{scope['method']} {route}"
+            trace.root.attributes.update({
+                "http.method": scope["method"],
+                "http.route": route,
+                "http.target": scope.get("path", ""),
+                "http.status_code": status,
+            })
+            if status >= 500:
+                trace.root.error = True
+            _request_seconds.observe(
+                trace.root.duration, route=route, method=scope["method"], status=str(status)
+            )
+            if self.exporter is not None:
+                self.exporter.export(trace)
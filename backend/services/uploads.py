@@ -0,0 +1,270 @@
+import hashlib
+import io
+import json
+import mmap
+import os
+import tempfile
+from typing import Any, BinaryIO, Iterable, List, Optional, Union
+from .executors import run_cpu, run_io
+from .metrics import counter, histogram
+from .pdf_parser import count_pdf_pages
+
+# Largest resume accepted, and the most pages; larger files are turned away
+# before they are stored, parsed or sent to a model
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))
+UPLOAD_MAX_PAGES = int(os.getenv("UPLOAD_MAX_PAGES", "20"))
+
+# Allowance for the other form fields of an upload request, such as the job
+# descriptions, on top of UPLOAD_MAX_BYTES
+UPLOAD_FORM_OVERHEAD_BYTES = int(os.getenv("UPLOAD_FORM_OVERHEAD_BYTES", str(1024 * 1024)))
+
+# Uploads are read in chunks of this size; those up to UPLOAD_SPOOL_BYTES are
+# kept in memory and larger ones spooled to a temporary file in
+# UPLOAD_SPOOL_DIR (the system temp directory by default)
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(256 * 1024)))
+UPLOAD_SPOOL_BYTES = int(os.getenv("UPLOAD_SPOOL_BYTES", str(1024 * 1024)))
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR") or None
+
+# PDF readers accept the header anywhere in the first kilobyte
+_PDF_HEADER = b"%PDF-"
+_PDF_HEADER_WINDOW = 1024
+
+_SIZE_BUCKETS = (16384, 65536, 262144, 524288, 1048576, 2097152, 4194304, 8388608, 16777216)
+
+_upload_bytes = histogram(
+    "upload_bytes", "Size of accepted resume uploads, by where they were held", ["held"],
+    _SIZE_BUCKETS,
+)
+_rejected_total = counter("upload_rejected_total", "Resume uploads turned away", ["reason"])
+
+
+class UploadRejected(Exception):
+    """Raised when an upload is too large, has too many pages or is not a PDF"""
+
+    def __init__(self, status_code: int, detail: str, reason: str):
+        self.status_code = status_code
+        self.detail = detail
+        self.reason = reason
+        super().__init__(detail)
+
+
+def _reject(status_code: int, detail: str, reason: str) -> UploadRejected:
+    _rejected_total.inc(reason=reason)
+    return UploadRejected(status_code, detail, reason)
+
+
+def _too_large(max_bytes: int) -> UploadRejected:
+    return _reject(413, f"The file is larger than {max_bytes // (1024 * 1024)} MB", "too_large")
+
+
+class SpooledUpload:
+    """
+    A received upload, held in one place
+
+    Small uploads are one bytes object and large ones a temporary file.
+    ``source`` is handed to the PDF parser, which maps a spooled file
+    instead of reading it, and ``open`` gives the Storage uploader its own
+    read-only view of the same buffer, so the file is never copied whole.
+    Call ``close`` once both are done to remove the spooled file.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        size: int,
+        digest: str,
+        data: Optional[bytes] = None,
+        spool: Optional[Any] = None,
+    ):
+        self.filename = filename
+        self.size = size
+        # Hex SHA-256 of the content, as used by the resume cache
+        self.digest = digest
+        self.page_count: Optional[int] = None
+        self._data = data
+        self._spool = spool
+
+    @property
+    def path(self) -> Optional[str]:
+        """Path of the spooled file, or None for an upload held in memory"""
+        return self._spool.name if self._spool is not None else None
+
+    @property
+    def source(self) -> Union[bytes, str]:
+        """The content for the PDF parser: the bytes, or the spooled file's path"""
+        return self._data if self._spool is None else self.path
+
+    def open(self) -> BinaryIO:
+        """
+        Open an independent read-only stream over the content
+
+        A BytesIO over a bytes object shares its buffer, and a spooled file
+        is mapped rather than read, so neither copies the content.
+        """
+        if self._spool is None:
+            return io.BytesIO(self._data)
+        return mmap.mmap(self._spool.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self) -> None:
+        """Release the content, deleting the spooled file"""
+        self._data = None
+        if self._spool is not None:
+            self._spool.close()
+
+
+def _spool_chunks(chunks: Iterable[bytes]) -> Any:
+    """Start a spool file with the chunks read so far"""
+    spool = tempfile.NamedTemporaryFile(prefix="upload-", suffix=".pdf", dir=UPLOAD_SPOOL_DIR)
+    try:
+        spool.writelines(chunks)
+    except BaseException:
+        spool.close()
+        raise
+    return spool
+
+
+async def receive_upload(
+    file: Any,
+    max_bytes: int = UPLOAD_MAX_BYTES,
+    max_pages: int = UPLOAD_MAX_PAGES,
+) -> SpooledUpload:
+    """
+    Read an uploaded resume in chunks, checking and hashing it on the way
+
+    The first chunk must look like a PDF, and reading stops as soon as the
+    size limit is passed. Content beyond UPLOAD_SPOOL_BYTES goes to a
+    temporary file instead of memory. The page count is checked before the
+    upload is returned, so an oversized document is never stored or parsed
+    in full.
+
+    Args:
+        file: The UploadFile
+        max_bytes: Largest size accepted
+        max_pages: Most pages accepted
+
+    Returns:
+        The received SpooledUpload; the caller must close it
+
+    Raises:
+        UploadRejected: If the file is not a PDF, or is over a limit
+    """
+    hasher = hashlib.sha256()
+    chunks: List[bytes] = []
+    spool = None
+    size = 0
+    try:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                break
+            if size == 0 and _PDF_HEADER not in chunk[:_PDF_HEADER_WINDOW]:
+                raise _reject(415, "The file is not a PDF", "not_pdf")
+            size += len(chunk)
+            if size > max_bytes:
+                raise _too_large(max_bytes)
+            # Hashing a chunk takes well under a millisecond, so it stays
+            # on the event loop
+            hasher.update(chunk)
+            if spool is None:
+                chunks.append(chunk)
+                if size > UPLOAD_SPOOL_BYTES:
+                    spool = await run_io(_spool_chunks, chunks)
+                    chunks = []
+            else:
+                await run_io(spool.write, chunk)
+        if size == 0:
+            raise _reject(415, "The file is empty", "empty")
+        if spool is not None:
+            await run_io(spool.flush)
+    except BaseException:
+        if spool is not None:
+            spool.close()
+        raise
+
+    if spool is None:
+        upload = SpooledUpload(file.filename, size, hasher.hexdigest(), data=b"".join(chunks))
+    else:
+        upload = SpooledUpload(file.filename, size, hasher.hexdigest(), spool=spool)
+    del chunks
+    _upload_bytes.observe(size, held="memory" if spool is None else "file")
+
+    try:
+        upload.page_count = await run_cpu(count_pdf_pages, upload.source)
+    except BaseException:
+        upload.close()
+        raise
+    # A file PyPDF2 can't read is left to extraction to report, as before
+    if upload.page_count is not None and upload.page_count > max_pages:
+        upload.close()
+        raise _reject(413, f"The resume has more than {max_pages} pages", "too_many_pages")
+    return upload
+
+
+class UploadLimitMiddleware:
+    """
+    ASGI middleware that caps the request body size on upload routes
+
+    The cap is the file size limit plus UPLOAD_FORM_OVERHEAD_BYTES. Requests
+    whose Content-Length is over the cap are answered with a 413 before the
+    body is read. Bodies without one are counted as they stream in, and cut
+    off with a 413 once over the cap, so an oversized upload is never
+    spooled whole by the form parser.
+    """
+
+    def __init__(self, app, paths: Iterable[str], max_bytes: int = UPLOAD_MAX_BYTES):
+        self.app = app
+        self.paths = frozenset(paths)
+        self.max_bytes = max_bytes
+        self.max_body_bytes = max_bytes + UPLOAD_FORM_OVERHEAD_BYTES
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope.get("headers", []):
+            if name == b"content-length":
+                if value.isdigit() and int(value) > self.max_body_bytes:
+                    await self._reject(send)
+                    return
+                break
+
+        received = 0
+        rejected = False
+
+        async def limited_receive():
+            nonlocal received, rejected
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_bytes and not rejected:
+                    rejected = True
+                    await self._reject(send)
+                    # The app sees the client go away and stops reading
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message) -> None:
+            # Drop whatever the app answers once the 413 has been sent
+            if not rejected:
+                await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not rejected:
+                raise
+
+    async def _reject(self, send) -> None:
+        error = _too_large(self.max_bytes)
+        body = json.dumps({"detail": error.detail}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"connection", b"close"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
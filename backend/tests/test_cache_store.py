@@ -0,0 +1,86 @@
+import asyncio
+import threading
+
+import pytest
+
+from services.analysis_cache import AnalysisCache
+from services.cache_store import SQLiteCacheStore
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    return str(tmp_path / "analysis_cache.sqlite3")
+
+
+def test_entries_are_shared_between_store_instances(store_path):
+    # Two worker processes on one host open the same file
+    writer = SQLiteCacheStore(store_path)
+    reader = SQLiteCacheStore(store_path)
+
+    writer.set("key", {"match_score": 80}, ttl=60)
+
+    value, remaining = reader.get_with_ttl("key")
+    assert value == {"match_score": 80}
+    assert 59 < remaining <= 60
+    assert reader.stats()["hits"] == 1
+
+
+def test_expired_entries_are_misses_and_purged(store_path):
+    store = SQLiteCacheStore(store_path)
+    store.set("old", "value", ttl=-1)
+    store.set("fresh", "value", ttl=60)
+
+    assert store.get("old") is None
+    assert store.purge_expired() == 1
+    assert store.stats()["entries"] == 1
+
+
+def test_namespaces_are_isolated(store_path):
+    analyses = SQLiteCacheStore(store_path)
+    profiles = analyses.namespaced("job_profile")
+
+    analyses.set("key", "analysis", ttl=60)
+    profiles.set("key", "profile", ttl=60)
+    profiles.delete("key")
+
+    assert analyses.get("key") == "analysis"
+    assert profiles.get("key") is None
+
+
+def test_cache_falls_through_to_the_store_and_promotes(store_path):
+    SQLiteCacheStore(store_path).set("key", "value", ttl=60)
+    cache = AnalysisCache(store=SQLiteCacheStore(store_path))
+
+    assert cache.get("key") == "value"
+    assert cache.stats()["store_hits"] == 1
+
+    # The second read is served from process memory
+    cache.store = None
+    assert cache.get("key") == "value"
+    assert cache.stats()["hits"] == 2
+
+
+def test_async_access_keeps_store_calls_off_the_event_loop(store_path):
+    store = SQLiteCacheStore(store_path)
+    loop_thread = threading.get_ident()
+    store_threads = set()
+    original_get, original_set = store.get_with_ttl, store.set
+
+    def get_with_ttl(key):
+        store_threads.add(threading.get_ident())
+        return original_get(key)
+
+    def set_value(key, value, ttl):
+        store_threads.add(threading.get_ident())
+        original_set(key, value, ttl)
+
+    store.get_with_ttl, store.set = get_with_ttl, set_value
+
+    async def run():
+        writer = AnalysisCache(store=store)
+        await writer.set_async("key", "value", ttl=60)
+        reader = AnalysisCache(store=store)
+        return await reader.get_async("key"), await reader.get_async("missing")
+
+    assert asyncio.run(run()) == ("value", None)
+    assert store_threads and loop_thread not in store_threads
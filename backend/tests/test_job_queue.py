@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+
+from services import job_queue
+from services.job_queue import (
+    FAILED,
+    QUEUED,
+    SUCCEEDED,
+    JobQueue,
+    MemoryJobBackend,
+    QueueFullError,
+    SQLiteJobBackend,
+)
+
+
+async def _wait_until_finished(queue, job_id, timeout=2.0):
+    async def poll():
+        while True:
+            job = await queue.get(job_id)
+            if job["finished_at"] is not None:
+                return job
+            await asyncio.sleep(0.01)
+
+    return await asyncio.wait_for(poll(), timeout)
+
+
+async def _double(payload):
+    return {"value": payload["value"] * 2}
+
+
+async def _explode(payload):
+    raise RuntimeError("model unavailable")
+
+
+def test_jobs_run_and_record_their_result():
+    async def run():
+        queue = JobQueue(MemoryJobBackend(), workers=2)
+        queue.register("double", _double)
+        queue.start()
+        try:
+            job = await queue.submit("double", {"value": 21}, user_id="u1")
+            assert job["status"] == QUEUED
+            return await _wait_until_finished(queue, job["id"])
+        finally:
+            await queue.stop()
+
+    job = asyncio.run(run())
+    assert job["status"] == SUCCEEDED
+    assert job["result"] == {"value": 42}
+    assert job["user_id"] == "u1"
+    assert job["started_at"] <= job["finished_at"]
+
+
+def test_handler_errors_fail_the_job_not_the_worker():
+    async def run():
+        queue = JobQueue(MemoryJobBackend(), workers=1)
+        queue.register("explode", _explode)
+        queue.register("double", _double)
+        queue.start()
+        try:
+            failed = await queue.submit("explode", {})
+            succeeded = await queue.submit("double", {"value": 1})
+            return (
+                await _wait_until_finished(queue, failed["id"]),
+                await _wait_until_finished(queue, succeeded["id"]),
+            )
+        finally:
+            await queue.stop()
+
+    failed, succeeded = asyncio.run(run())
+    assert failed["status"] == FAILED
+    assert failed["error"] == "model unavailable"
+    assert succeeded["status"] == SUCCEEDED
+
+
+def test_submissions_are_refused_when_the_queue_is_full():
+    async def run():
+        # No workers started, so jobs stay queued
+        queue = JobQueue(MemoryJobBackend(), max_depth=2)
+        queue.register("double", _double)
+        first = await queue.submit("double", {"value": 1})
+        second = await queue.submit("double", {"value": 2})
+        assert (queue.position(first["id"]), queue.position(second["id"])) == (1, 2)
+        with pytest.raises(QueueFullError):
+            await queue.submit("double", {"value": 3})
+
+    asyncio.run(run())
+
+
+def test_unknown_job_kinds_are_rejected():
+    async def run():
+        queue = JobQueue(MemoryJobBackend())
+        with pytest.raises(ValueError):
+            await queue.submit("missing", {})
+
+    asyncio.run(run())
+
+
+def test_orphaned_jobs_are_taken_over_by_another_process(tmp_path, monkeypatch):
+    path = str(tmp_path / "jobs.sqlite3")
+    # Any unfinished job not refreshed by its owner counts as orphaned
+    monkeypatch.setattr(job_queue, "JOB_RECOVERY_AFTER_SECONDS", -1)
+
+    async def run():
+        # This process queues a job and dies before working it
+        dead = JobQueue(SQLiteJobBackend(path))
+        dead.register("double", _double)
+        job = await dead.submit("double", {"value": 5})
+
+        live = JobQueue(SQLiteJobBackend(path), workers=1)
+        live.register("double", _double)
+        live.start()
+        try:
+            return await _wait_until_finished(live, job["id"])
+        finally:
+            await live.stop()
+
+    job = asyncio.run(run())
+    assert job["status"] == SUCCEEDED
+    assert job["result"] == {"value": 10}
@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from services.model_scheduler import (
+    BATCH,
+    INTERACTIVE,
+    ModelRateLimited,
+    ModelScheduler,
+    TokenBucket,
+)
+
+
+def test_token_bucket_refills_over_time():
+    bucket = TokenBucket(60, now=0.0)
+    bucket.take(60, now=0.0)
+
+    assert bucket.wait_time(1, now=0.0) == pytest.approx(1.0)
+    assert bucket.wait_time(1, now=1.0) == 0.0
+    # Never more than a minute's worth
+    assert bucket.wait_time(60, now=600.0) == 0.0
+    bucket.take(60, now=600.0)
+    assert bucket.wait_time(1, now=600.0) > 0
+
+
+def test_token_bucket_pause_blocks_even_when_unlimited():
+    bucket = TokenBucket(0, now=0.0)
+    assert bucket.wait_time(10 ** 9, now=0.0) == 0.0
+
+    bucket.pause(5.0, now=0.0)
+    assert bucket.wait_time(1, now=2.0) == pytest.approx(3.0)
+
+
+def test_waiting_calls_start_in_lane_order():
+    async def run():
+        scheduler = ModelScheduler(max_concurrency=1, rpm=0, tpm=0)
+        started = []
+        await scheduler.acquire("m", 10, INTERACTIVE)
+
+        async def call(name, lane):
+            await scheduler.acquire("m", 10, lane)
+            started.append(name)
+            scheduler.release()
+
+        waiting = [
+            asyncio.ensure_future(call("batch", BATCH)),
+            asyncio.ensure_future(call("interactive", INTERACTIVE)),
+        ]
+        await asyncio.sleep(0.01)
+        assert scheduler.queued == 2
+
+        scheduler.release()
+        await asyncio.gather(*waiting)
+        return started
+
+    assert asyncio.run(run()) == ["interactive", "batch"]
+
+
+def test_calls_over_the_request_budget_time_out_as_rate_limited():
+    async def run():
+        scheduler = ModelScheduler(limits={"m": (2, 0)}, queue_timeout=0.05)
+        for _ in range(2):
+            await scheduler.acquire("m", 10, INTERACTIVE)
+            scheduler.release()
+        with pytest.raises(ModelRateLimited):
+            await scheduler.acquire("m", 10, INTERACTIVE)
+        return scheduler.queued
+
+    assert asyncio.run(run()) == 0
+
+
+def test_a_model_out_of_budget_does_not_hold_up_others():
+    async def run():
+        scheduler = ModelScheduler(limits={"slow": (1, 0)}, rpm=0, tpm=0)
+        await scheduler.acquire("slow", 10, INTERACTIVE)
+        scheduler.release()
+
+        blocked = asyncio.ensure_future(scheduler.acquire("slow", 10, INTERACTIVE))
+        await asyncio.sleep(0.01)
+        await asyncio.wait_for(scheduler.acquire("fast", 10, BATCH), timeout=0.5)
+        scheduler.release()
+
+        assert not blocked.done()
+        blocked.cancel()
+        await asyncio.gather(blocked, return_exceptions=True)
+        return scheduler.queued, scheduler.in_flight
+
+    assert asyncio.run(run()) == (0, 0)
+
+
+def test_provider_rate_limit_pauses_the_model():
+    async def run():
+        scheduler = ModelScheduler(rpm=0, tpm=0, queue_timeout=0.05)
+        scheduler.rate_limited("m", retry_after=30)
+        with pytest.raises(ModelRateLimited):
+            await scheduler.acquire("m", 10, INTERACTIVE)
+
+    asyncio.run(run())
@@ -0,0 +1,30 @@
+from benchmarks.bench_pdf_extraction import make_pdf
+from services.pdf_parser import count_pdf_pages, extract_pdf_document
+
+
+def test_count_pdf_pages(tmp_path):
+    pdf = make_pdf(3)
+    path = tmp_path / "resume.pdf"
+    path.write_bytes(pdf)
+
+    assert count_pdf_pages(pdf) == 3
+    assert count_pdf_pages(str(path)) == 3
+
+
+def test_count_pdf_pages_ignores_the_declared_count():
+    # Same length, so the cross-reference offsets stay valid
+    pdf = make_pdf(50).replace(b"/Count 50 >>", b"/Count 1 >> ")
+
+    assert count_pdf_pages(pdf) == 50
+
+
+def test_count_pdf_pages_of_a_non_pdf():
+    assert count_pdf_pages(b"%PDF-not really") is None
+
+
+def test_extract_pdf_document():
+    document = extract_pdf_document(make_pdf(2))
+
+    assert document["extracted"]
+    assert document["page_count"] == 2
+    assert len(document["text"].split()) > 100
@@ -0,0 +1,79 @@
+import pytest
+
+from services.rate_limiter import (
+    QuotaExceeded,
+    SlidingWindowLimiter,
+    SQLiteQuotaStore,
+    parse_limits,
+)
+
+
+def test_parse_limits():
+    assert parse_limits("20/60,300/86400") == [(20, 60), (300, 86400)]
+    assert parse_limits("") == []
+
+
+def test_requests_over_the_limit_are_rejected_without_being_counted():
+    limiter = SlidingWindowLimiter("analysis", [(3, 60)])
+    for _ in range(3):
+        limiter.check("u1", now=1000.0)
+
+    with pytest.raises(QuotaExceeded) as excinfo:
+        limiter.check("u1", now=1001.0)
+    assert excinfo.value.limit == 3
+    assert excinfo.value.retry_after >= 1
+
+    # Other users have their own counts
+    limiter.check("u2", now=1001.0)
+    assert limiter.stats()["rejected"] == 1
+
+
+def test_cost_counts_as_several_requests():
+    limiter = SlidingWindowLimiter("analysis", [(5, 60)])
+    limiter.check("u1", cost=4, now=1000.0)
+    with pytest.raises(QuotaExceeded):
+        limiter.check("u1", cost=2, now=1000.0)
+    limiter.check("u1", cost=1, now=1000.0)
+
+
+def test_previous_window_slides_out():
+    limiter = SlidingWindowLimiter("analysis", [(10, 60)])
+    # Fill the window [960, 1020)
+    limiter.check("u1", cost=10, now=960.0)
+
+    # Halfway through the next window, half of the previous one still counts
+    with pytest.raises(QuotaExceeded):
+        limiter.check("u1", cost=6, now=1050.0)
+    limiter.check("u1", cost=5, now=1050.0)
+
+
+def test_every_limit_is_enforced():
+    limiter = SlidingWindowLimiter("analysis", [(10, 60), (3, 3600)])
+    for _ in range(3):
+        limiter.check("u1", now=1000.0)
+    with pytest.raises(QuotaExceeded) as excinfo:
+        limiter.check("u1", now=1000.0)
+    assert excinfo.value.window == 3600
+
+
+def test_counts_are_shared_across_instances_through_the_store(tmp_path):
+    store_path = str(tmp_path / "rate_limits.sqlite3")
+    # Two worker processes on one host, each with its own store connection
+    first = SlidingWindowLimiter("analysis", [(4, 60)], SQLiteQuotaStore(store_path))
+    second = SlidingWindowLimiter("analysis", [(4, 60)], SQLiteQuotaStore(store_path))
+
+    first.check("u1", cost=2, now=1000.0)
+    second.check("u1", cost=1, now=1000.0)
+    first.sync(now=1001.0)
+    second.sync(now=1001.0)
+
+    # The second worker now knows about the first worker's requests
+    second.check("u1", now=1002.0)
+    with pytest.raises(QuotaExceeded):
+        second.check("u1", now=1002.0)
+
+    second.sync(now=1003.0)
+    first.sync(now=1003.0)
+    with pytest.raises(QuotaExceeded):
+        first.check("u1", now=1004.0)
+    assert first.stats()["unsynced_windows"] == 0
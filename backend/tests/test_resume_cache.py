@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+
+from benchmarks.bench_pdf_extraction import make_pdf
+from services import resume_cache
+from services.resume_cache import (
+    ResumeProfileStore,
+    _encode,
+    get_resume_profile,
+    pdf_fingerprint,
+)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = ResumeProfileStore(str(tmp_path / "resume_cache.sqlite3"), max_bytes=1024 * 1024)
+    monkeypatch.setattr(resume_cache, "_store", store)
+    monkeypatch.setattr(resume_cache, "RESUME_CACHE_REMOTE", "")
+    return store
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    calls = []
+    build = resume_cache.build_resume_profile
+
+    def counting_build(pdf):
+        calls.append(pdf)
+        return build(pdf)
+
+    monkeypatch.setattr(resume_cache, "build_resume_profile", counting_build)
+    return calls
+
+
+def test_fingerprint_is_the_same_for_bytes_and_spooled_files(tmp_path):
+    pdf = make_pdf(2)
+    path = tmp_path / "upload.pdf"
+    path.write_bytes(pdf)
+
+    assert pdf_fingerprint(pdf) == pdf_fingerprint(str(path))
+
+
+def test_store_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "resume_cache.sqlite3")
+    profile = {"text": "Python developer", "extracted": True}
+
+    ResumeProfileStore(path, max_bytes=1024).set("key", _encode(profile))
+
+    assert ResumeProfileStore(path, max_bytes=1024).get("key") == profile
+
+
+def test_store_evicts_least_recently_used_profiles(tmp_path):
+    blob = _encode({"text": "x" * 100})
+    store = ResumeProfileStore(str(tmp_path / "resume_cache.sqlite3"), max_bytes=len(blob) * 2)
+
+    store.set("old", blob)
+    store.set("used", blob)
+    store.get("old")
+    store.set("new", blob)
+
+    assert store.get("used") is None
+    assert store.get("old") is not None
+    assert store.get("new") is not None
+    assert store.stats()["evictions"] == 1
+
+
+def test_profiles_are_parsed_once_per_content(store, builds, tmp_path):
+    pdf = make_pdf(2)
+    path = tmp_path / "upload.pdf"
+    path.write_bytes(pdf)
+
+    async def run():
+        first = await get_resume_profile(pdf)
+        # The same content uploaded again, now spooled to disk
+        second = await get_resume_profile(str(path))
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert len(builds) == 1
+    assert (first["cached"], second["cached"]) == (False, True)
+    assert first["extracted"] and first["words"] > 0
+    assert second["text"] == first["text"]
+    assert store.stats()["entries"] == 1
+
+
+def test_concurrent_uploads_of_one_file_share_a_parse(store, builds):
+    pdf = make_pdf(2)
+
+    async def run():
+        return await asyncio.gather(*(get_resume_profile(pdf) for _ in range(3)))
+
+    profiles = asyncio.run(run())
+
+    assert len(builds) == 1
+    assert len({profile["text"] for profile in profiles}) == 1
+
+
+def test_pdfs_without_text_are_not_cached(store, builds):
+    pdf = make_pdf(1, lines_per_page=0)
+
+    async def run():
+        return [await get_resume_profile(pdf) for _ in range(2)]
+
+    profiles = asyncio.run(run())
+
+    assert not profiles[0]["extracted"]
+    assert len(builds) == 2
+    assert store.stats()["entries"] == 0
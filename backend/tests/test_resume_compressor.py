@@ -0,0 +1,38 @@
+from services.resume_compressor import compress_resume, estimate_tokens
+
+
+def _run_on(words: int, start: int = 0) -> str:
+    # No sentence punctuation, so the whole run is a single unit, as
+    # extracted text is once its line breaks are collapsed
+    return " ".join(f"word{start + i}" for i in range(words))
+
+
+def test_single_unit_sections_are_truncated_not_dropped():
+    text = "SKILLS: Python Django Kubernetes EXPERIENCE: {} EDUCATION: {}".format(
+        _run_on(2000), _run_on(1000, 5000)
+    )
+    assert estimate_tokens(text) > 4000
+
+    compressed = compress_resume(text, max_tokens=2000)
+
+    assert "EXPERIENCE:" in compressed
+    assert "EDUCATION:" in compressed
+    assert "SKILLS: Python Django Kubernetes" in compressed
+    assert 1800 < estimate_tokens(compressed) <= 2000
+
+
+def test_headerless_text_is_truncated_at_a_word_boundary():
+    text = _run_on(3000)
+
+    compressed = compress_resume(text, max_tokens=500)
+
+    assert compressed
+    assert text.startswith(compressed)
+    assert text[len(compressed)] == " "
+    assert 450 < estimate_tokens(compressed) <= 500
+
+
+def test_text_within_budget_is_kept_whole():
+    text = "SUMMARY: Backend engineer. SKILLS: Python, Go"
+    compressed = compress_resume(text, max_tokens=2000)
+    assert compressed == "SUMMARY: Backend engineer.\nSKILLS: Python, Go"
@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from services.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def run():
+        return await asyncio.gather(*(flight.do("key", work) for _ in range(5)))
+
+    assert asyncio.run(run()) == ["result"] * 5
+    assert calls == 1
+    assert flight.stats()["coalesced"] == 4
+    assert flight.in_flight() == 0
+
+
+def test_errors_reach_every_caller():
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.01)
+        raise ValueError("bad resume")
+
+    async def run():
+        return await asyncio.gather(
+            flight.do("key", work), flight.do("key", work), return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+    assert [type(result) for result in results] == [ValueError, ValueError]
+    assert flight.stats()["errors"] == 1
+
+
+def test_cancelling_one_waiter_keeps_the_flight_running():
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def run():
+        first = asyncio.ensure_future(flight.do("key", work))
+        second = asyncio.ensure_future(flight.do("key", work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second, first.cancelled()
+
+    assert asyncio.run(run()) == ("result", True)
+    assert flight.stats()["cancelled"] == 0
+
+
+def test_cancelling_the_last_waiter_cancels_the_flight():
+    flight = SingleFlight()
+    started = finished = False
+
+    async def work():
+        nonlocal started, finished
+        started = True
+        await asyncio.sleep(1)
+        finished = True
+
+    async def run():
+        waiters = [asyncio.ensure_future(flight.do("key", work)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        for waiter in waiters:
+            waiter.cancel()
+        for waiter in waiters:
+            with pytest.raises(asyncio.CancelledError):
+                await waiter
+        # Let the shared task see its cancellation; checked while the loop
+        # still runs, since asyncio.run cancels leftover tasks on exit
+        await asyncio.sleep(0.01)
+        return flight.stats()["cancelled"], flight.in_flight()
+
+    assert asyncio.run(run()) == (1, 0)
+    assert started and not finished
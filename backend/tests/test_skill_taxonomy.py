@@ -0,0 +1,35 @@
+import pytest
+
+from services.skill_taxonomy import get_skill_taxonomy
+
+
+@pytest.fixture(scope="module")
+def taxonomy():
+    return get_skill_taxonomy()
+
+
+@pytest.mark.parametrize("text", [
+    "language",
+    "English language",
+    "clutter",
+    "flatter",
+    "postmen",
+    "Kept the office free of clutter and tried not to flatter the postmen",
+])
+def test_common_words_are_not_skills(taxonomy, text):
+    assert taxonomy.find_ids(text) == []
+
+
+@pytest.mark.parametrize("text, skill_id", [
+    ("Deployed services on Kubernetis", "kubernetes"),
+    ("Built apps with Flutter", "flutter"),
+    ("Tested APIs in Postman", "api_testing"),
+    ("Wrote firmware in the C language", "c"),
+])
+def test_skills_are_found(taxonomy, text, skill_id):
+    assert skill_id in taxonomy.find_ids(text)
+
+
+def test_lookup_tolerates_typos(taxonomy):
+    assert taxonomy.lookup("Kubernates") == "kubernetes"
+    assert taxonomy.lookup("ReactJS") == taxonomy.lookup("React")
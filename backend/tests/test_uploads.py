@@ -0,0 +1,147 @@
+import asyncio
+import io
+import json
+import os
+
+import pytest
+
+from benchmarks.bench_pdf_extraction import make_pdf
+from services import uploads
+from services.resume_cache import pdf_fingerprint
+from services.uploads import UploadLimitMiddleware, UploadRejected, receive_upload
+
+
+class FakeUploadFile:
+    """The part of UploadFile that receive_upload uses"""
+
+    def __init__(self, content: bytes, filename: str = "resume.pdf"):
+        self.filename = filename
+        self._content = io.BytesIO(content)
+
+    async def read(self, size: int = -1) -> bytes:
+        return self._content.read(size)
+
+
+def _receive(content: bytes, **limits):
+    return asyncio.run(receive_upload(FakeUploadFile(content), **limits))
+
+
+def test_upload_at_the_page_limit_is_accepted():
+    pdf = make_pdf(3)
+    upload = _receive(pdf, max_pages=3)
+    try:
+        assert upload.page_count == 3
+        assert upload.size == len(pdf)
+        assert upload.digest == pdf_fingerprint(pdf)
+    finally:
+        upload.close()
+
+
+def test_upload_one_page_over_the_limit_is_rejected():
+    with pytest.raises(UploadRejected) as excinfo:
+        _receive(make_pdf(4), max_pages=3)
+    assert excinfo.value.status_code == 413
+    assert excinfo.value.reason == "too_many_pages"
+
+
+def test_oversized_upload_is_rejected_while_reading(monkeypatch):
+    monkeypatch.setattr(uploads, "UPLOAD_CHUNK_BYTES", 1024)
+    pdf = make_pdf(5)
+
+    with pytest.raises(UploadRejected) as excinfo:
+        _receive(pdf, max_bytes=len(pdf) - 1)
+    assert excinfo.value.status_code == 413
+    assert excinfo.value.reason == "too_large"
+
+
+@pytest.mark.parametrize("content, reason", [
+    (b"hello world", "not_pdf"),
+    (b"", "empty"),
+])
+def test_non_pdf_uploads_are_rejected(content, reason):
+    with pytest.raises(UploadRejected) as excinfo:
+        _receive(content)
+    assert excinfo.value.status_code == 415
+    assert excinfo.value.reason == reason
+
+
+def test_large_uploads_are_spooled_to_disk(monkeypatch):
+    monkeypatch.setattr(uploads, "UPLOAD_CHUNK_BYTES", 4096)
+    monkeypatch.setattr(uploads, "UPLOAD_SPOOL_BYTES", 8192)
+    pdf = make_pdf(10)
+
+    upload = _receive(pdf)
+    path = upload.path
+    assert path is not None and upload.source == path
+    with upload.open() as stream:
+        assert stream.read() == pdf
+    assert upload.digest == pdf_fingerprint(pdf)
+
+    upload.close()
+    assert not os.path.exists(path)
+
+
+def _limited_app(monkeypatch, max_bytes):
+    monkeypatch.setattr(uploads, "UPLOAD_FORM_OVERHEAD_BYTES", 0)
+    seen = {"bytes": 0, "disconnected": False}
+
+    async def app(scope, receive, send):
+        # Reads the whole body, as the form parser does
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                seen["disconnected"] = True
+                raise RuntimeError("client went away")
+            seen["bytes"] += len(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    return UploadLimitMiddleware(app, paths=["/analyze"], max_bytes=max_bytes), seen
+
+
+def _call(app, path, chunks, headers=()):
+    chunks = list(chunks)
+    sent = []
+
+    async def receive():
+        if chunks:
+            body = chunks.pop(0)
+            return {"type": "http.request", "body": body, "more_body": bool(chunks)}
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "POST", "path": path, "headers": list(headers)}
+    asyncio.run(app(scope, receive, send))
+    return sent[0]["status"], sent[1]["body"]
+
+
+def test_body_without_content_length_is_cut_off_mid_stream(monkeypatch):
+    app, seen = _limited_app(monkeypatch, max_bytes=1000)
+
+    status, body = _call(app, "/analyze", [b"x" * 400] * 10)
+
+    assert status == 413
+    assert "larger than" in json.loads(body)["detail"]
+    # Reading stopped at the first chunk over the cap
+    assert seen["bytes"] == 800
+    assert seen["disconnected"]
+
+
+def test_declared_content_length_over_the_cap_is_rejected_before_reading(monkeypatch):
+    app, seen = _limited_app(monkeypatch, max_bytes=1000)
+
+    status, _ = _call(app, "/analyze", [b"x" * 2000], headers=[(b"content-length", b"2000")])
+
+    assert status == 413
+    assert seen["bytes"] == 0
+
+
+def test_bodies_within_the_cap_and_other_routes_pass_through(monkeypatch):
+    app, _ = _limited_app(monkeypatch, max_bytes=1000)
+
+    assert _call(app, "/analyze", [b"x" * 400, b"x" * 400]) == (200, b"ok")
+    assert _call(app, "/health", [b"x" * 400] * 10) == (200, b"ok")
@@ -1,11 +1,16 @@
 import os
 from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from dotenv import load_dotenv  # type: ignore
 import google.generativeai as genai  # type: ignore
 from services.pdf_parser import extract_text_from_pdf
-from services.resume_analyzer import analyze_resume_with_gemini
+from services.resume_analyzer import analyze_resume, provider_health, prewarm_providers
+from services.model_registry import (
+    MODEL_PREWARM, start_keepalive, stop_keepalive, close_openai_session,
+)
+from services.skill_taxonomy import get_skill_taxonomy
+from services.metrics import REGISTRY, CONTENT_TYPE as METRICS_CONTENT_TYPE
 from services.firebase_admin import save_resume_file
 from services.database import FirestoreDB
 from services.auth import get_current_user
@@ -41,6 +46,29 @@ app.add_middleware(
 )
 
 
+@app.on_event("startup")
+async def prewarm_models():
+    # Build the shared models and open the provider connections before the
+    # first request, so it doesn't pay for the connection setup
+    if MODEL_PREWARM:
+        timings = await prewarm_providers()
+        print(f"Pre-warmed providers: {timings}")
+    start_keepalive()
+
+
+@app.on_event("shutdown")
+async def close_model_clients():
+    stop_keepalive()
+    await close_openai_session()
+
+
+@app.on_event("startup")
+async def load_skill_taxonomy():
+    # Build the skill index once, before the first request needs it
+    taxonomy = get_skill_taxonomy()
+    print(f"Loaded skill taxonomy: {taxonomy.stats()}")
+
+
 @app.get("/")
 async def welcome():
     return {"message": "Welcome to Naukri Guru API"}
@@ -51,6 +79,18 @@ async def health_check():
     return {"status": "ok"}
 
 
+@app.get("/metrics")
+async def metrics():
+    """Model call, token, cost and cache metrics in the Prometheus text format"""
+    return PlainTextResponse(REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
+
+
+@app.get("/health/providers")
+async def provider_health_check():
+    """Circuit breaker state and routing signals for each model provider"""
+    return provider_health()
+
+
 @app.post("/analyze")
 async def analyze_resume_endpoint(
     file: UploadFile = File(...),
@@ -82,7 +122,7 @@ async def analyze_resume_endpoint(
             raise HTTPException(status_code=500, detail="Failed to save resume")
 
         # Analyze resume
-        analysis_result = await analyze_resume_with_gemini(resume_text, job_description)
+        analysis_result = await analyze_resume(resume_text, job_description)
 
         # Save analysis result in background
         analysis_data = {"job_description": job_description, **analysis_result}
@@ -205,7 +245,7 @@ async def analyze_resume_dev(
         resume_text = extract_text_from_pdf(file_content)
 
         # Analyze resume
-        analysis_result = await analyze_resume_with_gemini(resume_text, job_description)
+        analysis_result = await analyze_resume(resume_text, job_description)
 
         # Save analysis result
         analysis_data = {"job_description": job_description, **analysis_result}
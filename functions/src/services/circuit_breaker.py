@@ -0,0 +1,269 @@
+import os
+import time
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the provider's circuit is open"""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for one model provider.
+
+    Outcomes are kept in a rolling time window. Once the window holds at
+    least ``min_calls`` calls and either the error rate or the rate of calls
+    slower than ``slow_call_seconds`` reaches its threshold, the circuit
+    opens and the provider is skipped. After ``open_seconds`` it goes
+    half-open and lets ``half_open_max_calls`` trial calls through: a
+    success closes it again, a failure re-opens it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        window_seconds: float = 60.0,
+        min_calls: int = 5,
+        error_rate_threshold: float = 0.5,
+        slow_call_seconds: float = 30.0,
+        slow_call_rate_threshold: float = 0.8,
+        open_seconds: float = 30.0,
+        half_open_max_calls: int = 1,
+    ):
+        self.name = name
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.error_rate_threshold = error_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+
+        self.state = CLOSED
+        self.opened_at: Optional[float] = None
+        self.times_opened = 0
+        self.rejected = 0
+        self._half_open_in_flight = 0
+        # (timestamp, success, latency)
+        self._outcomes: Deque[Tuple[float, bool, float]] = deque()
+        self._lock = threading.Lock()
+
+    def is_available(self) -> bool:
+        """Whether a call could currently be let through, without reserving it"""
+        with self._lock:
+            self._maybe_half_open()
+            if self.state == OPEN:
+                return False
+            if self.state == HALF_OPEN:
+                return self._half_open_in_flight < self.half_open_max_calls
+            return True
+
+    def acquire(self) -> None:
+        """
+        Reserve permission for a call
+
+        Raises:
+            CircuitOpenError: If the circuit is open or the half-open trial slots are taken
+        """
+        with self._lock:
+            self._maybe_half_open()
+            if self.state == OPEN or (
+                self.state == HALF_OPEN and self._half_open_in_flight >= self.half_open_max_calls
+            ):
+                self.rejected += 1
+                raise CircuitOpenError(f"Circuit for {self.name} is {self.state}")
+            if self.state == HALF_OPEN:
+                self._half_open_in_flight += 1
+
+    def release(self) -> None:
+        """Give back a reservation whose call was cancelled before completing"""
+        with self._lock:
+            if self.state == HALF_OPEN and self._half_open_in_flight > 0:
+                self._half_open_in_flight -= 1
+
+    def record_success(self, latency: float) -> None:
+        """Record a successful call"""
+        self._record(True, latency)
+
+    def record_failure(self, latency: float) -> None:
+        """Record a failed call"""
+        self._record(False, latency)
+
+    def record_abandoned(self, latency: float) -> None:
+        """
+        Record a call cancelled after running for a while, such as a hedged
+        call that lost the race to a faster provider
+
+        It is neither a success nor a failure, but it took at least
+        ``latency`` seconds, so that time is kept as the call's latency and
+        counts towards the slow call rate. A half-open trial slot is given
+        back without closing the circuit.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+                return
+            self._outcomes.append((now, True, latency))
+            self._prune(now)
+            if self.state == CLOSED and len(self._outcomes) >= self.min_calls:
+                if self._rates()[1] >= self.slow_call_rate_threshold:
+                    self._open(now)
+
+    def error_rate(self) -> float:
+        """Get the error rate over the rolling window"""
+        with self._lock:
+            self._prune(time.monotonic())
+            return self._rates()[0]
+
+    def median_latency(self) -> Optional[float]:
+        """Get the median latency of successful calls over the rolling window"""
+        with self._lock:
+            self._prune(time.monotonic())
+            latencies = sorted(latency for _, success, latency in self._outcomes if success)
+        if not latencies:
+            return None
+        return latencies[len(latencies) // 2]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get the breaker state for introspection
+
+        Returns:
+            Dict containing state, window rates and counters
+        """
+        median = self.median_latency()
+        with self._lock:
+            self._maybe_half_open()
+            self._prune(time.monotonic())
+            error_rate, slow_rate = self._rates()
+            return {
+                "name": self.name,
+                "state": self.state,
+                "calls_in_window": len(self._outcomes),
+                "error_rate": round(error_rate, 4),
+                "slow_call_rate": round(slow_rate, 4),
+                "median_latency": round(median, 3) if median is not None else None,
+                "times_opened": self.times_opened,
+                "rejected": self.rejected,
+                "seconds_until_half_open": (
+                    max(0.0, round(self.opened_at + self.open_seconds - time.monotonic(), 1))
+                    if self.state == OPEN and self.opened_at is not None
+                    else None
+                ),
+            }
+
+    def _record(self, success: bool, latency: float) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+                if success:
+                    self.state = CLOSED
+                    self.opened_at = None
+                    self._outcomes.clear()
+                else:
+                    self._open(now)
+                    return
+
+            self._outcomes.append((now, success, latency))
+            self._prune(now)
+            if self.state == CLOSED and len(self._outcomes) >= self.min_calls:
+                error_rate, slow_rate = self._rates()
+                if (
+                    error_rate >= self.error_rate_threshold
+                    or slow_rate >= self.slow_call_rate_threshold
+                ):
+                    self._open(now)
+
+    def _open(self, now: float) -> None:
+        self.state = OPEN
+        self.opened_at = now
+        self.times_opened += 1
+        self._half_open_in_flight = 0
+
+    def _maybe_half_open(self) -> None:
+        if (
+            self.state == OPEN
+            and self.opened_at is not None
+            and time.monotonic() - self.opened_at >= self.open_seconds
+        ):
+            self.state = HALF_OPEN
+            self._half_open_in_flight = 0
+
+    def _prune(self, now: float) -> None:
+        while self._outcomes and now - self._outcomes[0][0] > self.window_seconds:
+            self._outcomes.popleft()
+
+    def _rates(self) -> Tuple[float, float]:
+        if not self._outcomes:
+            return 0.0, 0.0
+        total = len(self._outcomes)
+        failures = sum(1 for _, success, _ in self._outcomes if not success)
+        slow = sum(1 for _, _, latency in self._outcomes if latency >= self.slow_call_seconds)
+        return failures / total, slow / total
+
+
+# Breakers shared by every analysis in this process
+breakers: Dict[str, CircuitBreaker] = {}
+
+# Extra expected seconds per position in the preference order, so a less
+# preferred provider only moves ahead when it is clearly faster or healthier
+PREFERENCE_PENALTY_SECONDS = float(os.environ.get("PROVIDER_PREFERENCE_PENALTY", "2"))
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Get the circuit breaker for a provider, creating it on first use"""
+    breaker = breakers.get(name)
+    if breaker is None:
+        breaker = breakers[name] = CircuitBreaker(
+            name,
+            window_seconds=float(os.environ.get("BREAKER_WINDOW_SECONDS", "60")),
+            min_calls=int(os.environ.get("BREAKER_MIN_CALLS", "5")),
+            error_rate_threshold=float(os.environ.get("BREAKER_ERROR_RATE", "0.5")),
+            slow_call_seconds=float(os.environ.get("BREAKER_SLOW_CALL_SECONDS", "30")),
+            slow_call_rate_threshold=float(os.environ.get("BREAKER_SLOW_CALL_RATE", "0.8")),
+            open_seconds=float(os.environ.get("BREAKER_OPEN_SECONDS", "30")),
+        )
+    return breaker
+
+
+def route_providers(providers: List[Any]) -> List[Any]:
+    """
+    Drop providers whose circuit is open and order the rest by expected
+    latency, weighted by error rate and preference
+
+    Args:
+        providers: Objects with a ``name`` attribute, in order of preference
+
+    Returns:
+        The available providers, fastest and healthiest first
+    """
+    medians = {p.name: get_breaker(p.name).median_latency() for p in providers}
+    known = [median for median in medians.values() if median is not None]
+    # Providers without recent data are assumed to be as slow as the slowest known one
+    unknown_latency = max(known) if known else 0.0
+
+    scored = []
+    for preference, provider in enumerate(providers):
+        breaker = get_breaker(provider.name)
+        if not breaker.is_available():
+            continue
+        median = medians[provider.name]
+        expected = unknown_latency if median is None else median
+        score = expected * (1 + breaker.error_rate()) + preference * PREFERENCE_PENALTY_SECONDS
+        scored.append((score, preference, provider))
+
+    scored.sort(key=lambda item: (item[0], item[1]))
+    return [provider for _, _, provider in scored]
+
+
+def breaker_snapshot() -> List[Dict[str, Any]]:
+    """Get the state of every provider's circuit breaker"""
+    return [breaker.snapshot() for breaker in breakers.values()]
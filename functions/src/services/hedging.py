@@ -0,0 +1,241 @@
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from .circuit_breaker import CircuitOpenError, get_breaker
+from .model_scheduler import ModelRateLimited
+from .model_telemetry import record_retry
+
+logger = logging.getLogger(__name__)
+
+
+class AllProvidersFailed(Exception):
+    """Raised when no provider produced a valid result"""
+
+    def __init__(self, errors: Dict[str, str]):
+        self.errors = errors
+        super().__init__(f"All providers failed: {errors}")
+
+
+class LatencyTracker:
+    """
+    Rolling window of recent call latencies for one provider
+
+    Holds successful calls, and calls abandoned as too slow with the time
+    they had run, which is a lower bound on their latency.
+    """
+
+    def __init__(self, window: int = 100, min_samples: int = 5):
+        self.min_samples = min_samples
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def record(self, latency: float) -> None:
+        """Record the latency of a call in seconds"""
+        self._samples.append(latency)
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        """
+        Get a latency percentile over the window
+
+        Args:
+            percentile: Percentile between 0 and 100
+
+        Returns:
+            Latency in seconds, or None if there are too few samples
+        """
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, max(0, math.ceil(percentile / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+
+class ProviderSpec:
+    """
+    A model provider taking part in an analysis
+
+    ``call`` must return a fully parsed and validated result, or raise.
+    """
+
+    def __init__(self, name: str, call: Callable[[], Awaitable[Any]], budget: float):
+        self.name = name
+        self.call = call
+        self.budget = budget
+
+
+# Latency windows shared by every analysis in this process
+latency_trackers: Dict[str, LatencyTracker] = {}
+
+hedging_stats = {"calls": 0, "hedges_launched": 0, "secondary_wins": 0}
+
+
+def get_latency_tracker(name: str) -> LatencyTracker:
+    """Get the latency tracker for a provider, creating it on first use"""
+    tracker = latency_trackers.get(name)
+    if tracker is None:
+        tracker = latency_trackers[name] = LatencyTracker()
+    return tracker
+
+
+async def _timed_call(spec: ProviderSpec, slow_after: Optional[float] = None) -> Any:
+    breaker = get_breaker(spec.name)
+    breaker.acquire()
+    start = time.monotonic()
+    try:
+        result = await asyncio.wait_for(spec.call(), timeout=spec.budget)
+    except asyncio.CancelledError:
+        elapsed = time.monotonic() - start
+        if slow_after is not None and elapsed >= slow_after:
+            # Lost a hedge race after outrunning the hedge delay: the call
+            # was slow, and took at least this long
+            breaker.record_abandoned(elapsed)
+            get_latency_tracker(spec.name).record(elapsed)
+        else:
+            breaker.release()
+        raise
+    except ModelRateLimited:
+        # A rate limit says nothing about the provider's health
+        breaker.release()
+        raise
+    except Exception:
+        breaker.record_failure(time.monotonic() - start)
+        raise
+
+    latency = time.monotonic() - start
+    breaker.record_success(latency)
+    get_latency_tracker(spec.name).record(latency)
+    return result
+
+
+async def sequential_call(providers: List[ProviderSpec]) -> Tuple[Any, str]:
+    """
+    Try providers one after another until one returns a valid result
+
+    Args:
+        providers: Providers in order of preference
+
+    Returns:
+        Tuple of (result, provider name)
+
+    Raises:
+        AllProvidersFailed: If every provider failed
+    """
+    errors: Dict[str, str] = {}
+    for attempt, spec in enumerate(providers, start=1):
+        logger.info(f"Attempt {attempt}: Using {spec.name}")
+        if attempt > 1:
+            record_retry(spec.name, "fallback")
+        try:
+            return await _timed_call(spec), spec.name
+        except asyncio.TimeoutError:
+            logger.error(f"Request timed out on attempt {attempt} ({spec.name})")
+            errors[spec.name] = "timeout"
+        except CircuitOpenError as e:
+            logger.info(f"Skipping {spec.name}: {str(e)}")
+            errors[spec.name] = "circuit open"
+        except ModelRateLimited as e:
+            logger.warning(f"Skipping {spec.name}: {str(e)}")
+            errors[spec.name] = "rate limited"
+        except Exception as e:
+            logger.error(f"Error during analysis on attempt {attempt} ({spec.name}): {str(e)}")
+            errors[spec.name] = str(e)
+    raise AllProvidersFailed(errors)
+
+
+async def hedged_call(
+    providers: List[ProviderSpec],
+    percentile: float = 95.0,
+    default_delay: float = 8.0,
+    min_delay: float = 1.0,
+) -> Tuple[Any, str]:
+    """
+    Call providers with hedging: if the most recently launched provider has
+    not answered within ``percentile`` of its recent latency, the next
+    provider is launched concurrently. A failed provider immediately starts
+    the next one. The first valid result wins and the others are cancelled.
+
+    Args:
+        providers: Providers in order of preference
+        percentile: Latency percentile after which to hedge
+        default_delay: Hedge delay used until a provider has enough samples
+        min_delay: Lower bound on the hedge delay
+
+    Returns:
+        Tuple of (result, provider name)
+
+    Raises:
+        AllProvidersFailed: If every provider failed
+    """
+    hedging_stats["calls"] += 1
+    pending: Dict["asyncio.Future[Any]", ProviderSpec] = {}
+    errors: Dict[str, str] = {}
+    next_index = 0
+    last_launched: Optional[ProviderSpec] = None
+
+    def launch(reason: Optional[str] = None) -> None:
+        nonlocal next_index, last_launched
+        spec = providers[next_index]
+        next_index += 1
+        last_launched = spec
+        logger.info(f"Launching {spec.name} ({len(pending) + 1} in flight)")
+        if reason:
+            record_retry(spec.name, reason)
+        pending[asyncio.ensure_future(_timed_call(spec, hedge_delay(spec)))] = spec
+
+    def hedge_delay(spec: ProviderSpec) -> float:
+        observed = get_latency_tracker(spec.name).percentile(percentile)
+        delay = default_delay if observed is None else observed
+        return min(max(delay, min_delay), spec.budget)
+
+    try:
+        launch()
+        while pending:
+            timeout = None
+            if next_index < len(providers) and last_launched is not None:
+                timeout = hedge_delay(last_launched)
+
+            done, _ = await asyncio.wait(
+                list(pending), timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+
+            if not done:
+                hedging_stats["hedges_launched"] += 1
+                logger.info(f"{last_launched.name} is slow, hedging with the next provider")
+                launch("hedge")
+                continue
+
+            failed = 0
+            for task in done:
+                spec = pending.pop(task)
+                failed += 1
+                if task.cancelled():
+                    errors[spec.name] = "cancelled"
+                    continue
+                error = task.exception()
+                if error is None:
+                    if spec is not providers[0]:
+                        hedging_stats["secondary_wins"] += 1
+                    return task.result(), spec.name
+                if isinstance(error, asyncio.TimeoutError):
+                    errors[spec.name] = "timeout"
+                elif isinstance(error, ModelRateLimited):
+                    errors[spec.name] = "rate limited"
+                else:
+                    errors[spec.name] = str(error)
+                logger.error(f"Provider {spec.name} failed: {errors[spec.name]}")
+
+            # Nothing valid yet; replace each failed provider right away,
+            # even while slower ones are still in flight
+            for _ in range(min(failed, len(providers) - next_index)):
+                launch("fallback")
+
+        raise AllProvidersFailed(errors)
+    finally:
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,411 @@
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+_WHITESPACE = " \t\r\n"
+_ESCAPES = {
+    "n": "\n",
+    "t": "\t",
+    "r": "\r",
+    "b": "\b",
+    "f": "\f",
+    "/": "/",
+    "\\": "\\",
+    '"': '"',
+    "'": "'",
+}
+_LITERALS = {
+    "true": True,
+    "false": False,
+    "null": None,
+    "none": None,
+    "nan": None,
+    "infinity": None,
+}
+
+# Parser modes
+_SEEK = 0
+_STRUCTURE = 1
+_STRING = 2
+_QUOTE_PENDING = 3
+_COMMA_PENDING = 4
+_BARE = 5
+_DONE = 6
+
+# Frame expectations
+_EXPECT_KEY = "key"
+_EXPECT_COLON = "colon"
+_EXPECT_VALUE = "value"
+_EXPECT_COMMA = "comma"
+
+
+class _Frame:
+    """An open object or array on the parser stack"""
+
+    __slots__ = ("container", "expect", "key", "parent_key")
+
+    def __init__(self, container: Any, expect: str, parent_key: Optional[str]):
+        self.container = container
+        self.expect = expect
+        self.key: Optional[str] = None
+        self.parent_key = parent_key
+
+
+class TolerantJSONParser:
+    """
+    Single-pass, linear-time JSON parser that repairs common model output
+    defects: surrounding prose and code fences, trailing or missing commas,
+    unquoted keys, single-quoted strings, unescaped quotes inside strings,
+    Python literals and truncated tails.
+
+    Text can be fed incrementally; ``feed`` reports each top-level field of
+    the root object as soon as its value is complete. Every character is
+    inspected a bounded number of times, so adversarial input cannot cause
+    the backtracking blow-ups of regex-based repair.
+    """
+
+    def __init__(self, object_only: bool = False):
+        """
+        Create a parser
+
+        Args:
+            object_only: Only accept an object as the root, skipping any
+                bracketed prose before it such as "Note [1]:"
+        """
+        self.root: Any = None
+        self._stack: List[_Frame] = []
+        self._mode = _SEEK
+        self._root_chars = "{" if object_only else "{["
+        self._completed: List[Tuple[str, Any]] = []
+
+        # String state
+        self._buf: List[str] = []
+        self._quote = '"'
+        self._is_key = False
+        self._escape = False
+        self._hex: Optional[List[str]] = None
+        self._pending: List[str] = []
+
+        # Bare token state
+        self._bare: List[str] = []
+        self._bare_is_key = False
+
+    @property
+    def done(self) -> bool:
+        """Whether the root value has been closed"""
+        return self._mode == _DONE
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """
+        Parse the next piece of text
+
+        Args:
+            chunk: Next piece of the document
+
+        Returns:
+            List of (field, value) pairs of the root object completed by this chunk
+        """
+        for char in chunk:
+            if self._mode == _DONE:
+                break
+            self._step(char)
+
+        completed, self._completed = self._completed, []
+        return completed
+
+    def close(self) -> Any:
+        """
+        Finish parsing, closing any unterminated strings and containers
+
+        Returns:
+            The parsed root value
+
+        Raises:
+            ValueError: If no JSON object or array was found
+        """
+        if self._mode in (_STRING, _QUOTE_PENDING, _COMMA_PENDING):
+            self._finish_string()
+        elif self._mode == _BARE:
+            self._finish_bare()
+
+        while self._stack:
+            self._close_container()
+
+        if self.root is None:
+            raise ValueError("No JSON object found in text")
+        self._mode = _DONE
+        return self.root
+
+    def _step(self, char: str) -> None:
+        mode = self._mode
+
+        if mode == _STRING:
+            self._string_char(char)
+        elif mode == _QUOTE_PENDING:
+            self._quote_pending_char(char)
+        elif mode == _COMMA_PENDING:
+            self._comma_pending_char(char)
+        elif mode == _BARE:
+            if self._ends_bare(char):
+                self._finish_bare()
+                self._structure_char(char)
+            else:
+                self._bare.append(char)
+        elif mode == _STRUCTURE:
+            self._structure_char(char)
+        elif mode == _SEEK:
+            if char in self._root_chars:
+                self._mode = _STRUCTURE
+                self._open_container(char)
+
+    def _structure_char(self, char: str) -> None:
+        if char in _WHITESPACE:
+            return
+
+        frame = self._stack[-1]
+        is_object = isinstance(frame.container, dict)
+
+        if char == "{" or char == "[":
+            if is_object and frame.expect in (_EXPECT_KEY, _EXPECT_COMMA):
+                # A container can't be a key; skip it as noise
+                return
+            self._open_container(char)
+        elif char == "}" or char == "]":
+            self._close_container()
+        elif char == ",":
+            if frame.expect == _EXPECT_COMMA:
+                frame.expect = _EXPECT_KEY if is_object else _EXPECT_VALUE
+        elif char == ":":
+            if is_object and frame.expect == _EXPECT_COLON:
+                frame.expect = _EXPECT_VALUE
+        elif char == '"' or char == "'":
+            self._mode = _STRING
+            self._quote = char
+            self._is_key = is_object and frame.expect in (_EXPECT_KEY, _EXPECT_COMMA)
+            self._buf = []
+        else:
+            self._mode = _BARE
+            self._bare_is_key = is_object and frame.expect in (_EXPECT_KEY, _EXPECT_COMMA)
+            self._bare = [char]
+
+    def _string_char(self, char: str) -> None:
+        if self._hex is not None:
+            self._hex.append(char)
+            if len(self._hex) == 4:
+                digits = "".join(self._hex)
+                self._hex = None
+                try:
+                    self._buf.append(chr(int(digits, 16)))
+                except ValueError:
+                    self._buf.append("\\u" + digits)
+        elif self._escape:
+            self._escape = False
+            if char == "u":
+                self._hex = []
+            else:
+                self._buf.append(_ESCAPES.get(char, char))
+        elif char == "\\":
+            self._escape = True
+        elif char == self._quote:
+            self._mode = _QUOTE_PENDING
+            self._pending = []
+        else:
+            self._buf.append(char)
+
+    def _quote_pending_char(self, char: str) -> None:
+        # Decide whether the quote just seen closes the string by looking at
+        # the next significant character
+        if char in _WHITESPACE:
+            self._pending.append(char)
+            return
+
+        frame = self._stack[-1]
+        if self._is_key:
+            closes = char in ":,}"
+        elif isinstance(frame.container, dict):
+            closes = char == "}"
+        else:
+            closes = char == "]"
+
+        if char == ",":
+            self._mode = _COMMA_PENDING
+            self._pending.append(char)
+            return
+        if char == self._quote and "\n" in self._pending:
+            # Two strings on separate lines with the comma missing
+            closes = True
+
+        if closes:
+            self._finish_string()
+            self._structure_char(char)
+        else:
+            self._unread_quote(char)
+
+    def _comma_pending_char(self, char: str) -> None:
+        if char in _WHITESPACE:
+            self._pending.append(char)
+            return
+
+        if self._is_key or char in "\"'{[}]-" or char.isdigit():
+            self._finish_string()
+            self._structure_char(",")
+            self._structure_char(char)
+        else:
+            self._unread_quote(char)
+
+    def _unread_quote(self, char: str) -> None:
+        # The quote was part of the text: keep it and the lookahead literally
+        self._buf.append(self._quote)
+        self._buf.extend(self._pending)
+        self._pending = []
+        self._mode = _STRING
+        self._string_char(char)
+
+    def _ends_bare(self, char: str) -> bool:
+        if self._bare_is_key:
+            return char in ":,{}[]\"'" or char in _WHITESPACE
+        if isinstance(self._stack[-1].container, dict):
+            return char in ",}\n\""
+        return char in ",]\n\""
+
+    def _finish_string(self) -> None:
+        value = "".join(self._buf)
+        self._buf = []
+        self._pending = []
+        self._escape = False
+        self._hex = None
+        self._mode = _STRUCTURE
+        if self._is_key:
+            self._set_key(value)
+        else:
+            self._put(value)
+
+    def _finish_bare(self) -> None:
+        token = "".join(self._bare).strip()
+        self._bare = []
+        self._mode = _STRUCTURE
+        if not token:
+            return
+
+        if self._bare_is_key:
+            self._set_key(token)
+            return
+
+        lowered = token.lower()
+        if lowered in _LITERALS:
+            self._put(_LITERALS[lowered])
+            return
+        try:
+            self._put(int(token))
+        except ValueError:
+            try:
+                self._put(float(token))
+            except ValueError:
+                self._put(token)
+
+    def _set_key(self, key: str) -> None:
+        frame = self._stack[-1]
+        frame.key = key
+        frame.expect = _EXPECT_COLON
+
+    def _put(self, value: Any) -> None:
+        frame = self._stack[-1]
+        if isinstance(frame.container, dict):
+            if frame.key is None:
+                # A value without a key can't be placed in an object
+                return
+            frame.container[frame.key] = value
+            if len(self._stack) == 1:
+                self._completed.append((frame.key, value))
+            frame.key = None
+        else:
+            frame.container.append(value)
+        frame.expect = _EXPECT_COMMA
+
+    def _open_container(self, char: str) -> None:
+        container: Any = {} if char == "{" else []
+        expect = _EXPECT_KEY if char == "{" else _EXPECT_VALUE
+
+        if not self._stack:
+            self.root = container
+            self._stack.append(_Frame(container, expect, None))
+            return
+
+        parent = self._stack[-1]
+        parent_key = parent.key
+        if isinstance(parent.container, dict):
+            if parent_key is None:
+                return
+            parent.container[parent_key] = container
+            parent.key = None
+        else:
+            parent.container.append(container)
+        parent.expect = _EXPECT_COMMA
+        self._stack.append(_Frame(container, expect, parent_key))
+
+    def _close_container(self) -> None:
+        frame = self._stack.pop()
+        if not self._stack:
+            self._mode = _DONE
+            return
+        if len(self._stack) == 1 and frame.parent_key is not None:
+            self._completed.append((frame.parent_key, frame.container))
+
+
+def loads_tolerant(text: str, object_only: bool = False) -> Any:
+    """
+    Parse JSON from model output, repairing it if necessary
+
+    Args:
+        text: Raw text containing a JSON object or array
+        object_only: Only accept an object, ignoring arrays before it
+
+    Returns:
+        The parsed value
+
+    Raises:
+        ValueError: If no JSON object or array was found
+    """
+    try:
+        value = json.loads(text)
+        if not object_only or isinstance(value, dict):
+            return value
+    except (json.JSONDecodeError, TypeError):
+        pass
+
+    parser = TolerantJSONParser(object_only)
+    parser.feed(text)
+    return parser.close()
+
+
+def repair_json(text: str, object_only: bool = False) -> str:
+    """
+    Repair malformed JSON from model output into a valid JSON string
+
+    Args:
+        text: Raw text containing a JSON object or array
+        object_only: Only accept an object, ignoring arrays before it
+
+    Returns:
+        Valid JSON string
+
+    Raises:
+        ValueError: If no JSON object or array was found
+    """
+    return json.dumps(loads_tolerant(text, object_only))
+
+
+def parse_json_object(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Parse a JSON object from model output, repairing it if necessary
+
+    Args:
+        text: Raw text containing a JSON object
+
+    Returns:
+        The parsed dict, or None if no object could be recovered
+    """
+    try:
+        value = loads_tolerant(text, object_only=True)
+    except ValueError:
+        return None
+    return value if isinstance(value, dict) else None
@@ -12,12 +12,58 @@ from google.api_core.exceptions import DeadlineExceeded
 from werkzeug.utils import secure_filename
 import openai
 
+from .analysis_cache import create_analysis_cache
+from .json_repair import repair_json
+from .hedging import ProviderSpec, AllProvidersFailed, hedged_call, sequential_call, hedging_stats
+from .circuit_breaker import route_providers, breaker_snapshot
+from .model_registry import get_model, use_openai_session, warm_up_models, warm_up_openai
+from .model_scheduler import scheduled_call, get_scheduler
+from .model_telemetry import (
+    record_cache_lookup, record_fallback_depth, record_parse_failure, rough_token_count,
+    track_request_cost,
+)
+from .skill_taxonomy import get_skill_taxonomy
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Cache for analysis results to avoid redundant processing
-_analysis_cache: Dict[str, Tuple[Dict[str, Any], datetime]] = {}
+# Bounded cache for analysis results to avoid redundant processing
+_cache_ttl = timedelta(hours=6)
+_analysis_cache = create_analysis_cache(default_ttl=_cache_ttl.total_seconds())
+
+def _parse_budgets(value: str) -> Dict[str, float]:
+    """Parse per-provider budgets from a "name=seconds,name=seconds" string"""
+    budgets = {}
+    for item in value.split(","):
+        if "=" in item:
+            name, seconds = item.split("=", 1)
+            budgets[name.strip()] = float(seconds)
+    return budgets
+
+# Hedging: launch the next provider concurrently when the current one is
+# slower than HEDGE_PERCENTILE of its recent latency, instead of waiting
+# for its whole timeout
+HEDGING_ENABLED = os.environ.get("ANALYSIS_HEDGING_ENABLED", "true").lower() == "true"
+HEDGE_PERCENTILE = float(os.environ.get("ANALYSIS_HEDGE_PERCENTILE", "95"))
+HEDGE_DEFAULT_DELAY = float(os.environ.get("ANALYSIS_HEDGE_DEFAULT_DELAY", "8"))
+HEDGE_MIN_DELAY = float(os.environ.get("ANALYSIS_HEDGE_MIN_DELAY", "1"))
+
+# Per-provider time budgets in seconds
+DEFAULT_PROVIDER_BUDGET = 60.0
+PROVIDER_BUDGETS = _parse_budgets(os.environ.get("ANALYSIS_PROVIDER_BUDGETS", ""))
+
+# Generation settings shared by the Gemini providers
+GEMINI_GENERATION_CONFIG = {
+    "temperature": 0.1,  # Lower temperature for more deterministic results
+    "top_p": 0.9,        # Increased for better vocabulary access
+    "top_k": 30,         # Increased for more diverse terminology
+    "max_output_tokens": 8192,  # Maximum output tokens for comprehensive analysis
+    "response_mime_type": "application/json",  # Force JSON response format
+}
+
+# Output tokens reserved with the model scheduler for a GPT-4 analysis
+OPENAI_MAX_TOKENS = 8000
 
 # Configure Google API
 genai.configure(api_key=os.environ.get("GOOGLE_API_KEY"))
@@ -36,234 +82,293 @@ async def analyze_resume(resume_text: str, job_description: str) -> Dict[str, An
     Returns:
         Dict containing the analysis results
     """
+    with track_request_cost("analysis"):
+        return await _analyze_resume(resume_text, job_description)
+
+async def _analyze_resume(resume_text: str, job_description: str) -> Dict[str, Any]:
     # Create a cache key based on the hash of inputs
     cache_key = hashlib.md5(f"{resume_text}:{job_description}".encode()).hexdigest()
     
     # Check if we already have a cached result that's less than 6 hours old
-    if cache_key in _analysis_cache:
-        cached_result, timestamp = _analysis_cache[cache_key]
-        if datetime.now() - timestamp < timedelta(hours=6):
-            print("Using cached analysis result")
-            return cached_result
-
-    # Analysis with fallback attempts
-    max_attempts = 3
-    for attempt_count in range(max_attempts):
-        try:
-            if attempt_count == 0:
-                # First attempt: Use Gemini 1.5 Ultra
-                logger.info("Attempt 1: Using Gemini 1.5 Ultra")
-                response_text = await try_with_gemini_ultra(resume_text, job_description)
-            elif attempt_count == 1:
-                # Second attempt: Use OpenAI GPT-4
-                logger.info("Attempt 2: Using OpenAI GPT-4")
-                response_text = await try_with_openai_gpt4(resume_text, job_description)
-            else:
-                # Third attempt: Use Gemini 1.5 Pro
-                logger.info("Attempt 3: Using Gemini 1.5 Pro")
-                response_text = await try_with_gemini_pro(resume_text, job_description)
-            
-            # Get the response text and log it for debugging
-            logger.info(f"Raw response from model: {response_text[:200]}...")
-            
-            # Attempt to repair and parse the JSON
+    cached_result = _analysis_cache.get(cache_key)
+    record_cache_lookup("analysis", cached_result is not None)
+    if cached_result is not None:
+        print("Using cached analysis result")
+        return cached_result
+
+    # Analysis with fallback providers, either hedged or strictly sequential.
+    # Providers with an open circuit are skipped and the rest are ordered by
+    # current health and latency
+    providers = route_providers(_analysis_providers(resume_text, job_description))
+    if not providers:
+        # Don't cache: the providers may recover well before the cache TTL
+        logger.warning("All providers have open circuits. Generating default response.")
+        record_fallback_depth("default", 0)
+        return generate_default_response(resume_text, job_description)
+
+    try:
+        if HEDGING_ENABLED:
+            result, provider = await hedged_call(
+                providers,
+                percentile=HEDGE_PERCENTILE,
+                default_delay=HEDGE_DEFAULT_DELAY,
+                min_delay=HEDGE_MIN_DELAY,
+            )
+        else:
+            result, provider = await sequential_call(providers)
+        logger.info(f"Analysis completed by {provider}")
+        # How far down the routed chain the answer came from
+        depth = next(index for index, spec in enumerate(providers) if spec.name == provider)
+        record_fallback_depth(provider, depth)
+    except AllProvidersFailed as e:
+        # If all attempts failed, return a default response
+        logger.warning(f"All analysis attempts failed ({e.errors}). Generating default response.")
+        record_fallback_depth("default", len(providers))
+        result = generate_default_response(resume_text, job_description)
+
+    _analysis_cache.set(cache_key, result)
+    return result
+
+def provider_health() -> Dict[str, Any]:
+    """
+    Get circuit breaker, hedging and model scheduler state for every
+    analysis provider
+    
+    Returns:
+        Dict containing breaker snapshots, hedging counters and scheduler state
+    """
+    return {
+        "providers": breaker_snapshot(),
+        "hedging": {"enabled": HEDGING_ENABLED, **hedging_stats},
+        "scheduler": get_scheduler().stats(),
+    }
+
+async def prewarm_providers() -> Dict[str, Optional[float]]:
+    """
+    Pre-connect the Gemini channel and the OpenAI session
+
+    Returns:
+        Dict mapping provider to warm-up round-trip time, or None on failure
+    """
+    timings = await warm_up_models([
+        get_model("gemini-1.5-ultra", GEMINI_GENERATION_CONFIG),
+        get_model("gemini-1.5-pro", GEMINI_GENERATION_CONFIG),
+    ])
+    timings["openai"] = await warm_up_openai()
+    return timings
+
+
+def _analysis_providers(resume_text: str, job_description: str) -> List[ProviderSpec]:
+    """
+    Build the provider chain for an analysis, in order of preference
+    
+    Args:
+        resume_text: The resume text
+        job_description: The job description
+        
+    Returns:
+        List of providers whose calls return a validated result
+    """
+    def provider(name: str, try_with, full_format: bool) -> ProviderSpec:
+        budget = PROVIDER_BUDGETS.get(name, DEFAULT_PROVIDER_BUDGET)
+
+        async def call() -> Dict[str, Any]:
+            response_text = await try_with(resume_text, job_description, timeout=budget)
             try:
-                # 1. First try direct parsing
-                cleaned_json = clean_json_response(response_text)
-                result = json.loads(cleaned_json)
-                logger.info("Successfully parsed response as JSON directly")
-                
-                # 2. Validate required fields based on attempt number
-                if attempt_count == 0:
-                    # Check for required fields in full format
-                    required_fields = [
-                        "match_score", "feedback", "skills_match", "improvement_areas",
-                        "job_title", "industry_insights"
-                    ]
-                    
-                    for field in required_fields:
-                        if field not in result:
-                            logger.warning(f"Missing required field: {field}")
-                            raise ValueError(f"Missing required field: {field}")
-                else:
-                    # Check for required fields in simplified format
-                    required_fields = ["match_score", "feedback", "skills_match", "improvement_areas", "job_title"]
-                    
-                    for field in required_fields:
-                        if field not in result:
-                            logger.warning(f"Missing required field: {field}")
-                            raise ValueError(f"Missing required field: {field}")
-                
-                # 3. For first attempt with complete format
-                if attempt_count == 0:
-                    # Ensure all fields have proper data types
-                    result["match_score"] = float(result.get("match_score", 0))
-                    result["searchability_issues"] = int(result.get("searchability_issues", 0))
-                    result["hard_skills_issues"] = int(result.get("hard_skills_issues", 0))
-                    result["soft_skills_issues"] = int(result.get("soft_skills_issues", 0))
-                    result["recruiter_tips_issues"] = int(result.get("recruiter_tips_issues", 0))
-                    result["formatting_issues"] = int(result.get("formatting_issues", 0))
-                    result["keywords_match_percentage"] = float(result.get("keywords_match_percentage", 0))
-                    result["experience_level_percentage"] = float(result.get("experience_level_percentage", 0))
-                    result["skills_relevance_percentage"] = float(result.get("skills_relevance_percentage", 0))
-                    
-                    # Ensure nested objects exist
-                    if "industry_insights" not in result or not isinstance(result["industry_insights"], dict):
-                        result["industry_insights"] = {
-                            "industry": "General",
-                            "title": f"General Resume Recommendations for {datetime.now().year}",
-                            "recommendations": [
-                                "Tailor your resume to match the specific job description",
-                                "Quantify achievements with specific metrics when possible",
-                                "Use action verbs to begin bullet points",
-                                "Include relevant keywords from the job description",
-                                "Ensure your resume is ATS-friendly with a clean format"
-                            ]
-                        }
-                    
-                    if "formatting_checks" not in result or not isinstance(result["formatting_checks"], dict):
-                        result["formatting_checks"] = {
-                            "font_check": {
-                                "passed": True,
-                                "details": [
-                                    "Use standard fonts like Arial, Calibri, or Times New Roman for best ATS compatibility",
-                                    "Keep font size between 10-12pt for body text",
-                                    "Use consistent font styling throughout your resume"
-                                ]
-                            },
-                            "layout_check": {
-                                "passed": True,
-                                "details": [
-                                    "Use a single-column layout for better ATS readability",
-                                    "Avoid tables, text boxes, and complex formatting",
-                                    "Use standard section headings like 'Experience' and 'Education'"
-                                ]
-                            },
-                            "page_setup_check": {
-                                "passed": True,
-                                "details": [
-                                    "Use standard margins (0.5-1 inch)",
-                                    "Save your resume as a PDF file",
-                                    "Keep your resume to 1-2 pages maximum"
-                                ]
-                            }
-                        }
-                        
-                    # Cache and return the validated result
-                    _analysis_cache[cache_key] = (result, datetime.now())
-                    return result
-                    
-                else:
-                    # For fallback attempts with simplified format, add missing fields
-                    result = {
-                        "match_score": float(result.get("match_score", 0)),
-                        "feedback": result.get("feedback", ""),
-                        "skills_match": result.get("skills_match", []),
-                        "improvement_areas": result.get("improvement_areas", []),
-                        "job_title": result.get("job_title", "Unknown Position"),
-                        "searchability_issues": 0,
-                        "hard_skills_issues": 0,
-                        "soft_skills_issues": 0,
-                        "recruiter_tips_issues": 0,
-                        "formatting_issues": 0,
-                        "keywords_match_percentage": float(result.get("match_score", 0)),
-                        "experience_level_percentage": float(result.get("match_score", 0)),
-                        "skills_relevance_percentage": float(result.get("match_score", 0)),
-                        "industry_insights": {
-                            "industry": "General",
-                            "title": f"General Resume Recommendations for {datetime.now().year}",
-                            "recommendations": [
-                                "Tailor your resume to match the specific job description",
-                                "Quantify achievements with specific metrics when possible",
-                                "Use action verbs to begin bullet points",
-                                "Include relevant keywords from the job description",
-                                "Ensure your resume is ATS-friendly with a clean format"
-                            ]
-                        },
-                        "formatting_checks": {
-                            "font_check": {
-                                "passed": True,
-                                "details": [
-                                    "Use standard fonts like Arial, Calibri, or Times New Roman for best ATS compatibility",
-                                    "Keep font size between 10-12pt for body text",
-                                    "Use consistent font styling throughout your resume"
-                                ]
-                            },
-                            "layout_check": {
-                                "passed": True,
-                                "details": [
-                                    "Use a single-column layout for better ATS readability",
-                                    "Avoid tables, text boxes, and complex formatting",
-                                    "Use standard section headings like 'Experience' and 'Education'"
-                                ]
-                            },
-                            "page_setup_check": {
-                                "passed": True,
-                                "details": [
-                                    "Use standard margins (0.5-1 inch)",
-                                    "Save your resume as a PDF file",
-                                    "Keep your resume to 1-2 pages maximum"
-                                ]
-                            }
-                        }
-                    }
-                    _analysis_cache[cache_key] = (result, datetime.now())
-                    return result
-                    
-            except Exception as json_error:
-                logger.error(f"Failed to parse response as JSON: {str(json_error)}")
-                logger.error(f"Response text: {response_text[:500]}...")
-                
-                # If this isn't the last attempt, try again
-                if attempt_count < max_attempts - 1:
-                    logger.info(f"Retrying with attempt {attempt_count + 2}...")
-                    continue
-                
-                # Last attempt failed, create a default response
-                logger.warning("All JSON parsing attempts failed. Generating default response.")
-                default_result = generate_default_response(resume_text, job_description)
-                _analysis_cache[cache_key] = (default_result, datetime.now())
-                return default_result
-                
-        except DeadlineExceeded:
-            logger.error(f"Request timed out on attempt {attempt_count + 1}")
-            if attempt_count < max_attempts - 1:
-                logger.info(f"Retrying with attempt {attempt_count + 2}...")
-                continue
-        except Exception as e:
-            logger.error(f"Error during analysis on attempt {attempt_count + 1}: {str(e)}")
-            if attempt_count < max_attempts - 1:
-                logger.info(f"Retrying with attempt {attempt_count + 2}...")
-                continue
+                return _parse_provider_response(response_text, full_format)
+            except ValueError:
+                record_parse_failure(name)
+                raise
+
+        return ProviderSpec(name, call, budget)
+
+    return [
+        provider("gemini-1.5-ultra", try_with_gemini_ultra, True),
+        provider("gpt-4", try_with_openai_gpt4, False),
+        provider("gemini-1.5-pro", try_with_gemini_pro, False),
+    ]
+
+def _parse_provider_response(response_text: str, full_format: bool) -> Dict[str, Any]:
+    """
+    Parse and validate a provider response into an analysis result
     
-    # If all attempts failed, return a default response
-    logger.warning("All analysis attempts failed. Generating default response.")
-    default_result = generate_default_response(resume_text, job_description)
-    _analysis_cache[cache_key] = (default_result, datetime.now())
-    return default_result
+    Args:
+        response_text: The raw response text
+        full_format: Whether the provider was asked for the full result format
+        
+    Returns:
+        The validated analysis result
+        
+    Raises:
+        ValueError: If the response is not valid JSON or misses required fields
+    """
+    # Get the response text and log it for debugging
+    logger.info(f"Raw response from model: {response_text[:200]}...")
+    
+    # Attempt to repair and parse the JSON
+    try:
+        cleaned_json = clean_json_response(response_text)
+        result = json.loads(cleaned_json)
+    except json.JSONDecodeError as json_error:
+        logger.error(f"Failed to parse response as JSON: {str(json_error)}")
+        logger.error(f"Response text: {response_text[:500]}...")
+        raise ValueError(f"Invalid JSON response: {str(json_error)}")
+    logger.info("Successfully parsed response as JSON directly")
+    
+    # Validate required fields based on the requested format
+    if full_format:
+        # Check for required fields in full format
+        required_fields = [
+            "match_score", "feedback", "skills_match", "improvement_areas",
+            "job_title", "industry_insights"
+        ]
+        
+        for field in required_fields:
+            if field not in result:
+                logger.warning(f"Missing required field: {field}")
+                raise ValueError(f"Missing required field: {field}")
+    else:
+        # Check for required fields in simplified format
+        required_fields = [
+            "match_score", "feedback", "skills_match", "improvement_areas", "job_title"
+        ]
+        
+        for field in required_fields:
+            if field not in result:
+                logger.warning(f"Missing required field: {field}")
+                raise ValueError(f"Missing required field: {field}")
+    
+    # For the complete format
+    if full_format:
+        # Ensure all fields have proper data types
+        result["match_score"] = float(result.get("match_score", 0))
+        result["searchability_issues"] = int(result.get("searchability_issues", 0))
+        result["hard_skills_issues"] = int(result.get("hard_skills_issues", 0))
+        result["soft_skills_issues"] = int(result.get("soft_skills_issues", 0))
+        result["recruiter_tips_issues"] = int(result.get("recruiter_tips_issues", 0))
+        result["formatting_issues"] = int(result.get("formatting_issues", 0))
+        result["keywords_match_percentage"] = float(result.get("keywords_match_percentage", 0))
+        result["experience_level_percentage"] = float(result.get("experience_level_percentage", 0))
+        result["skills_relevance_percentage"] = float(result.get("skills_relevance_percentage", 0))
+        
+        # Ensure nested objects exist
+        if "industry_insights" not in result or not isinstance(result["industry_insights"], dict):
+            result["industry_insights"] = {
+                "industry": "General",
+                "title": f"General Resume Recommendations for {datetime.now().year}",
+                "recommendations": [
+                    "Tailor your resume to match the specific job description",
+                    "Quantify achievements with specific metrics when possible",
+                    "Use action verbs to begin bullet points",
+                    "Include relevant keywords from the job description",
+                    "Ensure your resume is ATS-friendly with a clean format"
+                ]
+            }
+        
+        if "formatting_checks" not in result or not isinstance(result["formatting_checks"], dict):
+            result["formatting_checks"] = {
+                "font_check": {
+                    "passed": True,
+                    "details": [
+                        "Use standard fonts like Arial, Calibri, or Times New Roman "
+                        "for best ATS compatibility",
+                        "Keep font size between 10-12pt for body text",
+                        "Use consistent font styling throughout your resume"
+                    ]
+                },
+                "layout_check": {
+                    "passed": True,
+                    "details": [
+                        "Use a single-column layout for better ATS readability",
+                        "Avoid tables, text boxes, and complex formatting",
+                        "Use standard section headings like 'Experience' and 'Education'"
+                    ]
+                },
+                "page_setup_check": {
+                    "passed": True,
+                    "details": [
+                        "Use standard margins (0.5-1 inch)",
+                        "Save your resume as a PDF file",
+                        "Keep your resume to 1-2 pages maximum"
+                    ]
+                }
+            }
+            
+        # Return the validated result
+        return result
+        
+    else:
+        # For fallback attempts with simplified format, add missing fields
+        result = {
+            "match_score": float(result.get("match_score", 0)),
+            "feedback": result.get("feedback", ""),
+            "skills_match": result.get("skills_match", []),
+            "improvement_areas": result.get("improvement_areas", []),
+            "job_title": result.get("job_title", "Unknown Position"),
+            "searchability_issues": 0,
+            "hard_skills_issues": 0,
+            "soft_skills_issues": 0,
+            "recruiter_tips_issues": 0,
+            "formatting_issues": 0,
+            "keywords_match_percentage": float(result.get("match_score", 0)),
+            "experience_level_percentage": float(result.get("match_score", 0)),
+            "skills_relevance_percentage": float(result.get("match_score", 0)),
+            "industry_insights": {
+                "industry": "General",
+                "title": f"General Resume Recommendations for {datetime.now().year}",
+                "recommendations": [
+                    "Tailor your resume to match the specific job description",
+                    "Quantify achievements with specific metrics when possible",
+                    "Use action verbs to begin bullet points",
+                    "Include relevant keywords from the job description",
+                    "Ensure your resume is ATS-friendly with a clean format"
+                ]
+            },
+            "formatting_checks": {
+                "font_check": {
+                    "passed": True,
+                    "details": [
+                        "Use standard fonts like Arial, Calibri, or Times New Roman "
+                        "for best ATS compatibility",
+                        "Keep font size between 10-12pt for body text",
+                        "Use consistent font styling throughout your resume"
+                    ]
+                },
+                "layout_check": {
+                    "passed": True,
+                    "details": [
+                        "Use a single-column layout for better ATS readability",
+                        "Avoid tables, text boxes, and complex formatting",
+                        "Use standard section headings like 'Experience' and 'Education'"
+                    ]
+                },
+                "page_setup_check": {
+                    "passed": True,
+                    "details": [
+                        "Use standard margins (0.5-1 inch)",
+                        "Save your resume as a PDF file",
+                        "Keep your resume to 1-2 pages maximum"
+                    ]
+                }
+            }
+        }
+        return result
+
 
-async def try_with_gemini_ultra(resume_text: str, job_description: str) -> str:
+async def try_with_gemini_ultra(resume_text: str, job_description: str, timeout: float = 60) -> str:
     """
     Try to analyze the resume with Gemini 1.5 Ultra
     
     Args:
         resume_text: The resume text
         job_description: The job description
+        timeout: Time budget for the call in seconds
         
     Returns:
         The raw response text
     """
-    # Initialize the model
-    model = genai.GenerativeModel("gemini-1.5-ultra")
-    
-    # Configure the model with optimized settings
-    generation_config = {
-        "temperature": 0.1,  # Lower temperature for more deterministic results
-        "top_p": 0.9,        # Increased for better vocabulary access
-        "top_k": 30,         # Increased for more diverse terminology
-        "max_output_tokens": 8192,  # Maximum output tokens for comprehensive analysis
-        "response_mime_type": "application/json",  # Force JSON response format
-    }
+    # Shared model, built once per process
+    model = get_model("gemini-1.5-ultra", GEMINI_GENERATION_CONFIG)
 
     # Create the full prompt
     prompt = f"""
@@ -324,40 +429,35 @@ async def try_with_gemini_ultra(resume_text: str, job_description: str) -> str:
     REMEMBER: Return ONLY valid JSON format. No additional text, no explanations outside the JSON structure.
     """
 
-    # Generate the response with timeout
+    # Generate the response with timeout, once the model scheduler lets
+    # the call through
     response = await asyncio.wait_for(
-        model.generate_content_async(
-            prompt,
-            generation_config=generation_config
+        scheduled_call(
+            "gemini-1.5-ultra",
+            lambda: model.generate_content_async(prompt),
+            prompt_tokens=rough_token_count(prompt),
+            max_output_tokens=GEMINI_GENERATION_CONFIG["max_output_tokens"],
         ),
-        timeout=60  # 60 second timeout to allow for comprehensive analysis
+        timeout=timeout  # Defaults to 60 seconds to allow for comprehensive analysis
     )
     
     # Return the response text
     return response.text if hasattr(response, 'text') else str(response)
 
-async def try_with_gemini_pro(resume_text: str, job_description: str) -> str:
+async def try_with_gemini_pro(resume_text: str, job_description: str, timeout: float = 60) -> str:
     """
     Try to analyze the resume with Gemini 1.5 Pro
     
     Args:
         resume_text: The resume text
         job_description: The job description
+        timeout: Time budget for the call in seconds
         
     Returns:
         The raw response text
     """
-    # Initialize the model
-    model = genai.GenerativeModel("gemini-1.5-pro")
-    
-    # Configure the model with optimized settings
-    generation_config = {
-        "temperature": 0.1,  # Lower temperature for more deterministic results
-        "top_p": 0.9,        # Increased for better vocabulary access
-        "top_k": 30,         # Increased for more diverse terminology
-        "max_output_tokens": 8192,  # Maximum output tokens for comprehensive analysis
-        "response_mime_type": "application/json",  # Force JSON response format
-    }
+    # Shared model, built once per process
+    model = get_model("gemini-1.5-pro", GEMINI_GENERATION_CONFIG)
 
     # Create a simplified prompt for the Pro model
     prompt = f"""
@@ -387,25 +487,29 @@ async def try_with_gemini_pro(resume_text: str, job_description: str) -> str:
     RETURN ONLY VALID JSON. No additional text before or after the JSON object.
     """
 
-    # Generate the response with timeout
+    # Generate the response with timeout, once the model scheduler lets
+    # the call through
     response = await asyncio.wait_for(
-        model.generate_content_async(
-            prompt,
-            generation_config=generation_config
+        scheduled_call(
+            "gemini-1.5-pro",
+            lambda: model.generate_content_async(prompt),
+            prompt_tokens=rough_token_count(prompt),
+            max_output_tokens=GEMINI_GENERATION_CONFIG["max_output_tokens"],
         ),
-        timeout=60  # 60 second timeout to allow for comprehensive analysis
+        timeout=timeout  # Defaults to 60 seconds to allow for comprehensive analysis
     )
     
     # Return the response text
     return response.text if hasattr(response, 'text') else str(response)
 
-async def try_with_openai_gpt4(resume_text: str, job_description: str) -> str:
+async def try_with_openai_gpt4(resume_text: str, job_description: str, timeout: float = 60) -> str:
     """
     Try to analyze the resume with OpenAI's GPT-4
     
     Args:
         resume_text: The resume text
         job_description: The job description
+        timeout: Time budget for the call in seconds
         
     Returns:
         The raw response text
@@ -469,17 +573,32 @@ async def try_with_openai_gpt4(resume_text: str, job_description: str) -> str:
     RETURN ONLY VALID JSON. No additional text before or after the JSON object.
     """
     
-    # Call OpenAI API
+    # Call OpenAI API over the shared session, once the model scheduler lets
+    # the call through
+    use_openai_session()
     try:
-        response = await openai.ChatCompletion.acreate(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are an expert resume analyzer with deep knowledge of ATS systems, industry trends, and job market requirements. Respond only with detailed JSON."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.1,  # Low temperature for deterministic results
-            max_tokens=8000,  # Increased token limit for comprehensive analysis
-            response_format={"type": "json_object"}
+        response = await scheduled_call(
+            "gpt-4",
+            lambda: openai.ChatCompletion.acreate(
+                model="gpt-4",
+                messages=[
+                    {
+                        "role": "system",
+                        "content": (
+                            "You are an expert resume analyzer with deep knowledge of ATS "
+                            "systems, industry trends, and job market requirements. "
+                            "Respond only with detailed JSON."
+                        ),
+                    },
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.1,  # Low temperature for deterministic results
+                max_tokens=OPENAI_MAX_TOKENS,  # Increased token limit for comprehensive analysis
+                request_timeout=timeout,
+                response_format={"type": "json_object"}
+            ),
+            prompt_tokens=rough_token_count(prompt),
+            max_output_tokens=OPENAI_MAX_TOKENS,
         )
         
         # Extract the response text
@@ -496,45 +615,12 @@ def clean_json_response(text: str) -> str:
         text: The raw text containing JSON
         
     Returns:
-        Cleaned JSON string
+        Cleaned JSON string, or the original text if no JSON could be recovered
     """
-    # 1. Try to extract JSON if there's text before or after it
-    json_pattern = r'(\{.*\})'
-    json_match = re.search(json_pattern, text, re.DOTALL)
-    
-    if json_match:
-        text = json_match.group(1)
-    
-    # 2. Fix common JSON syntax errors
-    
-    # Fix unescaped quotes in string values
-    # This regex looks for unescaped quotes inside JSON string values
-    text = re.sub(r'(?<=[:\[\{,]\s*")([^"]*?)(?<!")(?:")(?=[^"]*"(?:,|\}|\]|$))', r'\1\\"', text)
-    
-    # Fix missing commas between elements
-    text = re.sub(r'(\}|\]|")\s*(\{|\[|")', r'\1,\2', text)
-    
-    # Fix trailing commas
-    text = re.sub(r',\s*(\}|\])', r'\1', text)
-    
-    # Fix missing quotes around property names
-    text = re.sub(r'(\{|\,)\s*([a-zA-Z0-9_]+)\s*:', r'\1"\2":', text)
-    
-    # 3. Validate JSON structure
-    # Check for balanced braces and brackets
-    open_braces = text.count('{')
-    close_braces = text.count('}')
-    open_brackets = text.count('[')
-    close_brackets = text.count(']')
-    
-    # Add missing closing braces or brackets
-    if open_braces > close_braces:
-        text += '}' * (open_braces - close_braces)
-    
-    if open_brackets > close_brackets:
-        text += ']' * (open_brackets - close_brackets)
-    
-    return text
+    try:
+        return repair_json(text, object_only=True)
+    except ValueError:
+        return text
 
 def generate_default_response(resume_text: str, job_description: str) -> Dict[str, Any]:
     """
@@ -551,25 +637,17 @@ def generate_default_response(resume_text: str, job_description: str) -> Dict[st
     job_title_match = re.search(r'(?i)(?:job title|position|role|hiring for)\s*:?\s*([A-Za-z0-9\s]+(?:\s+[A-Za-z0-9]+){0,5})', job_description)
     job_title = job_title_match.group(1).strip() if job_title_match else "Unknown Position"
     
-    # Extract potential skills from both texts
-    skill_keywords = [
-        "python", "java", "javascript", "typescript", "react", "angular", "vue", "node", "express", 
-        "django", "flask", "sql", "nosql", "mongodb", "postgres", "mysql", "aws", "azure", "gcp", 
-        "docker", "kubernetes", "ci/cd", "git", "agile", "scrum", "product management", "project management",
-        "leadership", "communication", "problem solving", "critical thinking", "data analysis", 
-        "machine learning", "ai", "nlp", "computer vision", "data science", "ui/ux", "design", 
-        "photoshop", "illustrator", "figma", "sketch", "html", "css", "sass", "less", "swift",
-        "kotlin", "objective-c", "flutter", "react native", "mobile development"
+    # Resolve the skills in both texts to canonical skill IDs, crediting the
+    # skills implied by the resume (Django implies Python)
+    taxonomy = get_skill_taxonomy()
+    resume_skills = set(taxonomy.with_parents(taxonomy.find_ids(resume_text)))
+    matched_ids = [
+        skill_id for skill_id in taxonomy.find_ids(job_description) if skill_id in resume_skills
     ]
     
-    matched_skills = []
-    for skill in skill_keywords:
-        if re.search(r'\b' + re.escape(skill) + r'\b', resume_text, re.IGNORECASE) and \
-           re.search(r'\b' + re.escape(skill) + r'\b', job_description, re.IGNORECASE):
-            matched_skills.append(skill)
-    
     # Limit to top 10 skills
-    matched_skills = matched_skills[:10]
+    matched_ids = matched_ids[:10]
+    matched_skills = [taxonomy.name(skill_id) for skill_id in matched_ids]
     
     # Generic improvement areas
     improvement_areas = [
@@ -584,6 +662,7 @@ def generate_default_response(resume_text: str, job_description: str) -> Dict[st
         "match_score": 60.0,  # Default moderate match
         "feedback": "Your resume contains some relevant skills for this position. Consider tailoring it more specifically to the job description and quantifying your achievements with metrics.",
         "skills_match": matched_skills,
+        "matched_skill_ids": matched_ids,
         "improvement_areas": improvement_areas,
         "searchability_issues": 5,
         "hard_skills_issues": 5,
@@ -0,0 +1,137 @@
+import re
+from collections import deque
+from typing import Any, Dict, Iterable, List, Mapping, Tuple, Union
+
+# Words keep inner dots, hyphens and trailing +/# so terms like node.js,
+# objective-c, c++ and c# stay whole; a leading dot is kept for .net.
+# Slashes and ampersands are separate tokens, so "ci/cd" matches "CI / CD"
+# while "python/django" still yields both skills.
+_TOKEN = re.compile(r"(?<![a-z0-9])\.?[a-z0-9][a-z0-9+#]*(?:[.\-][a-z0-9+#]+)*|[/&]")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into the lowercase tokens skills are matched on
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        List of tokens
+    """
+    return _TOKEN.findall(text.lower())
+
+
+class SkillMatcher:
+    """
+    Word-level Aho-Corasick automaton over a set of skill phrases
+
+    Phrases are matched on whole tokens, so word boundaries come for free
+    and "java" never matches inside "javascript". Every occurrence of every
+    phrase, including phrases nested in longer ones ("spring" in "spring
+    boot"), is found in a single pass over the document, independent of the
+    number of phrases.
+    """
+
+    def __init__(self, skills: Union[Iterable[str], Mapping[str, Any]]):
+        """
+        Build the automaton
+
+        Args:
+            skills: Skill phrases, or a mapping of phrase to the value reported
+                when it matches (such as a canonical skill ID)
+        """
+        items = skills.items() if isinstance(skills, Mapping) else ((s, s) for s in skills)
+
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[Any, int]]] = [[]]
+        self.size = 0
+
+        for phrase, value in items:
+            tokens = tokenize(phrase)
+            if tokens:
+                self._insert(tokens, value)
+
+        self._build_failure_links()
+
+    def _insert(self, tokens: List[str], value: Any) -> None:
+        state = 0
+        for token in tokens:
+            next_state = self._goto[state].get(token)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][token] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        if all(existing != value for existing, _ in self._output[state]):
+            self._output[state].append((value, len(tokens)))
+            self.size += 1
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(token, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                # Inherit the matches of the longest proper suffix
+                self._output[next_state] = self._output[next_state] + self._output[target]
+
+    def find_all(self, text: str) -> List[Tuple[Any, int, int]]:
+        """
+        Find every skill occurrence in a text
+
+        Args:
+            text: Text to search
+
+        Returns:
+            List of (value, start token index, end token index) tuples in
+            order of their end position
+        """
+        goto, fail, output = self._goto, self._fail, self._output
+        matches = []
+        state = 0
+        for index, token in enumerate(tokenize(text)):
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            for value, length in output[state]:
+                matches.append((value, index - length + 1, index + 1))
+        return matches
+
+    def find(self, text: str) -> List[Any]:
+        """
+        Find the distinct skills in a text
+
+        Args:
+            text: Text to search
+
+        Returns:
+            List of matched values in order of first occurrence
+        """
+        return list(dict.fromkeys(value for value, _, _ in self.find_all(text)))
+
+    def count(self, text: str) -> Dict[Any, int]:
+        """
+        Count the occurrences of each skill in a text
+
+        Args:
+            text: Text to search
+
+        Returns:
+            Dict mapping matched values to their number of occurrences
+        """
+        counts: Dict[Any, int] = {}
+        for value, _, _ in self.find_all(text):
+            counts[value] = counts.get(value, 0) + 1
+        return counts
+
+    def __len__(self) -> int:
+        return self.size
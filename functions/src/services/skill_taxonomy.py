@@ -0,0 +1,382 @@
+import json
+import os
+import re
+import threading
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from .skill_matcher import SkillMatcher, tokenize
+
+# Canonical skills, aliases and categories; SKILL_TAXONOMY_PATH points at a
+# replacement file in the same format
+DEFAULT_TAXONOMY_PATH = os.path.join(os.path.dirname(__file__), "data", "skill_taxonomy.json")
+SKILL_TAXONOMY_PATH = os.getenv("SKILL_TAXONOMY_PATH", DEFAULT_TAXONOMY_PATH)
+
+SOFT_SKILLS_CATEGORY = "soft_skills"
+
+# Document tokens shorter than this are only matched exactly, so common
+# words like "excels" or "flatter" don't turn into skills, and longer ones
+# tolerate a single typo against a single-word skill name or alias at least
+# this long
+MIN_FUZZY_TOKEN_LENGTH = 8
+MAX_DOCUMENT_TYPOS = 1
+
+_INNER_SEPARATOR = re.compile(r"(?<=[a-z0-9+#])[\s.\-/&]+(?=[a-z0-9])")
+
+_taxonomy: Optional["SkillTaxonomy"] = None
+_taxonomy_lock = threading.Lock()
+
+
+def normalize_skill(term: str) -> str:
+    """Normalize a skill phrase to its space-joined lowercase tokens"""
+    return " ".join(tokenize(term))
+
+
+def squash_skill(term: str) -> str:
+    """
+    Remove the separators inside a normalized skill phrase, so "react js",
+    "react.js" and "react-js" all become "reactjs"
+
+    A leading dot is kept, so ".net" doesn't collapse to "net".
+    """
+    return _INNER_SEPARATOR.sub("", term)
+
+
+def max_typos(length: int) -> int:
+    """Get the edit distance tolerated for a term of the given length"""
+    if length < 5:
+        return 0
+    if length < 10:
+        return 1
+    return 2
+
+
+def edit_distance(a: str, b: str, limit: Optional[int] = None) -> int:
+    """
+    Edit distance between two strings, counting insertions, deletions,
+    substitutions and swaps of adjacent characters as one edit each
+
+    Args:
+        a: First string
+        b: Second string
+        limit: Stop early once the distance is known to exceed this value
+
+    Returns:
+        int: The distance, or a value above ``limit`` if it was exceeded
+    """
+    if a == b:
+        return 0
+    if limit is not None and abs(len(a) - len(b)) > limit:
+        return limit + 1
+
+    before_previous: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i]
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, before_previous[j - 2] + 1)
+            current.append(value)
+        if limit is not None and min(current) > limit:
+            return limit + 1
+        before_previous, previous = previous, current
+    return previous[-1]
+
+
+def _bigrams(term: str) -> Counter:
+    padded = f"^{term}$"
+    return Counter(padded[i:i + 2] for i in range(len(padded) - 1))
+
+
+class QGramIndex:
+    """
+    Bigram index for typo-tolerant lookup under edit distance
+
+    A term of length n has n + 1 padded bigrams and one edit changes at most
+    three of them, so a term within distance k of the query must share at
+    least max(n, m) + 1 - 3k bigrams with it. Only the terms passing that
+    count filter have their edit distance computed.
+    """
+
+    def __init__(self, terms: Iterable[str] = ()):
+        self._terms: List[str] = []
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+        for term in terms:
+            self.add(term)
+
+    def add(self, term: str) -> None:
+        """Add a term"""
+        index = len(self._terms)
+        self._terms.append(term)
+        for gram, count in _bigrams(term).items():
+            self._postings.setdefault(gram, []).append((index, count))
+
+    def search(self, term: str, max_distance: int) -> List[Tuple[int, str]]:
+        """
+        Find the terms within an edit distance of a query
+
+        Args:
+            term: Query term
+            max_distance: Largest edit distance to accept
+
+        Returns:
+            List of (distance, term) tuples, closest first
+        """
+        shared: Dict[int, int] = {}
+        for gram, count in _bigrams(term).items():
+            for index, term_count in self._postings.get(gram, ()):
+                shared[index] = shared.get(index, 0) + min(count, term_count)
+
+        results = []
+        for index, common in shared.items():
+            candidate = self._terms[index]
+            if common < max(len(term), len(candidate)) + 1 - 3 * max_distance:
+                continue
+            distance = edit_distance(term, candidate, max_distance)
+            if distance <= max_distance:
+                results.append((distance, candidate))
+        return sorted(results)
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+
+class SkillTaxonomy:
+    """
+    Index over a taxonomy of canonical skills
+
+    Every skill has a canonical ID, a display name, a category in a
+    parent/child category tree and optionally a parent skill it implies
+    (Django implies Python). Names, aliases and their separator variants
+    ("React JS", "react-js", "ReactJS") are compiled into one Aho-Corasick
+    automaton for scanning documents, and into a bigram index for
+    typo-tolerant lookup of single terms such as "Kubernates".
+    """
+
+    def __init__(self, data: Dict[str, Any]):
+        """
+        Build the index
+
+        Args:
+            data: Parsed taxonomy with "categories" and "skills" mappings
+        """
+        self.version = data.get("version")
+        self.categories: Dict[str, Dict[str, Any]] = data.get("categories", {})
+        self.skills: Dict[str, Dict[str, Any]] = data.get("skills", {})
+
+        # Surface form -> canonical ID; the first skill to claim a form wins
+        self._forms: Dict[str, str] = {}
+        self._squashed: Dict[str, str] = {}
+        # Forms a misspelled word in running text may resolve to; squashed
+        # phrases are left out, as "clanguage" is one typo from "language"
+        self._document_terms: Dict[str, str] = {}
+        for skill_id, skill in self.skills.items():
+            for form in [skill["name"]] + list(skill.get("aliases", [])):
+                normalized = normalize_skill(form)
+                if not normalized:
+                    continue
+                self._forms.setdefault(normalized, skill_id)
+                squashed = squash_skill(normalized)
+                self._squashed.setdefault(squashed, skill_id)
+                if " " not in normalized and len(squashed) >= MIN_FUZZY_TOKEN_LENGTH:
+                    self._document_terms.setdefault(squashed, skill_id)
+                # "node.js" should also match "Node JS" in running text
+                spaced = normalize_skill(re.sub(r"(?<=[a-z0-9])[.\-](?=[a-z0-9])", " ", normalized))
+                if len(squashed) > 1:
+                    self._forms.setdefault(squashed, skill_id)
+                self._forms.setdefault(spaced, skill_id)
+
+        self._matcher = SkillMatcher(self._forms)
+        self._fuzzy_index = QGramIndex(self._squashed)
+        self._document_index = QGramIndex(self._document_terms)
+        self._category_paths = {
+            category: self._build_category_path(category) for category in self.categories
+        }
+        self._fuzzy_cache: "OrderedDict[Tuple[str, int, bool], Optional[str]]" = OrderedDict()
+        self._fuzzy_cache_size = 4096
+        self._fuzzy_lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path: str) -> "SkillTaxonomy":
+        """
+        Load a taxonomy from a JSON file
+
+        Args:
+            path: Path to the taxonomy file
+
+        Returns:
+            SkillTaxonomy built from the file
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def name(self, skill_id: str) -> str:
+        """Get the display name of a skill"""
+        return self.skills[skill_id]["name"]
+
+    def category(self, skill_id: str) -> str:
+        """Get the category ID of a skill"""
+        return self.skills[skill_id]["category"]
+
+    def category_path(self, skill_id: str) -> List[str]:
+        """
+        Get the categories a skill belongs to, from its own up to the root
+
+        Args:
+            skill_id: Canonical skill ID
+
+        Returns:
+            List of category IDs
+        """
+        return self._category_paths.get(self.category(skill_id), [])
+
+    def in_category(self, skill_id: str, category: str) -> bool:
+        """Whether a skill belongs to a category or one of its subcategories"""
+        return category in self.category_path(skill_id)
+
+    def with_parents(self, skill_ids: Iterable[str]) -> List[str]:
+        """
+        Add the skills implied by each skill, such as Python for Django
+
+        Args:
+            skill_ids: Canonical skill IDs
+
+        Returns:
+            List of the skills followed by their implied parent skills, without duplicates
+        """
+        result: Dict[str, None] = {}
+        for skill_id in skill_ids:
+            seen = 0
+            while skill_id and skill_id not in result and seen < 10:
+                result[skill_id] = None
+                skill_id = self.skills[skill_id].get("parent")
+                seen += 1
+        return list(result)
+
+    def lookup(self, term: str, fuzzy: bool = True) -> Optional[str]:
+        """
+        Resolve a skill term to its canonical ID
+
+        Tries the exact name or alias, then the term without separators, then
+        the closest form within a length-scaled edit distance that starts
+        with the same character.
+
+        Args:
+            term: Skill term, such as "ReactJS", "k8s" or "Kubernates"
+            fuzzy: Whether to fall back to typo-tolerant matching
+
+        Returns:
+            The canonical skill ID, or None if the term is unknown
+        """
+        normalized = normalize_skill(term)
+        if not normalized:
+            return None
+        skill_id = self._forms.get(normalized)
+        if skill_id is not None:
+            return skill_id
+        squashed = squash_skill(normalized)
+        skill_id = self._squashed.get(squashed)
+        if skill_id is not None or not fuzzy:
+            return skill_id
+        return self._fuzzy_lookup(squashed, max_typos(len(squashed)))
+
+    def find_ids(
+        self,
+        text: str,
+        fuzzy: bool = True,
+        category: Optional[str] = None,
+        exclude_category: Optional[str] = None,
+    ) -> List[str]:
+        """
+        Find the canonical skills mentioned in a document
+
+        Args:
+            text: Document text
+            fuzzy: Whether to also match words one typo away from a
+                single-word skill name or alias
+            category: Only return skills in this category tree
+            exclude_category: Leave out skills in this category tree
+
+        Returns:
+            List of canonical skill IDs in order of first occurrence
+        """
+        found: Dict[str, None] = dict.fromkeys(self._matcher.find(text))
+
+        if fuzzy:
+            for token in dict.fromkeys(tokenize(text)):
+                if len(token) < MIN_FUZZY_TOKEN_LENGTH or token in self._forms:
+                    continue
+                skill_id = self._fuzzy_lookup(token, MAX_DOCUMENT_TYPOS, document=True)
+                if skill_id is not None:
+                    found.setdefault(skill_id, None)
+
+        return [
+            skill_id for skill_id in found
+            if (category is None or self.in_category(skill_id, category))
+            and (exclude_category is None or not self.in_category(skill_id, exclude_category))
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        """Get index statistics"""
+        return {
+            "version": self.version,
+            "skills": len(self.skills),
+            "categories": len(self.categories),
+            "surface_forms": len(self._forms),
+            "fuzzy_terms": len(self._fuzzy_index),
+            "document_fuzzy_terms": len(self._document_index),
+        }
+
+    def _fuzzy_lookup(
+        self, squashed: str, max_distance: int, document: bool = False
+    ) -> Optional[str]:
+        key = (squashed, max_distance, document)
+        with self._fuzzy_lock:
+            if key in self._fuzzy_cache:
+                self._fuzzy_cache.move_to_end(key)
+                return self._fuzzy_cache[key]
+
+        skill_id = None
+        index, terms = (
+            (self._document_index, self._document_terms) if document
+            else (self._fuzzy_index, self._squashed)
+        )
+        matches = index.search(squashed, max_distance) if max_distance else []
+        # Typos rarely hit the first character, while unrelated words one
+        # edit from a skill often differ there ("clutter" and "flutter")
+        matches = [(distance, form) for distance, form in matches if form[0] == squashed[0]]
+        if matches:
+            best = matches[0][0]
+            closest = {terms[form] for distance, form in matches if distance == best}
+            # A typo equally close to two different skills stays unresolved
+            if len(closest) == 1:
+                skill_id = closest.pop()
+
+        with self._fuzzy_lock:
+            self._fuzzy_cache[key] = skill_id
+            if len(self._fuzzy_cache) > self._fuzzy_cache_size:
+                self._fuzzy_cache.popitem(last=False)
+        return skill_id
+
+    def _build_category_path(self, category: str) -> List[str]:
+        path = []
+        while category and category not in path:
+            path.append(category)
+            category = self.categories.get(category, {}).get("parent")
+        return path
+
+
+def get_skill_taxonomy() -> SkillTaxonomy:
+    """
+    Get the process-wide skill taxonomy, loading it on first use
+
+    Returns:
+        The shared SkillTaxonomy
+    """
+    global _taxonomy
+    if _taxonomy is None:
+        with _taxonomy_lock:
+            if _taxonomy is None:
+                _taxonomy = SkillTaxonomy.from_file(SKILL_TAXONOMY_PATH)
+    return _taxonomy
@@ -0,0 +1,119 @@
+import time
+
+import pytest
+
+from services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+def _breaker(**options):
+    settings = dict(
+        window_seconds=60.0,
+        min_calls=3,
+        error_rate_threshold=0.5,
+        slow_call_seconds=1.0,
+        slow_call_rate_threshold=0.8,
+        open_seconds=0.05,
+    )
+    settings.update(options)
+    return CircuitBreaker("provider", **settings)
+
+
+def _fail(breaker, times):
+    for _ in range(times):
+        breaker.acquire()
+        breaker.record_failure(0.1)
+
+
+def test_stays_closed_below_min_calls():
+    breaker = _breaker()
+    _fail(breaker, 2)
+    assert breaker.state == CLOSED
+    assert breaker.is_available()
+
+
+def test_opens_on_error_rate_and_rejects_calls():
+    breaker = _breaker(open_seconds=60.0)
+    breaker.acquire()
+    breaker.record_success(0.1)
+    _fail(breaker, 2)
+
+    assert breaker.state == OPEN
+    assert not breaker.is_available()
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()
+    assert breaker.snapshot()["rejected"] == 1
+
+
+def test_opens_on_slow_call_rate():
+    breaker = _breaker()
+    for _ in range(3):
+        breaker.acquire()
+        breaker.record_success(2.0)
+    assert breaker.state == OPEN
+
+
+def test_goes_half_open_and_closes_after_a_successful_trial():
+    breaker = _breaker()
+    _fail(breaker, 3)
+    assert breaker.state == OPEN
+
+    time.sleep(0.06)
+    assert breaker.is_available()
+    assert breaker.state == HALF_OPEN
+
+    breaker.acquire()
+    # Only one trial call at a time
+    assert not breaker.is_available()
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()
+
+    breaker.record_success(0.1)
+    assert breaker.state == CLOSED
+    # The failures that opened the circuit are forgotten
+    assert breaker.snapshot()["calls_in_window"] == 1
+
+
+def test_failed_half_open_trial_reopens():
+    breaker = _breaker()
+    _fail(breaker, 3)
+    time.sleep(0.06)
+
+    breaker.acquire()
+    breaker.record_failure(0.1)
+
+    assert breaker.state == OPEN
+    assert breaker.times_opened == 2
+
+
+def test_release_frees_the_half_open_slot():
+    breaker = _breaker()
+    _fail(breaker, 3)
+    time.sleep(0.06)
+
+    breaker.acquire()
+    breaker.release()
+
+    assert breaker.state == HALF_OPEN
+    assert breaker.is_available()
+
+
+def test_abandoned_slow_calls_open_the_circuit():
+    breaker = _breaker()
+    for _ in range(3):
+        breaker.acquire()
+        breaker.record_abandoned(1.5)
+
+    assert breaker.state == OPEN
+    assert breaker.snapshot()["slow_call_rate"] == 1.0
+
+
+def test_abandoned_half_open_trial_neither_closes_nor_reopens():
+    breaker = _breaker()
+    _fail(breaker, 3)
+    time.sleep(0.06)
+
+    breaker.acquire()
+    breaker.record_abandoned(1.5)
+
+    assert breaker.state == HALF_OPEN
+    assert breaker.is_available()
@@ -0,0 +1,93 @@
+import asyncio
+import time
+
+import pytest
+
+from services import circuit_breaker, hedging
+from services.hedging import AllProvidersFailed, ProviderSpec, hedged_call
+
+
+@pytest.fixture(autouse=True)
+def fresh_state():
+    circuit_breaker.breakers.clear()
+    hedging.latency_trackers.clear()
+    yield
+    circuit_breaker.breakers.clear()
+    hedging.latency_trackers.clear()
+
+
+def _provider(name, delay, result=None, error=None, started=None):
+    async def call():
+        if started is not None:
+            started[name] = time.monotonic()
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        return result
+
+    return ProviderSpec(name, call, budget=5.0)
+
+
+def test_fast_primary_needs_no_hedge():
+    started = {}
+    providers = [
+        _provider("primary", 0.01, "first", started=started),
+        _provider("secondary", 0.01, "second", started=started),
+    ]
+
+    assert asyncio.run(hedged_call(providers, default_delay=0.2)) == ("first", "primary")
+    assert list(started) == ["primary"]
+
+
+def test_hedge_fires_after_its_delay():
+    started = {}
+    providers = [
+        _provider("primary", 1.0, "first", started=started),
+        _provider("secondary", 0.01, "second", started=started),
+    ]
+
+    begin = time.monotonic()
+    result = asyncio.run(hedged_call(providers, default_delay=0.1, min_delay=0.05))
+
+    assert result == ("second", "secondary")
+    hedge_after = started["secondary"] - started["primary"]
+    assert 0.09 <= hedge_after < 0.5
+    # The slow primary was cancelled rather than awaited
+    assert time.monotonic() - begin < 0.9
+
+
+def test_failure_launches_the_next_provider_without_waiting():
+    started = {}
+    providers = [
+        _provider("primary", 0.01, error=RuntimeError("boom"), started=started),
+        _provider("secondary", 0.01, "second", started=started),
+    ]
+
+    result = asyncio.run(hedged_call(providers, default_delay=1.0))
+
+    assert result == ("second", "secondary")
+    assert started["secondary"] - started["primary"] < 0.5
+
+
+def test_every_provider_failing_raises():
+    providers = [
+        _provider("primary", 0.01, error=RuntimeError("boom")),
+        _provider("secondary", 0.01, error=ValueError("bad json")),
+    ]
+
+    with pytest.raises(AllProvidersFailed) as excinfo:
+        asyncio.run(hedged_call(providers, default_delay=1.0))
+    assert excinfo.value.errors == {"primary": "boom", "secondary": "bad json"}
+
+
+def test_a_slow_hedge_loser_counts_as_a_slow_call():
+    providers = [
+        _provider("primary", 1.0, "first"),
+        _provider("secondary", 0.01, "second"),
+    ]
+
+    asyncio.run(hedged_call(providers, default_delay=0.1, min_delay=0.05))
+
+    # The cancelled primary ran past the hedge delay, so that time is kept
+    assert len(hedging.get_latency_tracker("primary")) == 1
+    assert circuit_breaker.get_breaker("primary").snapshot()["calls_in_window"] == 1